@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.models import Variable
+from airflow.operators.python import PythonOperator
+from airflow.timetables.interval import CronDataIntervalTimetable
+
+from libsys_airflow.plugins.data_exports.instance_ids import capture_instance_changes
+
+default_args = {
+    "owner": "libsys",
+    "depends_on_past": False,
+    "email_on_failure": True,
+    "email_on_retry": False,
+    "retries": 1,
+    "retry_delay": timedelta(minutes=1),
+}
+
+with DAG(
+    "capture_instance_changes",
+    default_args=default_args,
+    schedule=CronDataIntervalTimetable(
+        cron=Variable.get("capture_instance_changes", "30 19 * * *"),
+        timezone="America/Los_Angeles",
+    ),
+    start_date=datetime(2024, 6, 1),
+    catchup=False,
+    tags=["data export"],
+) as dag:
+    capture_changes = PythonOperator(
+        task_id="capture_instance_changes",
+        python_callable=capture_instance_changes,
+    )
@@ -1,6 +1,5 @@
 import logging
 import math
-import pathlib
 
 from datetime import datetime, timedelta
 
@@ -11,17 +10,14 @@ from airflow.operators.python import get_current_context
 from airflow.decorators import task, task_group
 
 from libsys_airflow.plugins.data_exports.full_dump_marc import (
+    fetch_hrid_boundaries,
     fetch_number_of_records,
-    fetch_full_dump_marc,
+    fetch_full_dump_marc_range,
     reset_s3,
+    shard_hrid_range,
 )
-from libsys_airflow.plugins.data_exports.marc.transformer import Transformer
 from libsys_airflow.plugins.data_exports.sql_pool import SQLPool
-from libsys_airflow.plugins.data_exports.marc.transforms import (
-    marc_clean_serialize,
-    zip_marc_file,
-)
-from sqlalchemy import exc
+from libsys_airflow.plugins.data_exports.marc.transforms import transform_marc_files
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +50,11 @@ with DAG(
             type="integer",
             description="Number of batch processing jobs to run in parallel.",
         ),
+        "process_workers": Param(
+            1,
+            type="integer",
+            description="Number of processes in each batch processing job for saving MARC records.",
+        ),
     },
 ) as dag:
 
@@ -92,60 +93,59 @@ with DAG(
 
         return math.ceil((total / len(concurrent_jobs)) / shard) * shard
 
+    @task
+    def hrid_boundaries(div):
+        return fetch_hrid_boundaries(div=div)
+
     @task(multiple_outputs=True)
-    def calculate_start_stop(div, job):
+    def calculate_start_stop(div, job, boundaries):
         output = {"start": int(div * job), "stop": int((job + 1) * div)}
+        output.update(shard_hrid_range(job, boundaries))
         logger.info(f"Output in calculate_start_stop {output}")
         return output
 
     @task
-    def fetch_folio_records(batch_size, start, stop):
+    def fetch_folio_records(batch_size, start, stop, start_hrid, stop_hrid):
+        context = get_current_context()
+        params = context.get("params", {})  # type: ignore
+        workers = params.get("process_workers", 1)
+
         _connection = connection_pool.getconn()
         marc_file_list = []
 
-        for offset in range(start, stop, batch_size):
-            logger.info(f"fetch_folio_records: from {offset}")
-            try:
-                marc = fetch_full_dump_marc(
-                    offset=offset, batch_size=batch_size, connection=_connection
-                )
+        logger.info(f"fetch_folio_records: from {start_hrid} through {stop_hrid}")
+        try:
+            for marc in fetch_full_dump_marc_range(
+                start=start,
+                start_hrid=start_hrid,
+                stop_hrid=stop_hrid,
+                batch_size=batch_size,
+                connection=_connection,
+                workers=workers,
+            ):
                 marc_file_list.append(marc)
-            except exc.OperationalError as err:
-                logger.warning(f"{err} for offset {offset}")
-                continue
-
-        connection_pool.putconn(_connection, close=True)  # type: ignore
+        finally:
+            connection_pool.putconn(_connection, close=True)  # type: ignore
         return marc_file_list
 
     @task_group(group_id="transform_marc")
     def marc_transformations(marc_files: list):
         @task
-        def transform_marc_records_add_holdings(marc_files: list):
+        def transform_marc_records(marc_files: list):
             _connection = connection_pool.getconn()
-            transformer = Transformer(connection=_connection)
-
-            for marc_file in marc_files:
-                transformer.add_holdings_items(marc_file=marc_file, full_dump=True)
 
-            connection_pool.putconn(_connection, close=True)
-
-        @task
-        def transform_marc_records_clean_serialize(marc_files: list):
-            for marc_file in marc_files:
-                marc_clean_serialize(marc_file, full_dump=True)
+            try:
+                transform_marc_files(
+                    {"updates": marc_files},
+                    full_dump=True,
+                    batch_size=500,
+                    compress_xml=True,
+                    connection=_connection,
+                )
+            finally:
+                connection_pool.putconn(_connection, close=True)  # type: ignore
 
-        @task
-        def compress_marc_files(marc_files: list):
-            for marc_file in marc_files:
-                stem = pathlib.Path(marc_file).suffix
-                xml = marc_file.replace(stem, '.xml')
-                zip_marc_file(xml, True)
-
-        (
-            transform_marc_records_add_holdings(marc_files)
-            >> transform_marc_records_clean_serialize(marc_files)
-            >> compress_marc_files(marc_files)
-        )
+        transform_marc_records(marc_files)
 
     connection_pool = SQLPool().pool()
 
@@ -163,7 +163,11 @@ with DAG(
 
     delete_s3_files = reset_s3_bucket()
 
-    start_stop = calculate_start_stop.partial(div=record_div).expand(job=number_of_jobs)
+    shard_boundaries = hrid_boundaries(record_div)
+
+    start_stop = calculate_start_stop.partial(
+        div=record_div, boundaries=shard_boundaries
+    ).expand(job=number_of_jobs)
 
     marc_file_list = fetch_folio_records.partial(batch_size=batch_size).expand_kwargs(
         start_stop
@@ -56,6 +56,7 @@ def send_all_records():
     transmit_data = transmit_data_http_task(
         gather_files,
         files_params="upload[files][]",
+        workers=4,
     )
 
     retry_files = retry_failed_files_task(
@@ -65,6 +66,7 @@ def send_all_records():
     retry_transmission = transmit_data_http_task(
         retry_files,
         files_params="upload[files][]",
+        workers=4,
     )
 
     email_failures = failed_transmission_email(retry_transmission["failures"])
@@ -55,6 +55,17 @@ with DAG(
             description="The latest date to select record IDs from FOLIO.",
         ),
         "fetch_folio_record_ids": Param(True, type="boolean"),
+        "bulk_srs": Param(
+            False,
+            type="boolean",
+            description="Retrieve MARC in batches from the SRS tables instead of one Okapi request per record.",
+        ),
+        "srs_batch_size": Param(500, type="integer"),
+        "use_change_log": Param(
+            False,
+            type="boolean",
+            description="Select the changes captured since the last run, ignoring from_date and to_date once the vendor has a change log watermark.",
+        ),
         "saved_record_ids_kind": Param(None, type=["null", "string"]),
     },
     render_template_as_native_obj=True,
@@ -68,7 +79,11 @@ with DAG(
     fetch_folio_record_ids = PythonOperator(
         task_id="fetch_record_ids_from_folio",
         python_callable=fetch_record_ids,
-        op_kwargs={"record_kind": ["new"]},
+        op_kwargs={
+            "record_kind": ["new"],
+            "vendor": "gobi",
+            "use_change_log": "{{ params.use_change_log }}",
+        },
     )
 
     save_ids_to_file = PythonOperator(
@@ -86,6 +101,8 @@ with DAG(
         python_callable=marc_for_instances,
         op_kwargs={
             "instance_files": "{{ ti.xcom_pull('save_ids_to_file') }}",
+            "bulk_srs": "{{ params.bulk_srs }}",
+            "srs_batch_size": "{{ params.srs_batch_size }}",
         },
     )
 
@@ -45,7 +45,7 @@ def send_google_records():
 
     gather_files = gather_files_task(vendor="google")
 
-    transmit_data = transmit_data_ftp_task("google", gather_files)
+    transmit_data = transmit_data_ftp_task("google", gather_files, workers=3)
 
     archive_data = archive_transmitted_data_task(transmit_data['success'])
 
@@ -15,10 +15,7 @@ from libsys_airflow.plugins.data_exports.instance_ids import (
 )
 
 from libsys_airflow.plugins.data_exports.marc.exports import marc_for_instances
-from libsys_airflow.plugins.data_exports.marc.transforms import (
-    add_holdings_items_to_marc_files,
-    clean_and_serialize_marc_files,
-)
+from libsys_airflow.plugins.data_exports.marc.transforms import transform_marc_files
 
 devs_to_email_addr = Variable.get("EMAIL_DEVS")
 
@@ -56,6 +53,17 @@ with DAG(
             description="The latest date to select record IDs from FOLIO.",
         ),
         "fetch_folio_record_ids": Param(True, type="boolean"),
+        "bulk_srs": Param(
+            False,
+            type="boolean",
+            description="Retrieve MARC in batches from the SRS tables instead of one Okapi request per record.",
+        ),
+        "srs_batch_size": Param(500, type="integer"),
+        "use_change_log": Param(
+            False,
+            type="boolean",
+            description="Select the changes captured since the last run, ignoring from_date and to_date once the vendor has a change log watermark.",
+        ),
         "saved_record_ids_kind": Param(None, type=["null", "string"]),
     },
     render_template_as_native_obj=True,
@@ -69,6 +77,10 @@ with DAG(
     fetch_folio_record_ids = PythonOperator(
         task_id="fetch_record_ids_from_folio",
         python_callable=fetch_record_ids,
+        op_kwargs={
+            "vendor": "hathi",
+            "use_change_log": "{{ params.use_change_log }}",
+        },
     )
 
     save_ids_to_file = PythonOperator(
@@ -86,23 +98,17 @@ with DAG(
         python_callable=marc_for_instances,
         op_kwargs={
             "instance_files": "{{ ti.xcom_pull('save_ids_to_file') }}",
+            "bulk_srs": "{{ params.bulk_srs }}",
+            "srs_batch_size": "{{ params.srs_batch_size }}",
         },
     )
 
     transform_marc_record = PythonOperator(
         task_id="transform_folio_marc_record",
-        python_callable=add_holdings_items_to_marc_files,
+        python_callable=transform_marc_files,
         op_kwargs={
             "marc_file_list": "{{ ti.xcom_pull('fetch_marc_records_from_folio') }}",
-            "full_dump": False,
-        },
-    )
-
-    transform_marc_fields = PythonOperator(
-        task_id="transform_folio_marc_clean_serialize",
-        python_callable=clean_and_serialize_marc_files,
-        op_kwargs={
-            "marc_file_list": "{{ ti.xcom_pull('fetch_marc_records_from_folio') }}"
+            "deletes_leader": False,
         },
     )
 
@@ -115,5 +121,4 @@ check_record_ids >> [fetch_folio_record_ids, save_ids_to_file]
 fetch_folio_record_ids >> save_ids_to_file >> fetch_marc_records
 save_ids_to_file >> fetch_marc_records
 
-fetch_marc_records >> transform_marc_record >> transform_marc_fields
-transform_marc_fields >> finish_processing_marc
+fetch_marc_records >> transform_marc_record >> finish_processing_marc
@@ -70,6 +70,17 @@ with DAG(
             description="The latest date to select record IDs from FOLIO.",
         ),
         "fetch_folio_record_ids": Param(True, type="boolean"),
+        "bulk_srs": Param(
+            False,
+            type="boolean",
+            description="Retrieve MARC in batches from the SRS tables instead of one Okapi request per record.",
+        ),
+        "srs_batch_size": Param(500, type="integer"),
+        "use_change_log": Param(
+            False,
+            type="boolean",
+            description="Select the changes captured since the last run, ignoring from_date and to_date once the vendor has a change log watermark.",
+        ),
         "saved_record_ids_kind": Param(None, type=["null", "string"]),
     },
     render_template_as_native_obj=True,
@@ -85,6 +96,10 @@ with DAG(
     fetch_folio_record_ids = PythonOperator(
         task_id="fetch_record_ids_from_folio",
         python_callable=fetch_record_ids,
+        op_kwargs={
+            "vendor": "oclc",
+            "use_change_log": "{{ params.use_change_log }}",
+        },
     )
 
     filter_out_updates_ids = PythonOperator(
@@ -118,7 +133,12 @@ with DAG(
     def retrieve_marc_records(**kwargs):
         ti = kwargs.get("ti")
         instance_files = ti.xcom_pull(task_ids="save_ids_to_file")
-        return marc_for_instances(instance_files=instance_files)
+        params = kwargs.get("params", {})
+        return marc_for_instances(
+            instance_files=instance_files,
+            bulk_srs=params.get("bulk_srs", False),
+            srs_batch_size=params.get("srs_batch_size", 500),
+        )
 
     @task
     def divide_new_records_by_library(**kwargs):
@@ -1,6 +1,8 @@
 import logging
 
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from s3path import S3Path
+from typing import Iterator
 
 from airflow.models import Variable
 from airflow.operators.python import get_current_context
@@ -9,26 +11,166 @@ from libsys_airflow.plugins.data_exports.marc.exporter import Exporter
 
 logger = logging.getLogger(__name__)
 
+# Exporter for each process in the full dump process pool
+_exporter = None
 
-def fetch_full_dump_marc(**kwargs) -> str:
-    offset = kwargs.get("offset")
+
+def fetch_full_dump_marc_pages(**kwargs) -> Iterator[list]:
+    """
+    Yields pages of records after start_hrid through stop_hrid using keyset
+    pagination on hrid, so each page costs the same regardless of its
+    position in the catalog
+    """
+    last_hrid = kwargs.get("start_hrid")
+    stop_hrid = kwargs.get("stop_hrid")
     batch_size = kwargs.get("batch_size", 1000)
     connection = kwargs.get("connection")
-    cursor = connection.cursor()  # type: ignore
-    sql = "SELECT id, hrid, content FROM public.data_export_marc ORDER BY hrid LIMIT (%s) OFFSET (%s)"
-    params = (batch_size, offset)
-    cursor.execute(sql, params)
-    tuples = cursor.fetchall()
-
-    exporter = Exporter()
-    marc_file = exporter.retrieve_marc_for_full_dump(
-        f"{offset}_{offset + batch_size}.mrc",
-        instance_ids=tuples,
-    )
 
+    while True:
+        cursor = connection.cursor()  # type: ignore
+        sql = "SELECT id, hrid, content FROM public.data_export_marc WHERE (%s::text IS NULL OR hrid > to_jsonb(%s::text)) AND (%s::text IS NULL OR hrid <= to_jsonb(%s::text)) ORDER BY hrid LIMIT (%s)"
+        params = (last_hrid, last_hrid, stop_hrid, stop_hrid, batch_size)
+        cursor.execute(sql, params)
+        tuples = cursor.fetchall()
+        if len(tuples) < 1:
+            break
+
+        yield tuples
+
+        if len(tuples) < batch_size:
+            break
+        last_hrid = tuples[-1][1]
+
+
+def fetch_full_dump_marc_range(**kwargs) -> Iterator[str]:
+    """
+    Saves a shard of records bounded by start_hrid and stop_hrid as MARC
+    files of batch_size records named by their position from start, yielding
+    each saved file
+
+    With more than one worker, pages are parsed and saved in a process pool
+    while the next pages are fetched. A page that fails to save is logged
+    and skipped, a failed page query fails the shard since the following
+    pages are keyed on it
+    """
+    offset = kwargs.get("start", 0)
+    batch_size = kwargs.get("batch_size", 1000)
+    workers = int(kwargs.get("workers", 1))
+
+    pages = fetch_full_dump_marc_pages(**kwargs)
+    if workers > 1:
+        yield from __save_pages_in_pool__(pages, offset, batch_size, workers)
+        return
+
+    exporter = Exporter(folio_login=False)
+    for tuples in pages:
+        logger.info(f"fetch_full_dump_marc_range: from {offset}")
+        marc_filename = f"{offset}_{offset + batch_size}.mrc"
+        offset += batch_size
+        try:
+            marc_file = exporter.retrieve_marc_for_full_dump(
+                marc_filename,
+                instance_ids=tuples,
+            )
+        except Exception as e:
+            logger.warning(f"{e} for {marc_filename}")
+            continue
+        yield str(marc_file)
+
+
+def __init_pool_exporter__():
+    global _exporter
+    _exporter = Exporter(folio_login=False)
+
+
+def __save_marc_page__(marc_filename: str, tuples: list) -> str:
+    marc_file = _exporter.retrieve_marc_for_full_dump(  # type: ignore
+        marc_filename, instance_ids=tuples
+    )
     return str(marc_file)
 
 
+def __completed_pages__(done: set, pending: dict) -> Iterator[str]:
+    for future in done:
+        marc_filename = pending.pop(future)
+        try:
+            yield future.result()
+        except Exception as e:
+            logger.warning(f"{e} for {marc_filename}")
+
+
+def __save_pages_in_pool__(
+    pages: Iterator[list], offset: int, batch_size: int, workers: int
+) -> Iterator[str]:
+    """
+    Submits each page to a process pool, keeping at most two pages per
+    worker in flight, a failed page is logged without stopping the others
+    """
+    pending: dict = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=__init_pool_exporter__
+    ) as executor:
+        for tuples in pages:
+            logger.info(f"fetch_full_dump_marc_range: from {offset}")
+            marc_filename = f"{offset}_{offset + batch_size}.mrc"
+            future = executor.submit(__save_marc_page__, marc_filename, tuples)
+            pending[future] = marc_filename
+            offset += batch_size
+
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from __completed_pages__(done, pending)
+
+        done, _ = wait(pending)
+        yield from __completed_pages__(done, pending)
+
+
+def fetch_hrid_boundaries(**kwargs) -> list:
+    """
+    Returns the hrid of every div-th record and of the last record, used as
+    the inclusive upper bound of each full dump shard
+    """
+    context = get_current_context()
+    div = kwargs["div"]
+
+    query = """SELECT hrid FROM (
+      SELECT hrid,
+      row_number() OVER (ORDER BY hrid) AS rn,
+      count(*) OVER () AS total
+      FROM public.data_export_marc
+    ) AS numbered WHERE mod(rn, %(div)s) = 0 OR rn = total ORDER BY hrid"""
+
+    result = SQLExecuteQueryOperator(
+        task_id="postgres_full_hrid_boundaries_query",
+        conn_id="postgres_folio",
+        database=kwargs.get("database", "okapi"),
+        sql=query,
+        parameters={"div": div},
+    ).execute(
+        context
+    )  # type: ignore
+
+    boundaries = [row[0] for row in result]
+    logger.info(f"Shard hrid boundaries: {boundaries}")
+    return boundaries
+
+
+def shard_hrid_range(job: int, boundaries: list) -> dict:
+    """
+    Returns the exclusive start_hrid and inclusive stop_hrid of a shard,
+    shards past the last boundary are empty
+    """
+    if len(boundaries) < 1:
+        return {"start_hrid": None, "stop_hrid": None}
+
+    last = len(boundaries) - 1
+    start_hrid = None
+    if job > 0:
+        start_hrid = boundaries[min(job - 1, last)]
+
+    return {"start_hrid": start_hrid, "stop_hrid": boundaries[min(job, last)]}
+
+
 def fetch_number_of_records(**kwargs) -> int:
     context = get_current_context()
 
@@ -0,0 +1,111 @@
+import csv
+import logging
+import pathlib
+import struct
+import uuid
+
+import numpy as np
+
+from typing import Iterable, Iterator, Union
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FOLIOIDS"
+HEADER = struct.Struct("<8sQ24s24s")
+
+
+class InstanceIdSet(object):
+    """
+    Sorted set of instance UUIDs stored as 16 byte values
+
+    Saved files have a 64 byte header (magic, count, vendor and kind)
+    followed by the sorted UUID bytes so that loaded sets are memory-mapped
+    instead of parsed
+    """
+
+    def __init__(self, ids: np.ndarray, vendor: str = "", kind: str = ""):
+        self.ids = ids
+        self.vendor = vendor
+        self.kind = kind
+
+    @classmethod
+    def from_uuids(
+        cls, uuids: Iterable[str], vendor: str = "", kind: str = ""
+    ) -> "InstanceIdSet":
+        ids = np.array([uuid.UUID(str(row)).bytes for row in uuids], dtype="S16")
+        return cls(np.unique(ids), vendor=vendor, kind=kind)
+
+    @classmethod
+    def load(cls, id_set_file: Union[str, pathlib.Path]) -> "InstanceIdSet":
+        with open(id_set_file, "rb") as fo:
+            magic, count, vendor, kind = HEADER.unpack(fo.read(HEADER.size))
+
+        if magic != MAGIC:
+            raise ValueError(f"{id_set_file} is not an instance id set file")
+
+        ids = np.array([], dtype="S16")
+        if count > 0:
+            ids = np.memmap(
+                id_set_file, dtype="S16", mode="r", offset=HEADER.size, shape=(count,)
+            )
+
+        return cls(
+            ids,
+            vendor=vendor.rstrip(b"\0").decode(),
+            kind=kind.rstrip(b"\0").decode(),
+        )
+
+    def save(self, id_set_file: Union[str, pathlib.Path]) -> str:
+        id_set_path = pathlib.Path(id_set_file)
+        id_set_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with id_set_path.open("wb") as fo:
+            fo.write(
+                HEADER.pack(
+                    MAGIC, len(self.ids), self.vendor.encode(), self.kind.encode()
+                )
+            )
+            fo.write(np.ascontiguousarray(self.ids, dtype="S16").tobytes())
+
+        logger.info(f"Saved {len(self.ids):,} instance ids to {id_set_path}")
+        return str(id_set_path)
+
+    def union(self, other: "InstanceIdSet") -> "InstanceIdSet":
+        return InstanceIdSet(
+            np.union1d(self.ids, other.ids), vendor=self.vendor, kind=self.kind
+        )
+
+    def difference(self, other: "InstanceIdSet") -> "InstanceIdSet":
+        return InstanceIdSet(
+            np.setdiff1d(self.ids, other.ids, assume_unique=True),
+            vendor=self.vendor,
+            kind=self.kind,
+        )
+
+    def __contains__(self, instance_uuid: str) -> bool:
+        value = np.array([uuid.UUID(instance_uuid).bytes], dtype="S16")
+        position = np.searchsorted(self.ids, value)[0]
+        return position < len(self.ids) and self.ids[position] == value[0]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self.ids:
+            # numpy strips trailing null bytes from S16 values
+            yield str(uuid.UUID(bytes=value.ljust(16, b"\0")))
+
+
+def read_instance_ids(instance_file: pathlib.Path) -> Iterator[str]:
+    """
+    Yields instance UUIDs from an instance id set file or a CSV file with
+    one UUID per row
+    """
+    if instance_file.suffix == ".ids":
+        yield from InstanceIdSet.load(instance_file)
+        return
+
+    with instance_file.open() as fo:
+        for row in csv.reader(fo):
+            if row:
+                yield row[0]
@@ -1,12 +1,16 @@
 import ast
 import logging
-import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Union
 
 from airflow.operators.python import get_current_context
 from airflow.providers.common.sql.operators.sql import SQLExecuteQueryOperator
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+from psycopg2.extras import execute_values
+
+from libsys_airflow.plugins.data_exports.id_sets import InstanceIdSet
+from libsys_airflow.plugins.data_exports.sql_pool import SQLPool
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +27,43 @@ def choose_fetch_folio_ids(**kwargs):
 
 
 def fetch_record_ids(**kwargs) -> dict:
+    """
+    Selects instance IDs for each kind and saves them as instance id set
+    files, returns the path of each kind's file or None if there were no
+    changes
+    """
     context = get_current_context()
     params = context.get("params", {})  # type: ignore
     airflow = kwargs.get("airflow", "/opt/airflow/libsys_airflow")
+    data_airflow = kwargs.get("data_airflow", "/opt/airflow")
     record_kind = kwargs.get("record_kind", ["new", "updates", "deletes"])
-    results = {"new": [], "updates": [], "deletes": []}  # type: dict
+    vendor = kwargs.get("vendor", "")
+    use_change_log = kwargs.get("use_change_log", False)
+    if isinstance(use_change_log, str):
+        use_change_log = ast.literal_eval(use_change_log)
+
+    latest_change = None
+    if vendor and use_change_log:
+        changes, latest_change = fetch_changed_record_ids(
+            vendor=vendor, record_kind=record_kind
+        )
+        if changes is not None:
+            results = save_id_sets(
+                airflow=data_airflow,
+                vendor=vendor,
+                id_sets={
+                    kind: InstanceIdSet.from_uuids(ids, vendor=vendor, kind=kind)
+                    for kind, ids in changes.items()
+                },
+            )
+            set_vendor_watermark(vendor=vendor, high_water_mark=latest_change)
+            return results
+        logger.info(f"No change log watermark for {vendor}, querying FOLIO")
+
+    id_sets = {
+        kind: InstanceIdSet.from_uuids([], vendor=vendor, kind=kind)
+        for kind in ["new", "updates", "deletes"]
+    }
 
     for kind in record_kind:
         sql_list = sql_files(params=params, airflow=airflow, kind=kind)
@@ -42,26 +78,223 @@ def fetch_record_ids(**kwargs) -> dict:
                 "to_date", (datetime.now() + timedelta(1)).strftime('%Y-%m-%d')
             )
 
-            results[kind].extend(
-                SQLExecuteQueryOperator(
-                    task_id=task_id,
-                    conn_id="postgres_folio",
-                    database=kwargs.get("database", "okapi"),
-                    sql=query,
-                    parameters={
-                        "from_date": from_date,
-                        "to_date": to_date,
-                    },
-                ).execute(
-                    context
-                )  # type: ignore
+            rows = SQLExecuteQueryOperator(
+                task_id=task_id,
+                conn_id="postgres_folio",
+                database=kwargs.get("database", "okapi"),
+                sql=query,
+                parameters={
+                    "from_date": from_date,
+                    "to_date": to_date,
+                },
+            ).execute(
+                context
+            )  # type: ignore
+
+            id_sets[kind] = id_sets[kind].union(
+                InstanceIdSet.from_uuids(
+                    (row[0] for row in rows), vendor=vendor, kind=kind
+                )
             )
 
-        results[kind] = list(np.unique(results[kind]))
+    results = save_id_sets(airflow=data_airflow, vendor=vendor, id_sets=id_sets)
+
+    if latest_change is not None:
+        set_vendor_watermark(vendor=vendor, high_water_mark=latest_change)
+
+    return results
+
+
+def save_id_sets(**kwargs) -> dict:
+    filestamp = kwargs.get("timestamp", datetime.now().strftime('%Y%m%d%H%M'))
+    airflow = kwargs.get("airflow", "/opt/airflow")
+    vendor = kwargs.get("vendor")
+    id_sets = kwargs["id_sets"]
+    results = {"new": None, "updates": None, "deletes": None}  # type: dict
+
+    for kind, id_set in id_sets.items():
+        if len(id_set) < 1:
+            logger.info(f"No new changes for {vendor} record {kind}")
+            continue
+        results[kind] = id_set.save(
+            Path(airflow)
+            / f"data-export-files/{vendor}/instanceids/{kind}/{filestamp}.ids"
+        )
 
     return results
 
 
+def capture_instance_changes(**kwargs) -> int:
+    """
+    Copies the instance IDs selected from FOLIO by the SQL files for each
+    kind into the data_export_instance_changes table, starting from the date
+    of the last capture, and saves the capture date as the new high-water mark
+
+    Changes every vendor has read, or captured more than retention_days ago,
+    are pruned from the table
+    """
+    airflow = kwargs.get("airflow", "/opt/airflow/libsys_airflow")
+    record_kind = kwargs.get("record_kind", ["new", "updates", "deletes"])
+    to_date = kwargs.get("to_date", datetime.now().strftime('%Y-%m-%d'))
+    retention_days = int(kwargs.get("retention_days", 90))
+
+    folio_pool = SQLPool().pool()
+    folio_connection = folio_pool.getconn()
+    connection = change_log_connection()
+    cursor = connection.cursor()
+
+    from_date = get_watermark(cursor, "capture") or kwargs.get(
+        "from_date", (datetime.now() - timedelta(1)).strftime('%Y-%m-%d')
+    )
+    logger.info(f"Capturing instance changes from {from_date} to {to_date}")
+
+    total = 0
+    try:
+        for kind in record_kind:
+            for sqlfile in sql_files(airflow=airflow, kind=kind):
+                with open(sqlfile) as sqf:
+                    query = sqf.read()
+
+                with folio_connection.cursor() as folio_cursor:
+                    folio_cursor.execute(
+                        query, {"from_date": from_date, "to_date": to_date}
+                    )
+                    rows = [(row[0], kind) for row in folio_cursor.fetchall()]
+
+                execute_values(
+                    cursor,
+                    "insert into data_export_instance_changes (instance_id, kind) values %s",
+                    rows,
+                    page_size=1000,
+                )
+                total += len(rows)
+                logger.info(f"Captured {len(rows):,} {kind} from {sqlfile.name}")
+
+        set_watermark(cursor, "capture", to_date)
+        prune_instance_changes(cursor, retention_days)
+        connection.commit()
+    finally:
+        folio_pool.putconn(folio_connection, close=True)
+        connection.close()
+
+    return total
+
+
+def prune_instance_changes(cursor, retention_days: int) -> int:
+    """
+    Deletes the changes at or below the lowest vendor high-water mark, which
+    every vendor has already selected, and any change older than
+    retention_days so a vendor that stops running doesn't keep the whole log
+    """
+    cursor.execute(
+        "select min(high_water_mark::bigint) from data_export_watermarks "
+        "where name <> 'capture'"
+    )
+    row = cursor.fetchone()
+    lowest_mark = row[0] if row and row[0] is not None else 0
+
+    cursor.execute(
+        "select name from data_export_watermarks where name <> 'capture' "
+        "and high_water_mark::bigint < (select coalesce(max(id), 0) "
+        "from data_export_instance_changes where captured_at < now() - make_interval(days => %s))",
+        (retention_days,),
+    )
+    for (vendor,) in cursor.fetchall():
+        logger.warning(
+            f"{vendor} has not selected changes captured more than {retention_days} days ago, pruning them"
+        )
+
+    cursor.execute(
+        "delete from data_export_instance_changes "
+        "where id <= %s or captured_at < now() - make_interval(days => %s)",
+        (lowest_mark, retention_days),
+    )
+    logger.info(f"Pruned {cursor.rowcount:,} instance changes")
+    return cursor.rowcount
+
+
+def fetch_changed_record_ids(**kwargs) -> tuple:
+    """
+    Returns the instance IDs captured since the vendor's high-water mark
+    along with the latest change, or None for the IDs if the vendor or the
+    capture has no high-water mark yet
+
+    The vendor's mark is not moved here, callers set it with
+    set_vendor_watermark once the IDs are saved
+    """
+    vendor = kwargs["vendor"]
+    record_kind = kwargs.get("record_kind", ["new", "updates", "deletes"])
+    results = {"new": [], "updates": [], "deletes": []}  # type: dict
+
+    connection = change_log_connection()
+    cursor = connection.cursor()
+
+    cursor.execute("select coalesce(max(id), 0) from data_export_instance_changes")
+    latest_change = cursor.fetchone()[0]
+
+    last_change = get_watermark(cursor, vendor)
+    if last_change is None or get_watermark(cursor, "capture") is None:
+        connection.close()
+        return None, latest_change
+
+    for kind in record_kind:
+        cursor.execute(
+            "select distinct instance_id::text from data_export_instance_changes "
+            "where kind = %s and id > %s and id <= %s",
+            (kind, int(last_change), latest_change),
+        )
+        results[kind] = sorted(row[0] for row in cursor.fetchall())
+        logger.info(f"{len(results[kind]):,} {kind} changes for {vendor}")
+
+    connection.close()
+
+    return results, latest_change
+
+
+def set_vendor_watermark(**kwargs):
+    """
+    Sets the vendor's high-water mark to a captured change so the next
+    selection reads its delta from the change log
+    """
+    vendor = kwargs["vendor"]
+    high_water_mark = kwargs["high_water_mark"]
+
+    connection = change_log_connection()
+    cursor = connection.cursor()
+
+    set_watermark(cursor, vendor, str(high_water_mark))
+    connection.commit()
+    connection.close()
+
+
+def change_log_connection():
+    """
+    Returns a connection to the data_exports database, whose change log and
+    watermark tables are created by the data_exports Alembic migrations
+    """
+    return PostgresHook("data_exports").get_conn()
+
+
+def get_watermark(cursor, name: str) -> Union[str, None]:
+    cursor.execute(
+        "select high_water_mark from data_export_watermarks where name = %s",
+        (name,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return row[0]
+
+
+def set_watermark(cursor, name: str, high_water_mark: str):
+    cursor.execute(
+        "insert into data_export_watermarks (name, high_water_mark) "
+        "values (%s, %s) on conflict (name) do update "
+        "set high_water_mark = excluded.high_water_mark, updated_at = now()",
+        (name, high_water_mark),
+    )
+
+
 def sql_files(**kwargs) -> list:
     kind = kwargs.get("kind")
     sql_path = (
@@ -83,10 +316,14 @@ def save_ids_to_fs(**kwargs) -> list[Union[str, None]]:
 
     if kind:
         data_path = Path(airflow) / f"data-export-files/{vendor}/instanceids/{kind}/"
-        for file in data_path.glob("*.csv"):
-            ids_path.append(str(file))
+        for pattern in ["*.csv", "*.ids"]:
+            for file in data_path.glob(pattern):
+                ids_path.append(str(file))
     else:
         for kind in data.keys():
+            if isinstance(data[kind], str):
+                ids_path.append(data[kind])
+                continue
             ids = save_ids(airflow=airflow, data=data[kind], kind=kind, vendor=vendor)
             if ids:
                 ids_path.append(ids)
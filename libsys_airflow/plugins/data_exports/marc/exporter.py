@@ -1,23 +1,79 @@
-import csv
 import logging
 import pathlib
+import time
 from pymarc import (
     JSONHandler as marcJson,
-    MARCWriter as marcWriter,
     Record as marcRecord,
 )
 
+from libsys_airflow.plugins.data_exports.id_sets import read_instance_ids
 from libsys_airflow.plugins.shared.folio_client import folio_client
 from airflow.models import Variable
 from s3path import S3Path
-from typing import Union
+from typing import Iterator, Union
 
 logger = logging.getLogger(__name__)
 
 
+class MarcSink(object):
+    """
+    Keeps a MARC21 file open across many record writes, buffering the
+    serialized records and flushing them to the local or S3 file in chunks
+    """
+
+    def __init__(
+        self,
+        marc_file: Union[pathlib.Path, S3Path],
+        mode: str = "wb",
+        buffer_size: int = 1_048_576,
+    ):
+        self.marc_file = marc_file
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.count = 0
+        self.file_handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        if self.file_handle is None:
+            logger.info(f"Writing to directory: {self.marc_file.parent}")
+            self.marc_file.parent.mkdir(parents=True, exist_ok=True)
+            self.file_handle = self.marc_file.open(self.mode)
+        return self.file_handle
+
+    def write(self, record: marcRecord):
+        self.open()
+        self.buffer.extend(record.as_marc())
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.file_handle is not None and len(self.buffer) > 0:
+            self.file_handle.write(bytes(self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        if self.file_handle is not None:
+            self.flush()
+            self.file_handle.close()
+            self.file_handle = None
+
+    def __str__(self):
+        return str(self.marc_file.absolute())
+
+
 class Exporter(object):
-    def __init__(self):
-        self.folio_client = folio_client()
+    def __init__(self, **kwargs):
+        # Full dumps parse MARC from the database and don't need an Okapi login
+        self.folio_client = folio_client() if kwargs.get("folio_login", True) else None
+        self.connection = kwargs.get("connection")
 
     def check_035(self, field035s: list) -> bool:
         reject = False
@@ -92,68 +148,139 @@ class Exporter(object):
         return exclude
 
     def retrieve_marc_for_instances(
-        self, instance_file: pathlib.Path, kind: str
+        self, instance_file: pathlib.Path, kind: str, **kwargs
     ) -> str:
         """
         Called for each instanceid file in vendor or full-dump directory
         For each ID row, writes and returns converted MARC from SRS
         Writes to file system, or in case of full-dump to AWS bucket
+
+        When the Exporter has a database connection, MARC is retrieved in
+        batches of batch_size instance ids directly from the SRS tables
+        instead of one Okapi request per instance id
         """
         if not instance_file.exists():
             raise ValueError(
                 f"Instance file does not exist for retrieve_marc_for_instances {instance_file}"
             )
 
+        batch_size = int(kwargs.get("batch_size", 500))
         vendor_name = instance_file.parent.parent.parent.name
+        marc_directory = instance_file.parent.parent.parent
 
-        marc_file = ""
-        with instance_file.open() as fo:
-            instance_reader = csv.reader(fo)
-            for row in instance_reader:
-                uuid = row[0]
-                try:
-                    marc_record = self.marc21(uuid)
-                except Exception as e:
-                    logger.warning(e)
-                    continue
+        marc_sink = self.marc_sink(instance_file, marc_directory, kind)
 
+        count = 0
+        start = time.perf_counter()
+        with marc_sink:
+            instance_uuids = read_instance_ids(instance_file)
+            if self.connection is None:
+                marc_records = self.marc_records(instance_uuids)
+            else:
+                marc_records = self.marc_records_bulk(instance_uuids, batch_size)
+
+            for marc_record in marc_records:
+                count += 1
                 if self.exclude_marc_by_vendor(marc_record, vendor_name):
                     logger.info(f"Excluding {vendor_name}")
                     continue
 
-                marc_directory = instance_file.parent.parent.parent
-                marc_file = self.write_marc(
-                    instance_file, marc_directory, marc_record, kind
-                )
+                marc_sink.write(marc_record)
 
-        return marc_file
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Retrieved {count:,} MARC records for {instance_file} in {elapsed:,.2f}s ({rate:,.1f} records/sec)"
+        )
 
-    def retrieve_marc_for_full_dump(self, marc_filename: str, instance_ids: str) -> str:
-        marc_file = ""
-        bucket = Variable.get("FOLIO_AWS_BUCKET", "folio-data-export-prod")
-        full_dump_files = f"/{bucket}/data-export-files/full-dump"
+        if marc_sink.count < 1:
+            return ""
 
-        marc = []
-        for row in instance_ids:
-            marc_json_handler = marcJson()
+        return str(marc_sink)
+
+    def marc_records(self, instance_uuids: Iterator[str]) -> Iterator[marcRecord]:
+        """
+        Yields MARC records retrieved one at a time from the SRS API
+        """
+        for uuid in instance_uuids:
             try:
-                marc_json_handler.elements(row[2])
-                marc21 = marc_json_handler.records[0]
+                yield self.marc21(uuid)
             except Exception as e:
                 logger.warning(e)
                 continue
 
-            if self.exclude_marc_by_vendor(marc21, "full-dump"):
+    def marc_records_bulk(
+        self, instance_uuids: Iterator[str], batch_size: int
+    ) -> Iterator[marcRecord]:
+        """
+        Yields MARC records retrieved from the SRS tables in batches
+        """
+        batch: list = []
+        for uuid in instance_uuids:
+            batch.append(uuid)
+            if len(batch) >= batch_size:
+                yield from self.__marc_records_batch__(batch)
+                batch = []
+        if batch:
+            yield from self.__marc_records_batch__(batch)
+
+    def __marc_records_batch__(self, instance_uuids: list) -> Iterator[marcRecord]:
+        try:
+            marc_json = self.marc_json_from_srs_bulk(instance_uuids)
+        except Exception as e:
+            # Clears the aborted transaction so later batches can run
+            self.connection.rollback()  # type: ignore
+            logger.warning(
+                f"Failed to retrieve SRS batch of {len(instance_uuids)}: {e}"
+            )
+            for uuid in instance_uuids:
+                logger.warning(
+                    f"Failed to retrieve SRS MARC record for instance {uuid}"
+                )
+            return
+
+        for uuid in instance_uuids:
+            content = marc_json.get(uuid)
+            if content is None:
+                logger.warning(f"No active SRS MARC record found for instance {uuid}")
+                continue
+            marc_json_handler = marcJson()
+            try:
+                marc_json_handler.elements(content)
+                yield marc_json_handler.records[0]
+            except Exception as e:
+                logger.warning(f"Failed to parse SRS MARC for instance {uuid}: {e}")
                 continue
 
-            marc.append(marc21)
+    def retrieve_marc_for_full_dump(
+        self, marc_filename: str, instance_ids: list
+    ) -> str:
+        marc_file = ""
+        bucket = Variable.get("FOLIO_AWS_BUCKET", "folio-data-export-prod")
+        full_dump_files = f"/{bucket}/data-export-files/full-dump"
 
         logger.info(
             f"Saving {len(instance_ids)} marc records to {marc_filename} in bucket."
         )
-        marc_file = self.write_marc(
-            pathlib.Path(marc_filename), S3Path(full_dump_files), marc, "."
-        )
+        with self.marc_sink(
+            pathlib.Path(marc_filename), S3Path(full_dump_files), "."
+        ) as marc_sink:
+            marc_sink.open()
+            for row in instance_ids:
+                marc_json_handler = marcJson()
+                try:
+                    marc_json_handler.elements(row[2])
+                    marc21 = marc_json_handler.records[0]
+                except Exception as e:
+                    logger.warning(e)
+                    continue
+
+                if self.exclude_marc_by_vendor(marc21, "full-dump"):
+                    continue
+
+                marc_sink.write(marc21)
+
+        marc_file = str(marc_sink)
 
         return marc_file
 
@@ -173,35 +300,57 @@ class Exporter(object):
 
         return srs_result["parsedRecord"]["content"]
 
-    def write_marc(
+    def marc_json_from_srs_bulk(self, instance_uuids: list) -> dict:
+        """
+        Returns the current MARC JSON keyed by instance uuid for a batch of
+        instance uuids
+        """
+        cursor = self.connection.cursor()  # type: ignore
+        sql = """SELECT DISTINCT ON (R.external_id) R.external_id, M.content
+        FROM sul_mod_source_record_storage.records_lb R
+        JOIN sul_mod_source_record_storage.marc_records_lb M ON M.id = R.id
+        WHERE R.external_id = ANY(%s::uuid[])
+        AND R.record_type = 'MARC_BIB'
+        AND R.state = 'ACTUAL'
+        ORDER BY R.external_id, R.generation DESC"""
+        cursor.execute(sql, (list(instance_uuids),))
+        return {str(row[0]): row[1] for row in cursor.fetchall()}
+
+    def marc_sink(
         self,
         instance_file: pathlib.Path,
         marc_directory: Union[pathlib.Path, S3Path],
-        marc: Union[list[marcRecord], marcRecord],
         kind: str,
-    ) -> str:
+    ) -> MarcSink:
         """
-        Writes marc record to a file system (local or S3)
+        Returns the MARC sink for an instance file, local files are appended
+        to and are saved by kind
         """
-        marc_file_name = instance_file.stem
         directory = marc_directory / "marc-files"
         mode = "wb"
 
         if type(marc_directory).__name__ == 'PosixPath':
             mode = "ab"
-            marc = [marc]  # type: ignore
             directory = directory / kind
 
-        logger.info(f"Writing to directory: {directory}")
-        directory.mkdir(parents=True, exist_ok=True)
-        marc_file = directory / f"{marc_file_name}.mrc"
-        marc_file.touch()
+        return MarcSink(directory / f"{instance_file.stem}.mrc", mode=mode)
 
-        with marc_file.open(mode) as fo:
-            marc_writer = marcWriter(fo)
-            for record in marc:
-                marc_writer.write(record)
+    def write_marc(
+        self,
+        instance_file: pathlib.Path,
+        marc_directory: Union[pathlib.Path, S3Path],
+        marc: Union[list[marcRecord], marcRecord],
+        kind: str,
+    ) -> str:
+        """
+        Writes marc record to a file system (local or S3)
+        """
+        if isinstance(marc, marcRecord):
+            marc = [marc]
 
-        marc_writer.close()
+        with self.marc_sink(instance_file, marc_directory, kind) as marc_sink:
+            marc_sink.open()
+            for record in marc:
+                marc_sink.write(record)
 
-        return str(marc_file.absolute())
+        return str(marc_sink)
@@ -2,6 +2,7 @@ import ast
 import logging
 import pathlib
 from libsys_airflow.plugins.data_exports.marc.exporter import Exporter
+from libsys_airflow.plugins.data_exports.sql_pool import SQLPool
 
 logger = logging.getLogger(__name__)
 
@@ -9,30 +10,47 @@ logger = logging.getLogger(__name__)
 def marc_for_instances(**kwargs) -> dict:
     """
     Retrieves the converted marc for each instance id file
+
+    If bulk_srs is True, MARC is retrieved from the SRS tables in batches of
+    srs_batch_size instance ids
     """
     instance_files = kwargs.get("instance_files", [])
     if isinstance(instance_files, str):
         instance_files = ast.literal_eval(instance_files)
 
+    bulk_srs = kwargs.get("bulk_srs", False)
+    if isinstance(bulk_srs, str):
+        bulk_srs = ast.literal_eval(bulk_srs)
+    batch_size = int(kwargs.get("srs_batch_size", 500))
+
     new_updates_deletes = {"new": [], "updates": [], "deletes": []}  # type: dict
 
-    exporter = Exporter()
-
-    for file_datename in instance_files:
-        if not file_datename:
-            continue
-        file_path = pathlib.Path(file_datename)
-        kind = file_path.parent.stem
-        marc_file = exporter.retrieve_marc_for_instances(
-            instance_file=file_path, kind=kind
-        )
-        marc_file_str = str(marc_file)
-
-        if len(marc_file_str) < 1:
-            continue
-        logger.info(
-            f"Retrieved marc files {marc_file_str} for instance file {file_path}"
-        )
-        new_updates_deletes[kind].append(marc_file_str)
+    connection_pool, _connection = None, None
+    if bulk_srs:
+        connection_pool = SQLPool().pool()
+        _connection = connection_pool.getconn()
+
+    exporter = Exporter(connection=_connection)
+
+    try:
+        for file_datename in instance_files:
+            if not file_datename:
+                continue
+            file_path = pathlib.Path(file_datename)
+            kind = file_path.parent.stem
+            marc_file = exporter.retrieve_marc_for_instances(
+                instance_file=file_path, kind=kind, batch_size=batch_size
+            )
+            marc_file_str = str(marc_file)
+
+            if len(marc_file_str) < 1:
+                continue
+            logger.info(
+                f"Retrieved marc files {marc_file_str} for instance file {file_path}"
+            )
+            new_updates_deletes[kind].append(marc_file_str)
+    finally:
+        if connection_pool is not None:
+            connection_pool.putconn(_connection, close=True)
 
     return new_updates_deletes
@@ -4,22 +4,40 @@ import pathlib
 import pymarc
 import re
 
+from typing import Union
+
 from libsys_airflow.plugins.data_exports.marc.transformer import Transformer
+from libsys_airflow.plugins.data_exports.sql_pool import SQLPool
 
 logger = logging.getLogger(__name__)
 
 
-def gobi_list_from_marc_files(marc_file_list: dict):
+def gobi_list_from_marc_files(marc_file_list: dict, **kwargs):
+    batch_size = kwargs.get("batch_size", 500)
+    connection_pool = SQLPool().pool()
+    _connection = connection_pool.getconn()
     gobi_lists = []
-    gobi_transformer = GobiTransformer()
-    for file in marc_file_list['new']:
-        gobi_lists.append(gobi_transformer.generate_list(marc_file=file))
+    gobi_transformer = GobiTransformer(connection=_connection)
+    try:
+        for file in marc_file_list['new']:
+            gobi_lists.append(
+                gobi_transformer.generate_list(marc_file=file, batch_size=batch_size)
+            )
+    finally:
+        connection_pool.putconn(_connection, close=True)
 
     return gobi_lists
 
 
 class GobiTransformer(Transformer):
-    def generate_list(self, marc_file):
+    def generate_list(self, marc_file, **kwargs):
+        """
+        Writes the print and ebook ISBN list for the MARC file
+
+        If batch_size is greater than 0, holdings and the holdings with items
+        are retrieved for batch_size records at a time with set-based queries
+        """
+        batch_size = int(kwargs.get("batch_size", 0))
 
         # marc_path is data-export-files/gobi/marc-files/updates/YYYYMMDD.mrc
         marc_path = pathlib.Path(marc_file)
@@ -36,11 +54,17 @@ class GobiTransformer(Transformer):
 
             print_list = []
             ebook_list = []
+            lookup = None
 
             for i, record in enumerate(marc_records):
                 if not i % 100:
                     logger.info(f"{i:,} records processed")
 
+                if batch_size > 0 and not i % batch_size:
+                    lookup = self.__gobi_lookup_batch__(
+                        marc_records[i : i + batch_size]
+                    )
+
                 field856 = record.get_fields("856")
                 field856x = [s.get_subfields("x") for s in field856]
                 fields856x = list(itertools.chain.from_iterable(field856x))
@@ -54,9 +78,12 @@ class GobiTransformer(Transformer):
                 except IndexError:
                     continue
 
-                holdings_result = self.folio_client.folio_get(
-                    f"/holdings-storage/holdings?query=(instanceId=={instance_id})"
-                )
+                if lookup is None:
+                    holdings = self.folio_client.folio_get(
+                        f"/holdings-storage/holdings?query=(instanceId=={instance_id})"
+                    )['holdingsRecords']
+                else:
+                    holdings = lookup["holdings"].get(instance_id, [])
 
                 stdnums = []
                 isbns = record.get_fields("020")
@@ -75,7 +102,7 @@ class GobiTransformer(Transformer):
                     except IndexError:
                         continue
 
-                for holding in holdings_result['holdingsRecords']:
+                for holding in holdings:
                     ebook = False
 
                     campus = self.campus_lookup.get(holding.get('permanentLocationId'))
@@ -97,11 +124,15 @@ class GobiTransformer(Transformer):
                     if ebook:
                         ebook_list.extend(stdnums)
 
-                    items_result = self.folio_client.folio_get(
-                        f"/item-storage/items?query=(holdingsRecordId=={holding['id']})"
-                    )
+                    if lookup is None:
+                        items_result = self.folio_client.folio_get(
+                            f"/item-storage/items?query=(holdingsRecordId=={holding['id']})"
+                        )
+                        has_items = len(items_result['items']) > 0
+                    else:
+                        has_items = holding['id'] in lookup["holdings_with_items"]
 
-                    if len(items_result['items']):
+                    if has_items:
                         print_list.extend(stdnums)
 
         with gobi_path.open("w+") as (fo):
@@ -110,3 +141,43 @@ class GobiTransformer(Transformer):
 
             for e_isbn in ebook_list:
                 fo.write(f"{e_isbn}|ebook|325099\n")
+
+    def __gobi_lookup_batch__(self, marc_records: list) -> Union[dict, None]:
+        if self.connection is None:
+            return None
+        instance_uuids = []
+        for record in marc_records:
+            instance_uuids.extend(self.instance_subfields(record)[:1])
+        try:
+            return self.gobi_holdings_lookup(instance_uuids)
+        except Exception as e:
+            self.connection.rollback()
+            logger.warning(
+                f"Error retrieving holdings for batch, using per record queries: {e}"
+            )
+            return None
+
+    def gobi_holdings_lookup(self, instance_uuids: list) -> dict:
+        """
+        Retrieves holdings grouped by instance and the ids of the holdings
+        that have at least one item for a list of instance uuids
+        """
+        lookup: dict = {
+            "holdings": self.__holdings_by_instance__(instance_uuids),
+            "holdings_with_items": set(),
+        }
+
+        holding_ids = [
+            holding["id"]
+            for holdings in lookup["holdings"].values()
+            for holding in holdings
+        ]
+        if len(holding_ids) < 1:
+            return lookup
+
+        cursor = self.connection.cursor()
+        sql = "select distinct holdingsrecordid from sul_mod_inventory_storage.item where holdingsrecordid = ANY(%s::uuid[])"
+        cursor.execute(sql, (holding_ids,))
+        lookup["holdings_with_items"] = {str(row[0]) for row in cursor.fetchall()}
+
+        return lookup
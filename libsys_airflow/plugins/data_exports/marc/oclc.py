@@ -5,6 +5,8 @@ import re
 import httpx
 import pymarc
 
+from typing import Union
+
 from libsys_airflow.plugins.data_exports.marc.transformer import Transformer
 
 logger = logging.getLogger(__name__)
@@ -56,7 +58,14 @@ def get_record_id(record: pymarc.Record) -> list:
 def filter_updates(**kwargs) -> dict:
     all_records_ids: dict = kwargs['all_records_ids']
     update_instance_uuids = all_records_ids.pop('updates')
-    logger.info(f"Removing {len(update_instance_uuids)} from records_id")
+    if update_instance_uuids is None:
+        logger.info("No updates to remove from records_id")
+    elif isinstance(update_instance_uuids, str):
+        update_id_set = pathlib.Path(update_instance_uuids)
+        logger.info(f"Removing {update_id_set} from records_id")
+        update_id_set.unlink(missing_ok=True)
+    else:
+        logger.info(f"Removing {len(update_instance_uuids)} from records_id")
     all_records_ids['updates'] = []
     return all_records_ids
 
@@ -93,31 +102,60 @@ class OCLCTransformer(Transformer):
             return codes
 
         for holding in holdings_result['holdingsRecords']:
-            campus = self.campus_lookup.get(holding.get('permanentLocationId'))
-            if campus is None:
-                continue
-            match campus:
-                case "GSB":
-                    oclc_code = "S7Z"
+            oclc_code = self.__oclc_code__(holding)
+            if oclc_code:
+                codes.append(oclc_code)
+        return codes
 
-                case "HOOVER":
-                    oclc_code = "HIN"
+    def campus_codes_lookup(self, instance_uuids: list) -> Union[dict, None]:
+        """
+        Retrieves the holdings of a block of instances in one CQL query and
+        returns the OCLC codes of each instance, or None if the query fails
+        """
+        lookup: dict = {uuid: [] for uuid in instance_uuids}
+        query = f"(instanceId==({' or '.join(instance_uuids)}))"
+        try:
+            holdings = self.folio_client.folio_get_all(
+                "/holdings-storage/holdings",
+                key="holdingsRecords",
+                query=query,
+                limit=500,
+            )
+            for holding in holdings:
+                oclc_code = self.__oclc_code__(holding)
+                if oclc_code:
+                    lookup.setdefault(holding.get("instanceId"), []).append(oclc_code)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Failed to retrieve holdings for batch; error {e}")
+            return None
+        return lookup
 
-                case "MED":
-                    oclc_code = "CASUM"
+    def __oclc_code__(self, holding: dict) -> Union[str, None]:
+        campus = self.campus_lookup.get(holding.get('permanentLocationId'))
+        if campus is None:
+            return None
+        match campus:
+            case "GSB":
+                oclc_code = "S7Z"
 
-                case "LAW":
-                    oclc_code = "RCJ"
+            case "HOOVER":
+                oclc_code = "HIN"
 
-                case _:
-                    oclc_code = "STF"
+            case "MED":
+                oclc_code = "CASUM"
 
-            codes.append(oclc_code)
-        return codes
+            case "LAW":
+                oclc_code = "RCJ"
 
-    def divide(self, marc_file) -> None:
+            case _:
+                oclc_code = "STF"
+
+        return oclc_code
+
+    def divide(self, marc_file, batch_size: int = 100) -> None:
         """
-        Divides up MARC Export by Campus and presence of OCLC record id
+        Divides up MARC Export by Campus and presence of OCLC record id,
+        resolving the campus codes for batch_size records at a time
         """
         marc_path = pathlib.Path(marc_file)
 
@@ -126,37 +164,57 @@ class OCLCTransformer(Transformer):
 
         logger.info(f"Process {len(marc_records):,} record for OCLC data export")
 
-        for i, record in enumerate(marc_records):
-            if not i % 100:
-                logger.info(f"{i:,} records processed")
-
-            if record is None:
-                logger.error(f"Record {i} is None in {marc_file}")
-                continue
-
-            record_ids = get_record_id(record)
-            campus_codes = self.determine_campus_code(record)
+        for start in range(0, len(marc_records), batch_size):
+            batch = marc_records[start : start + batch_size]
+            instance_uuids = sorted(
+                {
+                    instance_uuid
+                    for record in batch
+                    if record is not None
+                    and (instance_uuid := self.__filter_999__(record))
+                }
+            )
+            campus_codes_lookup = None
+            if len(instance_uuids) > 0:
+                campus_codes_lookup = self.campus_codes_lookup(instance_uuids)
 
-            if len(campus_codes) < 1:
-                continue
+            for i, record in enumerate(batch, start=start):
+                if not i % 100:
+                    logger.info(f"{i:,} records processed")
 
-            file_path = str(marc_path)
-            for code in campus_codes:
-                match len(record_ids):
-                    case 0:
-                        if file_path not in self.libraries[code]["marc"]:
-                            self.libraries[code]["marc"][file_path] = []
-                        if record not in self.libraries[code]["marc"][file_path]:
-                            self.libraries[code]["marc"][file_path].append(record)
+                if record is None:
+                    logger.error(f"Record {i} is None in {marc_file}")
+                    continue
 
-                    case 1:
-                        if file_path not in self.libraries[code]["holdings"]:
-                            self.libraries[code]["holdings"][file_path] = []
-                        if record not in self.libraries[code]["holdings"][file_path]:
-                            self.libraries[code]["holdings"][file_path].append(record)
+                if campus_codes_lookup is None:
+                    campus_codes = self.determine_campus_code(record)
+                else:
+                    campus_codes = campus_codes_lookup.get(
+                        self.__filter_999__(record), []
+                    )
+
+                self.__add_record__(record, campus_codes, str(marc_path))
+
+    def __add_record__(self, record: pymarc.Record, campus_codes: list, file_path: str):
+        if len(campus_codes) < 1:
+            return
+
+        record_ids = get_record_id(record)
+        # Records are indexed by instance UUID so that checking for an
+        # existing record doesn't compare it against every earlier record
+        record_key = self.__filter_999__(record) or record.as_marc()
+        for code in campus_codes:
+            match len(record_ids):
+                case 0:
+                    records = self.libraries[code]["marc"].setdefault(file_path, {})
+                    records.setdefault(record_key, record)
+
+                case 1:
+                    records = self.libraries[code]["holdings"].setdefault(file_path, {})
+                    records.setdefault(record_key, record)
 
-                    case _:
-                        self.multiple_codes(record, code, record_ids)
+                case _:
+                    self.multiple_codes(record, code, record_ids)
 
     def multiple_codes(self, record: pymarc.Record, code: str, record_ids: list):
         fields999 = record.get_fields('999')
@@ -188,7 +246,7 @@ class OCLCTransformer(Transformer):
                 marc_file_path = parent / file_name
                 with marc_file_path.open("wb+") as fo:
                     marc_writer = pymarc.MARCWriter(fo)
-                    for record in records:
+                    for record in records.values():
                         marc_writer.write(record)
                 original_marc_files.add(str(file_path))
 
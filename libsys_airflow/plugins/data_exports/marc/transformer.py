@@ -79,10 +79,14 @@ class Transformer(object):
 
         return subfields_i
 
-    def add_holdings_items(self, marc_file: str, full_dump: bool):
+    def add_holdings_items(self, marc_file: str, full_dump: bool, **kwargs):
         """
         Adds FOLIO Holdings and Items information to MARC records
+
+        If batch_size is greater than 0, holdings and items are retrieved
+        for batch_size records at a time with set-based queries
         """
+        batch_size = int(kwargs.get("batch_size", 0))
 
         marc_path = pathlib.Path(marc_file)
         if full_dump:
@@ -93,20 +97,25 @@ class Transformer(object):
         logger.info(f"Starting MARC processing on {marc_path}")
 
         with marc_path.open('rb') as fo:
-            for i, record in enumerate(pymarc.MARCReader(fo)):
-                try:
-                    subfields_i = self.instance_subfields(record)
-
-                    if subfields_i:
-                        new_999s = self.add_holdings_items_fields(subfields_i)
-                        record.add_field(*new_999s)
-                        marc_records.append(record)
-
-                    if not i % 100:
-                        logger.info(f"{i:,} processed records")
-                except Exception as e:
-                    logger.warning(e)
-                    continue
+            if batch_size > 0:
+                marc_records = list(
+                    self.enrich_records(pymarc.MARCReader(fo), batch_size)
+                )
+            else:
+                for i, record in enumerate(pymarc.MARCReader(fo)):
+                    try:
+                        subfields_i = self.instance_subfields(record)
+
+                        if subfields_i:
+                            new_999s = self.add_holdings_items_fields(subfields_i)
+                            record.add_field(*new_999s)
+                            marc_records.append(record)
+
+                        if not i % 100:
+                            logger.info(f"{i:,} processed records")
+                    except Exception as e:
+                        logger.warning(e)
+                        continue
 
         logger.info(
             f"Writing {len(marc_records):,} modified MARC records to {marc_path}"
@@ -118,17 +127,125 @@ class Transformer(object):
 
         marc_writer.close()
 
-    def add_holdings_items_fields(self, instance_subfields: list) -> list:
+    def enrich_records(self, marc_records, batch_size: int = 500):
+        """
+        Yields records with holdings and items 999 fields added, retrieving
+        holdings and items for blocks of batch_size records at a time
+        """
+        batch: list = []
+        for i, record in enumerate(marc_records):
+            try:
+                subfields_i = self.instance_subfields(record)
+            except Exception as e:
+                logger.warning(e)
+                continue
+
+            if subfields_i:
+                batch.append((record, subfields_i))
+
+            if len(batch) >= batch_size:
+                yield from self.__add_holdings_items_batch__(batch)
+                batch = []
+                logger.info(f"{i:,} processed records")
+
+        if batch:
+            yield from self.__add_holdings_items_batch__(batch)
+
+    def __add_holdings_items_batch__(self, batch: list) -> list:
+        instance_uuids = list(
+            {uuid for _, subfields_i in batch for uuid in subfields_i}
+        )
+        try:
+            holdings_items = self.holdings_items_lookup(instance_uuids)
+        except Exception as e:
+            # Clears the aborted transaction before the per record queries
+            self.connection.rollback()
+            logger.warning(
+                f"Error retrieving holdings and items for batch, using per record queries: {e}"
+            )
+            holdings_items = None
+
+        records = []
+        for record, subfields_i in batch:
+            try:
+                new_999s = self.add_holdings_items_fields(
+                    subfields_i, holdings_items=holdings_items
+                )
+                record.add_field(*new_999s)
+                records.append(record)
+            except Exception as e:
+                logger.warning(e)
+                continue
+        return records
+
+    def holdings_items_lookup(self, instance_uuids: list) -> dict:
+        """
+        Retrieves holdings grouped by instance and items grouped by holding
+        for a list of instance uuids
+        """
+        lookup: dict = {
+            "holdings": self.__holdings_by_instance__(instance_uuids),
+            "items": {},
+        }
+
+        holding_ids = [
+            holding["id"]
+            for holdings in lookup["holdings"].values()
+            for holding in holdings
+            if not holding.get("discoverySuppress", False)
+        ]
+        if len(holding_ids) < 1:
+            return lookup
+
+        cursor = self.connection.cursor()
+        sql = "select holdingsrecordid, jsonb from sul_mod_inventory_storage.item where holdingsrecordid = ANY(%s::uuid[]) order by id"
+        cursor.execute(sql, (holding_ids,))
+        for holding_id, item in cursor.fetchall():
+            lookup["items"].setdefault(str(holding_id), []).append(item)
+
+        return lookup
+
+    def __holdings_by_instance__(self, instance_uuids: list) -> dict:
+        """
+        Retrieves the holdings of a list of instance uuids grouped by instance
+        """
+        holdings: dict = {}
+        cursor = self.connection.cursor()
+        sql = "select instanceid, jsonb from sul_mod_inventory_storage.holdings_record where instanceid = ANY(%s::uuid[]) order by id"
+        cursor.execute(sql, (instance_uuids,))
+        for instance_id, holding in cursor.fetchall():
+            holdings.setdefault(str(instance_id), []).append(holding)
+        return holdings
+
+    def __holdings_for_instance__(self, instance_uuid: str) -> list:
+        cursor = self.connection.cursor()
+        sql = "select jsonb from sul_mod_inventory_storage.holdings_record where instanceid = (%s) order by id"
+        cursor.execute(sql, (instance_uuid,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def __items_for_holding__(self, holding_id: str) -> list:
+        cursor = self.connection.cursor()
+        sql = "select jsonb from sul_mod_inventory_storage.item where holdingsrecordid = (%s) order by id"
+        cursor.execute(sql, (holding_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def add_holdings_items_fields(self, instance_subfields: list, **kwargs) -> list:
+        """
+        Returns 999 fields for the holdings and items of each instance, queries
+        the database per instance and holding unless a holdings_items lookup
+        is passed
+        """
+        holdings_items = kwargs.get("holdings_items")
         fields = []
 
         for uuid in instance_subfields:
             try:
-                cursor = self.connection.cursor()
-                sql = "select jsonb from sul_mod_inventory_storage.holdings_record where instanceid = (%s)"
-                cursor.execute(sql, (uuid,))
-                holdings_result = cursor.fetchall()
-                for holding_tuple in holdings_result:
-                    holding = holding_tuple[0]
+                if holdings_items is None:
+                    holdings = self.__holdings_for_instance__(uuid)
+                else:
+                    holdings = holdings_items["holdings"].get(uuid, [])
+
+                for holding in holdings:
 
                     if holding.get("discoverySuppress", False):
                         continue
@@ -137,14 +254,14 @@ class Transformer(object):
 
                     holding_id = holding["id"]
 
-                    cursor = self.connection.cursor()
-                    sql = "select jsonb from sul_mod_inventory_storage.item where holdingsrecordid = (%s)"
-                    cursor.execute(sql, (holding_id,))
-                    items_result = cursor.fetchall()
+                    if holdings_items is None:
+                        items = self.__items_for_holding__(holding_id)
+                    else:
+                        items = holdings_items["items"].get(holding_id, [])
 
                     active_items = []
-                    for _item in items_result:
-                        if not _item[0].get("discoverySuppress", False):
+                    for _item in items:
+                        if not _item.get("discoverySuppress", False):
                             active_items.append(_item)
 
                     match len(active_items):
@@ -153,17 +270,16 @@ class Transformer(object):
                                 fields.append(field_999)
 
                         case 1:
-                            self.add_item_subfields(field_999, active_items[0][0])
+                            self.add_item_subfields(field_999, active_items[0])
                             if len(field_999.subfields) > 0:
                                 fields.append(field_999)
 
                         case _:
                             org_999 = copy.deepcopy(field_999)
-                            self.add_item_subfields(field_999, active_items[0][0])
+                            self.add_item_subfields(field_999, active_items[0])
                             if len(field_999.subfields) > 0:
                                 fields.append(field_999)
-                            for item_tuple in active_items[1:]:
-                                item = item_tuple[0]
+                            for item in active_items[1:]:
                                 new_999 = copy.deepcopy(org_999)
                                 self.add_item_subfields(new_999, item)
                                 if len(new_999.subfields) > 0:
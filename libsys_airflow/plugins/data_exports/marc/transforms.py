@@ -1,10 +1,14 @@
 import gzip
 import logging
 import pathlib
+import re
+import shutil
 
 import pymarc
 import xml.etree.ElementTree as etree
 
+from typing import Callable, Iterable, Iterator
+
 from libsys_airflow.plugins.data_exports.marc.excluded_tags import excluded_tags
 from libsys_airflow.plugins.data_exports.marc.transformer import Transformer
 from libsys_airflow.plugins.data_exports.marc.oclc import OCLCTransformer
@@ -13,21 +17,27 @@ from s3path import S3Path
 
 logger = logging.getLogger(__name__)
 
+invalid_xml_chars = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
 
-"""
-Called by the vendor selection DAGs except oclc and the full record selections
-"""
 
+class ValidatingXMLWriter(pymarc.XMLWriter):
+    """
+    MARCXML writer that serializes each record once, raising
+    etree.ParseError instead of writing records with characters that
+    are not allowed in XML
+    """
 
-def add_holdings_items_to_marc_files(marc_file_list: dict, full_dump: bool):
-    connection_pool = SQLPool().pool()
-    _connection = connection_pool.getconn()
-    transformer = Transformer(connection=_connection)
-    new_and_updates = marc_file_list['new'] + marc_file_list['updates']
-    for marc_file in new_and_updates:
-        transformer.add_holdings_items(marc_file=marc_file, full_dump=full_dump)
-
-    connection_pool.putconn(_connection, close=True)
+    def write(self, record: pymarc.Record) -> None:
+        pymarc.Writer.write(self, record)
+        xml = etree.tostring(pymarc.record_to_xml_node(record), encoding="unicode")
+        invalid_char = invalid_xml_chars.search(xml)
+        if invalid_char:
+            raise etree.ParseError(
+                f"not well-formed (invalid token): {invalid_char.group()!r} "
+                f"at position {invalid_char.start()}"
+            )
+        if self.file_handle:
+            self.file_handle.write(xml.encode("utf-8"))
 
 
 def divide_into_oclc_libraries(**kwargs):
@@ -43,111 +53,149 @@ def divide_into_oclc_libraries(**kwargs):
     return oclc_transformer.staff_notices
 
 
-def change_leader_for_deletes(marc_file_list: dict):
-    for file in marc_file_list['deletes']:
-        leader_for_deletes(file, False)
-
-
-def leader_for_deletes(marc_file: str, full_dump: bool):
+def write_xml_record(
+    xml_writer: ValidatingXMLWriter, record: pymarc.Record, xml_path
+) -> bool:
     """
-    Records specified as deleted by using d in position 05 in the MARC Leader
+    Validates and writes a MARC record as xml, logs records that fail
     """
-    marc_path = pathlib.Path(marc_file)
-    if full_dump:
-        marc_path = S3Path(marc_file)
-        logger.info(f"Changing leader using AWS S3 with path: {marc_path}")
+    try:
+        xml_writer.write(record)
 
-    with marc_path.open('rb') as fo:
-        marc_records = [record for record in pymarc.MARCReader(fo)]
+    except AttributeError as e:
+        logger.error(f"Failed to serialize MARC Record {xml_path}: {e}")
+        return False
+    except etree.ParseError as e:
+        logger.error(
+            f"Failed to serialize MARC Record {record['001'].value()}: {e} as xml"
+        )
+        return False
 
-    logger.info(f"Changing leader for {len(marc_records):,} records")
+    return True
 
-    for i, record in enumerate(marc_records):
-        try:
-            record.leader[5] = "d"  # type: ignore
-            if not i % 100:
-                logger.info(f"{i:,} records processed")
-        except AttributeError as e:
-            logger.warning(e)
-            continue
 
-    try:
-        with marc_path.open("wb") as fo:
-            marc_writer = pymarc.MARCWriter(fo)
-            for record in marc_records:
-                marc_writer.write(record)
-    except pymarc.exceptions.WriteNeedsRecord as e:
-        logger.warning(e)
+"""
+Streaming pipeline stages, each stage takes and yields MARC records
+"""
 
 
-def clean_and_serialize_marc_files(marc_file_list: dict):
-    for kind, file_list in marc_file_list.items():
-        for filepath in file_list:
-            marc_clean_serialize(filepath, False)
-            logger.info(
-                f"Removed MARC fields and serialized records for '{kind}' files: {filepath}"
-            )
+def enrich_holdings_items(transformer: Transformer, batch_size: int = 500) -> Callable:
+    def _enrich_holdings_items(records: Iterable) -> Iterator:
+        yield from transformer.enrich_records(records, batch_size)
 
+    return _enrich_holdings_items
 
-def marc_clean_serialize(marc_file: str, full_dump: bool):
+
+def strip_excluded_tags(records: Iterable) -> Iterator:
+    for record in records:
+        record.remove_fields(*excluded_tags)
+        yield record
+
+
+def set_deletes_leader(records: Iterable) -> Iterator:
+    for record in records:
+        record.leader[5] = "d"  # type: ignore
+        yield record
+
+
+def marc_pipeline(
+    marc_file: str, stages: list, full_dump: bool = False, **kwargs
+) -> int:
     """
-    Removes MARC fields from export MARC21 file
+    Streams the records in a MARC file through each stage in a single read,
+    replacing the MARC21 file and writing the MARCXML file at the same time
+
+    If compress_xml is True, the MARCXML is gzipped as it is written to a
+    .xml.gz file
     """
+    compress_xml = kwargs.get("compress_xml", False)
+
     marc_path = pathlib.Path(marc_file)
     if full_dump:
         marc_path = S3Path(marc_file)
-        logger.info(f"Removing MARC fields using AWS S3 with path: {marc_path}")
+        logger.info(f"Transforming MARC using AWS S3 with path: {marc_path}")
+
+    tmp_path = marc_path.with_name(f"{marc_path.name}.tmp")
+    xml_path = marc_path.with_suffix(".xml")
+    if compress_xml:
+        xml_path = marc_path.with_suffix(".xml.gz")
+
+    count = 0
+    try:
+        with (
+            marc_path.open("rb") as fo,
+            tmp_path.open("wb") as marc_fo,
+            xml_path.open("wb") as xml_fo,
+        ):
+            if compress_xml:
+                xml_fo = gzip.GzipFile(filename="", mode="wb", fileobj=xml_fo)  # type: ignore
+
+            records: Iterable = (
+                record for record in pymarc.MARCReader(fo) if record is not None
+            )
+            for stage in stages:
+                records = stage(records)
 
-    with marc_path.open('rb') as fo:
-        marc_records = [record for record in pymarc.MARCReader(fo)]
+            marc_writer = pymarc.MARCWriter(marc_fo)
+            xml_writer = ValidatingXMLWriter(xml_fo)
+            for i, record in enumerate(records):
+                marc_writer.write(record)
+                write_xml_record(xml_writer, record, xml_path)
+                count += 1
+                if not i % 100:
+                    logger.info(f"{i:,} records processed")
 
-    logger.info(f"Removing MARC fields for {len(marc_records):,} records")
+            xml_writer.close(close_fh=compress_xml)
+    except Exception:
+        # Removes partial output, leaving the original MARC file in place
+        tmp_path.unlink(missing_ok=True)
+        xml_path.unlink(missing_ok=True)
+        raise
 
-    for i, record in enumerate(marc_records):
-        try:
-            record.remove_fields(*excluded_tags)
-            if not i % 100:
-                logger.info(f"{i:,} records processed")
-        except AttributeError as e:
-            logger.warning(e)
-            continue
+    tmp_path.replace(marc_path)
+    logger.info(f"Wrote {count:,} MARC records to {marc_path} and {xml_path}")
+    return count
 
+
+def transform_marc_files(marc_file_list: dict, full_dump: bool = False, **kwargs):
     """
-    Writes the records back to the filesystem
-    """
-    try:
-        with marc_path.open("wb") as fo:
-            marc_writer = pymarc.MARCWriter(fo)  # type: ignore
-            for record in marc_records:
-                marc_writer.write(record)
-            marc_writer.close()
+    Adds holdings and items, removes excluded fields, changes the leader of
+    deleted records, and serializes MARC files as MARC21 and MARCXML in one
+    pass per file, gzipping the MARCXML if compress_xml is True. The leader
+    is only changed for deletes when deletes_leader is True
 
-    except pymarc.exceptions.WriteNeedsRecord as e:
-        logger.warning(e)
+    Records are not filtered by vendor here, retrieve_marc_for_instances
+    already excluded them when the MARC files were written
+    """
+    batch_size = kwargs.get("batch_size", 500)
+    compress_xml = kwargs.get("compress_xml", False)
+    deletes_leader = kwargs.get("deletes_leader", True)
+    _connection = kwargs.get("connection")
+
+    connection_pool = None
+    if _connection is None:
+        connection_pool = SQLPool().pool()
+        _connection = connection_pool.getconn()
+    transformer = Transformer(connection=_connection)
 
-    logger.info(f"Serializing {len(marc_records)} MARC records as xml")
     try:
-        xml_path = marc_path.with_suffix(".xml")
-        with xml_path.open("wb") as fo:
-            xml_writer = pymarc.XMLWriter(fo)
-            for record in marc_records:
-                try:
-                    xml_element = pymarc.record_to_xml_node(record, namespace=True)
-                    etree.fromstring(etree.tostring(xml_element))
-                    xml_writer.write(record)
-
-                except AttributeError as e:
-                    logger.error(f"Failed to serialize MARC Record {xml_path}: {e}")
-                    continue
-                except etree.ParseError as e:
-                    logger.error(
-                        f"Failed to serialize MARC Record {record['001'].value()}: {e} as xml"
-                    )
-                    continue
-
-            xml_writer.close()
-    except pymarc.exceptions.WriteNeedsRecord as e:
-        logger.warning(e)
+        for kind, file_list in marc_file_list.items():
+            if kind == "deletes":
+                stages = [strip_excluded_tags]
+                if deletes_leader:
+                    stages.append(set_deletes_leader)
+            else:
+                stages = [
+                    enrich_holdings_items(transformer, batch_size),
+                    strip_excluded_tags,
+                ]
+
+            for marc_file in file_list:
+                marc_pipeline(marc_file, stages, full_dump, compress_xml=compress_xml)
+                logger.info(f"Transformed and serialized '{kind}' file: {marc_file}")
+    finally:
+        if connection_pool is not None:
+            connection_pool.putconn(_connection, close=True)
 
 
 def remove_marc_files(marc_file_list: list):
@@ -171,10 +219,10 @@ def zip_marc_file(marc_file: str, full_dump: bool = False):
 
     try:
         format = marc_path.suffix
-        raw_metadata = marc_path.read_bytes()
         gzip_path = marc_path.with_name(f"{marc_path.stem}{format}.gz")
-        compressed_metadata = gzip.compress(raw_metadata)
-        gzip_path.write_bytes(compressed_metadata)
+        with marc_path.open("rb") as fo, gzip_path.open("wb") as gzip_fo:
+            with gzip.GzipFile(filename="", mode="wb", fileobj=gzip_fo) as gz:  # type: ignore
+                shutil.copyfileobj(fo, gz, 1_048_576)  # type: ignore
         logger.info(f"Compressed METADATA records to {gzip_path}")
         marc_path.unlink()
     except Exception as e:
@@ -18,4 +18,6 @@ and (I.jsonb->>'statusId')::uuid in (
 join sul_mod_source_record_storage.marc_records_lb M
   on M.id = R.id
 order by I.jsonb->'hrid'
-;
\ No newline at end of file
+;
+
+create unique index data_export_marc_hrid on data_export_marc (hrid);
@@ -0,0 +1,53 @@
+import logging
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Index,
+    String,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import declarative_base
+
+logger = logging.getLogger(__name__)
+
+Model = declarative_base()
+
+
+class InstanceChange(Model):  # type: ignore
+    __tablename__ = "data_export_instance_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    instance_id = Column(UUID, nullable=False)
+    kind = Column(String(16), nullable=False)
+    captured_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (Index("data_export_instance_changes_kind_id", "kind", "id"),)
+
+
+class Watermark(Model):  # type: ignore
+    __tablename__ = "data_export_watermarks"
+
+    name = Column(String(64), primary_key=True)
+    high_water_mark = Column(String, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class OCLCHolding(Model):  # type: ignore
+    __tablename__ = "data_export_oclc_holdings"
+
+    instance_id = Column(UUID, primary_key=True)
+    symbol = Column(String(8), primary_key=True)
+    oclc_number = Column(String, nullable=False)
+    holdings_set = Column(Boolean, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -1,19 +1,29 @@
 import copy
+import itertools
 import json
 import logging
 import pathlib
 import re
+import threading
+import time
 
 import httpx
 import pymarc
 
-from typing import List, Union, Callable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Union, Callable
 
 from bookops_worldcat import WorldcatAccessToken, MetadataSession
 from bookops_worldcat.errors import InvalidOclcNumber, WorldcatRequestError
 
 from libsys_airflow.plugins.data_exports.marc.oclc import get_record_id
 from libsys_airflow.plugins.data_exports.marc.excluded_tags import oclc_excluded
+from libsys_airflow.plugins.data_exports.oclc_checkpoint import OperationCheckpoint
+from libsys_airflow.plugins.data_exports.oclc_ledger import (
+    HoldingsLedger,
+    content_hash,
+)
 
 from libsys_airflow.plugins.shared.folio_client import folio_client
 from libsys_airflow.plugins.shared.utils import is_production
@@ -25,6 +35,15 @@ logger = logging.getLogger(__name__)
 # If we want to also match on OCoLC-I, just replace -[M] with -[MI]
 OCLC_REGEX = re.compile(r"\(OCoLC(-[M])?\)(\w+)")
 
+# WorldCat responses that are retried with backoff
+RETRY_STATUS = [429, 500, 502, 503, 504]
+
+# Process-wide WorldCat tokens and HTTP clients shared by every OCLC task
+# and library running on a worker
+_clients_lock = threading.Lock()
+_access_tokens: dict = {}
+_shared_clients: dict = {}
+
 
 def get_instance_uuid(record) -> Union[str, None]:
     instance_uuid = None
@@ -36,6 +55,36 @@ def get_instance_uuid(record) -> Union[str, None]:
     return instance_uuid
 
 
+def worldcat_access_token(client_id: str, secret: str) -> WorldcatAccessToken:
+    """
+    Returns the cached WorldCat access token for the client id, a new token
+    is only requested when there isn't one or it has expired
+    """
+    with _clients_lock:
+        token = _access_tokens.get((client_id, secret))
+        if token is None or token.is_expired():
+            token = WorldcatAccessToken(
+                key=client_id, secret=secret, scopes="WorldCatMetadataAPI"
+            )
+            _access_tokens[(client_id, secret)] = token
+        return token
+
+
+def shared_httpx_client() -> httpx.Client:
+    with _clients_lock:
+        if "httpx" not in _shared_clients:
+            _shared_clients["httpx"] = httpx.Client()
+        return _shared_clients["httpx"]
+
+
+def shared_folio_client():
+    # FolioClient refreshes its own login when the access token expires
+    with _clients_lock:
+        if "folio" not in _shared_clients:
+            _shared_clients["folio"] = folio_client()
+        return _shared_clients["folio"]
+
+
 def oclc_records_operation(**kwargs) -> dict:
     function_name: str = kwargs["oclc_function"]
     connection_lookup: dict = kwargs["connections"]
@@ -43,12 +92,27 @@ def oclc_records_operation(**kwargs) -> dict:
     type_of_records: dict = kwargs["records"]
     success: dict = kwargs.get("success", {})
     failures: dict = kwargs.get("failures", {})
+    workers: int = int(kwargs.get("workers", 4))
+    requests_per_second: float = float(kwargs.get("requests_per_second", 10))
+    use_ledger: bool = kwargs.get("use_ledger", True)
+    checkpoint_dir: Union[pathlib.Path, None] = kwargs.get("checkpoint_dir")
 
     if is_production():
+        checkpoints = []
         for library, records in type_of_records.items():
+            checkpoint = None
+            if checkpoint_dir is not None:
+                checkpoint = OperationCheckpoint(
+                    pathlib.Path(checkpoint_dir) / f"{library}-{function_name}.jsonl"
+                )
+                checkpoints.append(checkpoint)
             oclc_api = OCLCAPIWrapper(
                 client_id=connection_lookup[library]["username"],
                 secret=connection_lookup[library]["password"],
+                workers=workers,
+                requests_per_second=requests_per_second,
+                ledger=HoldingsLedger(library) if use_ledger else None,
+                checkpoint=checkpoint,
             )
 
             oclc_api_function = getattr(oclc_api, function_name)
@@ -64,6 +128,9 @@ def oclc_records_operation(**kwargs) -> dict:
                 )
             else:
                 logger.info(f"No {function_name} records for {library}")
+        # Every library finished, a retry of the task starts over
+        for checkpoint in checkpoints:
+            checkpoint.clear()
     else:
         for library, records in type_of_records.items():
             for record in records:
@@ -111,6 +178,73 @@ def __oclc_marc_modifications__(marc_record: pymarc.Record) -> pymarc.Record:
     return marc_record
 
 
+def __export_record__(marc_record: pymarc.Record) -> pymarc.Record:
+    """
+    Returns a record without the fields excluded from OCLC, only the fields
+    changed by __oclc_marc_modifications__ are copied, the other fields are
+    shared with marc_record
+    """
+    export_record = pymarc.Record(leader=str(marc_record.leader))
+    export_record.fields = [
+        copy.deepcopy(field) if field.tag in ["007", "035", "040"] else field
+        for field in marc_record.fields
+        if field.tag not in oclc_excluded
+    ]
+    return export_record
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket allowing rate requests per second with bursts
+    of up to capacity requests
+    """
+
+    def __init__(self, rate: float, capacity: Union[int, None] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedSession(object):
+    """
+    Proxies a MetadataSession, taking a token from the bucket before each
+    WorldCat request
+    """
+
+    limited = ["bib_match", "holdings_set", "holdings_unset"]
+
+    def __init__(self, session: MetadataSession, bucket: TokenBucket):
+        self.session = session
+        self.bucket = bucket
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.session, name)
+        if name not in self.limited:
+            return attribute
+
+        def __limited__(*args, **kwargs):
+            self.bucket.acquire()
+            return attribute(*args, **kwargs)
+
+        return __limited__
+
+
 class OCLCAPIWrapper(object):
     # Helper class for transmitting MARC records to OCLC Worldcat API
 
@@ -118,15 +252,23 @@ class OCLCAPIWrapper(object):
         self.oclc_token = None
         client_id = kwargs["client_id"]
         secret = kwargs["secret"]
-        self.httpx_client = httpx.Client()
+        self.workers = int(kwargs.get("workers", 4))
+        # Records read from the MARC files ahead of the workers
+        self.batch_size = int(kwargs.get("batch_size", 500))
+        self.retries = int(kwargs.get("retries", 3))
+        self.backoff_factor = float(kwargs.get("backoff_factor", 1.0))
+        self.rate_limiter = TokenBucket(float(kwargs.get("requests_per_second", 10)))
+        self.httpx_client = shared_httpx_client()
         self.__authenticate__(client_id, secret)
-        self.folio_client = folio_client()
+        self.folio_client = shared_folio_client()
+        # Instance version, hrid, and SRS record id by instance UUID
+        self.folio_metadata: dict = {}
+        self.ledger: Union[HoldingsLedger, None] = kwargs.get("ledger")
+        self.checkpoint: Union[OperationCheckpoint, None] = kwargs.get("checkpoint")
 
     def __authenticate__(self, client_key, secret) -> None:
         try:
-            self.oclc_token = WorldcatAccessToken(
-                key=client_key, secret=secret, scopes="WorldCatMetadataAPI"
-            )
+            self.oclc_token = worldcat_access_token(client_key, secret)
         except Exception as e:
             msg = "Unable to Retrieve Worldcat Access Token"
             logger.error(msg)
@@ -156,14 +298,65 @@ class OCLCAPIWrapper(object):
         hrid = instance["hrid"]
         return version, hrid
 
+    def __prefetch_folio_metadata__(self, instance_uuids: list, batch_size: int = 50):
+        """
+        Retrieves the version, hrid, and SRS record id for blocks of instances
+        so that updating a record in FOLIO only needs the PUT request,
+        instances that fail to prefetch are retrieved when they are updated
+        """
+        for start in range(0, len(instance_uuids), batch_size):
+            batch = instance_uuids[start : start + batch_size]
+            try:
+                instances = self.folio_client.folio_get_all(
+                    "/inventory/instances",
+                    key="instances",
+                    query=f"(id==({' or '.join(batch)}))",
+                    limit=batch_size,
+                )
+                instance_info = {
+                    row["id"]: (row["_version"], row["hrid"]) for row in instances
+                }
+                srs_result = self.folio_client.folio_post(
+                    "/source-storage/source-records",
+                    batch,
+                    query_params={"idType": "INSTANCE", "deleted": "false"},
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to prefetch FOLIO metadata for {len(batch)} instances: {e}"
+                )
+                continue
+
+            srs_ids: dict = {}
+            for source_record in (srs_result or {}).get("sourceRecords", []):
+                instance_uuid = source_record.get("externalIdsHolder", {}).get(
+                    "instanceId"
+                )
+                srs_ids.setdefault(instance_uuid, source_record["recordId"])
+
+            for instance_uuid in batch:
+                if instance_uuid in instance_info and instance_uuid in srs_ids:
+                    self.folio_metadata[instance_uuid] = (
+                        *instance_info[instance_uuid],
+                        srs_ids[instance_uuid],
+                    )
+
+        prefetched = [row for row in instance_uuids if row in self.folio_metadata]
+        logger.info(
+            f"Prefetched FOLIO metadata for {len(prefetched):,} of {len(instance_uuids):,} instances"
+        )
+
     def __put_folio_record__(self, instance_uuid: str, record: Record) -> bool:
         """
         Updates FOLIO SRS with updated MARC record with new OCLC Number
         in the 035 field
         """
         marc_json = record.as_json()
-        version, instance_hrid = self.__instance_info__(instance_uuid)
-        srs_uuid = self.__get_srs_record_id__(instance_uuid)
+        if instance_uuid in self.folio_metadata:
+            version, instance_hrid, srs_uuid = self.folio_metadata.pop(instance_uuid)
+        else:
+            version, instance_hrid = self.__instance_info__(instance_uuid)
+            srs_uuid = self.__get_srs_record_id__(instance_uuid)
         if srs_uuid is None:
             logger.error(
                 f"Failed to retrieve Active SRS uuid for Instance {instance_uuid}"
@@ -191,15 +384,14 @@ class OCLCAPIWrapper(object):
             return False
         return True
 
-    def __read_marc_files__(self, marc_files: list) -> list:
-        records = []
+    def __read_marc_files__(self, marc_files: list) -> Iterator[tuple]:
         for marc_file in marc_files:
             marc_file_path = pathlib.Path(marc_file)
             if marc_file_path.exists():
                 with marc_file_path.open('rb') as fo:
                     marc_reader = pymarc.MARCReader(fo)
-                    records.extend([(r, str(marc_file_path)) for r in marc_reader])
-        return records
+                    for record in marc_reader:
+                        yield record, str(marc_file_path)
 
     def __extract_control_number_035__(
         self, oclc_put_result: bytes
@@ -254,10 +446,44 @@ class OCLCAPIWrapper(object):
             record.add_ordered_field(new_035)
         return record
 
+    def __create_bib__(self, session: MetadataSession, marc21: bytes):
+        """
+        Posts a new MARC record to WorldCat, retrying with backoff when
+        rate limited or unavailable
+        """
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            bib_create_result = self.httpx_client.post(
+                session._url_manage_bibs_create(),
+                headers={
+                    "Accept": "application/marc",
+                    "content-type": "application/marc",
+                    "Authorization": f"Bearer {session.authorization.token_str}",
+                },
+                data=marc21,
+                timeout=60,
+            )
+            if bib_create_result.status_code not in RETRY_STATUS:
+                break
+            if attempt < self.retries:
+                time.sleep(self.backoff_factor * 2**attempt)
+        return bib_create_result
+
     def __oclc_operations__(self, **kwargs) -> dict:
+        """
+        Runs function for each MARC record on a pool of workers, each worker
+        has its own MetadataSession and all workers share the rate limiter.
+        Results are merged in record order, records processed by an earlier
+        try of the task are merged from the checkpoint instead of being sent.
+
+        MARC files are read lazily in batches while the workers send the
+        previous records, at most two records per worker are in flight
+        """
         marc_files: List[str] = kwargs['marc_files']
         function: Callable = kwargs['function']
         no_recs_message: str = kwargs.get("no_recs_message", "")
+        prefetch: bool = kwargs.get("prefetch", False)
+        use_ledger: bool = kwargs.get("use_ledger", False)
         output: dict = {"success": [], "failures": []}
 
         if len(marc_files) < 1:
@@ -265,37 +491,108 @@ class OCLCAPIWrapper(object):
             return output
 
         marc_records = self.__read_marc_files__(marc_files)
+        ledger = self.ledger if use_ledger else None
+
+        completed: dict = {}
+        if self.checkpoint is not None:
+            completed = self.checkpoint.load()
 
         successful_files: set = set()
         failed_files: set = set()
 
-        with MetadataSession(authorization=self.oclc_token, timeout=60) as session:
-            for record, file_name in marc_records:
-                instance_uuid = get_instance_uuid(record)
-                if instance_uuid is None:
-                    continue
-                try:
-                    function(
-                        session=session,
-                        output=output,
-                        record=record,
-                        file_name=file_name,
-                        instance_uuid=instance_uuid,
-                        successes=successful_files,
-                        failures=failed_files,
-                    )
-                except (InvalidOclcNumber, WorldcatRequestError) as e:
-                    msg = f"Instance UUID {instance_uuid} Error: {e}"
-                    logger.error(msg)
-                    output['failures'].append(
+        sessions: list = []
+        sessions_lock = threading.Lock()
+        worker_session = threading.local()
+
+        def __session__() -> RateLimitedSession:
+            if not hasattr(worker_session, "session"):
+                worker_session.session = MetadataSession(
+                    authorization=self.oclc_token,
+                    timeout=60,
+                    totalRetries=self.retries,
+                    backoffFactor=self.backoff_factor,
+                    statusForcelist=RETRY_STATUS,
+                )
+                with sessions_lock:
+                    sessions.append(worker_session.session)
+            return RateLimitedSession(worker_session.session, self.rate_limiter)
+
+        def __record_operation__(marc_record: tuple) -> tuple:
+            record, file_name = marc_record
+            record_output: dict = {"success": [], "failures": []}
+            successes: set = set()
+            failures: set = set()
+
+            instance_uuid = get_instance_uuid(record)
+            if instance_uuid is None:
+                return record_output, successes, failures
+            if instance_uuid in completed:
+                return completed[instance_uuid], successes, failures
+            try:
+                function(
+                    session=__session__(),
+                    output=record_output,
+                    record=record,
+                    file_name=file_name,
+                    instance_uuid=instance_uuid,
+                    successes=successes,
+                    failures=failures,
+                )
+            except (InvalidOclcNumber, WorldcatRequestError) as e:
+                msg = f"Instance UUID {instance_uuid} Error: {e}"
+                logger.error(msg)
+                record_output['failures'].append(
+                    {
+                        "uuid": instance_uuid,
+                        "reason": "WorldcatRequest Error",
+                        "context": str(e),
+                    }
+                )
+                failures.add(file_name)
+            if self.checkpoint is not None:
+                self.checkpoint.record(instance_uuid, record_output)
+            return record_output, successes, failures
+
+        def __merge__(future):
+            record_output, successes, failures = future.result()
+            output['success'].extend(record_output['success'])
+            output['failures'].extend(record_output['failures'])
+            successful_files.update(successes)
+            failed_files.update(failures)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                in_flight: deque = deque()
+                while batch := list(itertools.islice(marc_records, self.batch_size)):
+                    instance_uuids = sorted(
                         {
-                            "uuid": instance_uuid,
-                            "reason": "WorldcatRequest Error",
-                            "context": str(e),
+                            instance_uuid
+                            for record, _ in batch
+                            if (instance_uuid := get_instance_uuid(record))
                         }
                     )
-                    failed_files.add(file_name)
-                    continue
+                    if prefetch:
+                        self.__prefetch_folio_metadata__(instance_uuids)
+                    if ledger is not None:
+                        ledger.load(instance_uuids)
+
+                    for marc_record in batch:
+                        in_flight.append(
+                            executor.submit(__record_operation__, marc_record)
+                        )
+                        if len(in_flight) >= self.workers * 2:
+                            __merge__(in_flight.popleft())
+                    # Releases the batch before the next one is read
+                    del batch
+
+                while in_flight:
+                    __merge__(in_flight.popleft())
+        finally:
+            for session in sessions:
+                session.close()
+            if ledger is not None:
+                ledger.save()
+
         return output
 
     def __test_oclc_numbers__(self, oclc_numbers: list, instance_uuid: str):
@@ -343,6 +640,14 @@ class OCLCAPIWrapper(object):
                 failures.add(file_name)
                 return
 
+            if self.ledger is not None and self.ledger.is_current(
+                instance_uuid, oclc_id[0], False
+            ):
+                logger.info(f"OCLC holdings already unset for {instance_uuid}")
+                output['success'].append(instance_uuid)
+                successes.add(file_name)
+                return
+
             response = session.holdings_unset(oclcNumber=oclc_id[0])
             if response:
                 response = response.json()
@@ -351,6 +656,10 @@ class OCLCAPIWrapper(object):
                 logger.info(f"Matched {instance_uuid} result {response}")
                 output['success'].append(instance_uuid)
                 successes.add(file_name)
+                if self.ledger is not None:
+                    self.ledger.record(
+                        instance_uuid, oclc_id[0], False, content_hash(record)
+                    )
             else:
                 msg = "Failed holdings_unset"
                 logger.info(f"{msg} for {instance_uuid} OCLC response: {response}")
@@ -362,6 +671,7 @@ class OCLCAPIWrapper(object):
         output = self.__oclc_operations__(
             marc_files=marc_files,
             function=__delete_oclc__,
+            use_ledger=True,
             no_recs_message="No marc records for deletes",
         )
         return output
@@ -377,8 +687,7 @@ class OCLCAPIWrapper(object):
             failures: set = kwargs["failures"]
             successes: set = kwargs["successes"]
 
-            export_record = copy.deepcopy(record)
-            export_record.remove_fields(*oclc_excluded)
+            export_record = __export_record__(record)
             marc21 = export_record.as_marc21()
 
             matched_record_result = session.bib_match(
@@ -418,6 +727,10 @@ class OCLCAPIWrapper(object):
                     )
                     output['success'].append(instance_uuid)
                     successes.add(file_name)
+                    if self.ledger is not None:
+                        self.ledger.record(
+                            instance_uuid, control_number, True, content_hash(record)
+                        )
                     return
 
                 output['failures'].append(
@@ -441,6 +754,8 @@ class OCLCAPIWrapper(object):
         output = self.__oclc_operations__(
             marc_files=marc_files,
             function=__match_oclc__,
+            prefetch=True,
+            use_ledger=True,
             no_recs_message="No new marc records",
         )
         return output
@@ -470,6 +785,13 @@ class OCLCAPIWrapper(object):
                         )
                         output['success'].append(instance_uuid)
                         successful_add = True
+                        if self.ledger is not None:
+                            self.ledger.record(
+                                instance_uuid,
+                                control_number,
+                                True,
+                                content_hash(record),
+                            )
                     else:
                         logger.error(
                             f"OCLC holdings_set call failed for {instance_uuid} OCLC {payload}"
@@ -505,24 +827,14 @@ class OCLCAPIWrapper(object):
             successes: set = kwargs["successes"]
             failures: set = kwargs["failures"]
 
-            export_record = copy.deepcopy(record)
-            export_record.remove_fields(*oclc_excluded)
+            export_record = __export_record__(record)
             export_record = __oclc_marc_modifications__(export_record)
 
             marc21 = export_record.as_marc21()
 
             # We want to capture errors from the OCLC response instead of
             # trying to parse the WorldcatRequestError
-            bib_create_result = self.httpx_client.post(
-                session._url_manage_bibs_create(),
-                headers={
-                    "Accept": "application/marc",
-                    "content-type": "application/marc",
-                    "Authorization": f"Bearer {session.authorization.token_str}",
-                },
-                data=marc21,
-                timeout=60,
-            )
+            bib_create_result = self.__create_bib__(session, marc21)
 
             logger.info(
                 f"New record result {bib_create_result.status_code} {bib_create_result.content}"
@@ -584,6 +896,8 @@ class OCLCAPIWrapper(object):
         output = self.__oclc_operations__(
             marc_files=marc_files,
             function=__new_oclc__,
+            prefetch=True,
+            use_ledger=True,
             no_recs_message="No new marc records",
         )
         # De-dup any success uuids
@@ -607,6 +921,15 @@ class OCLCAPIWrapper(object):
                 failures.add(file_name)
                 return
 
+            record_hash = content_hash(record)
+            if self.ledger is not None and self.ledger.is_current(
+                instance_uuid, oclc_id[0], True, record_hash
+            ):
+                logger.info(f"OCLC holdings already set for {instance_uuid}")
+                output['success'].append(instance_uuid)
+                successes.add(file_name)
+                return
+
             response = session.holdings_set(oclcNumber=oclc_id[0])
 
             if response is None:
@@ -642,6 +965,8 @@ class OCLCAPIWrapper(object):
             if self.__put_folio_record__(instance_uuid, modified_marc_record):
                 output['success'].append(instance_uuid)
                 successes.add(file_name)
+                if self.ledger is not None:
+                    self.ledger.record(instance_uuid, oclc_id[0], True, record_hash)
             else:
                 output['failures'].append(
                     {
@@ -655,6 +980,8 @@ class OCLCAPIWrapper(object):
         output = self.__oclc_operations__(
             marc_files=marc_files,
             function=__update_oclc__,
+            prefetch=True,
+            use_ledger=True,
             no_recs_message="No updated marc records",
         )
         return output
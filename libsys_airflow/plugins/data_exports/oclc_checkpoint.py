@@ -0,0 +1,54 @@
+import json
+import logging
+import pathlib
+import threading
+
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+class OperationCheckpoint(object):
+    """
+    JSON lines file with the output of each processed record of an OCLC
+    operation for a library, a retried task loads the file and resumes
+    after the records that were already processed
+    """
+
+    def __init__(self, checkpoint_file: Union[str, pathlib.Path]):
+        self.checkpoint_file = pathlib.Path(checkpoint_file)
+        self.lock = threading.Lock()
+
+    def load(self) -> dict:
+        completed: dict = {}
+        if not self.checkpoint_file.exists():
+            return completed
+
+        contents = self.checkpoint_file.read_text()
+        for line in contents.splitlines():
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # Partial line from a worker that was interrupted mid-write
+                logger.warning(f"Skipping incomplete line in {self.checkpoint_file}")
+                continue
+            completed[row["uuid"]] = row["output"]
+
+        if len(contents) > 0 and not contents.endswith("\n"):
+            with self.checkpoint_file.open("a") as fo:
+                fo.write("\n")
+
+        logger.info(
+            f"Resuming from {self.checkpoint_file}, {len(completed):,} records already processed"
+        )
+        return completed
+
+    def record(self, instance_uuid: str, record_output: dict):
+        line = json.dumps({"uuid": instance_uuid, "output": record_output})
+        with self.lock:
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            with self.checkpoint_file.open("a") as fo:
+                fo.write(f"{line}\n")
+
+    def clear(self):
+        self.checkpoint_file.unlink(missing_ok=True)
@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import threading
+
+import pymarc
+
+from typing import Union
+
+from airflow.providers.postgres.hooks.postgres import PostgresHook
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(record: pymarc.Record) -> str:
+    return hashlib.sha256(record.as_marc()).hexdigest()
+
+
+class HoldingsLedger(object):
+    """
+    Last confirmed OCLC number, holdings state, and MARC content hash of
+    instances for an OCLC symbol, stored in the data_exports database so
+    that holdings calls already made by an earlier run can be skipped
+
+    The ledger only saves work, if the database is unavailable every
+    record is sent to OCLC
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.entries: dict = {}
+        self.outcomes: dict = {}
+        self.lock = threading.Lock()
+
+    def load(self, instance_uuids: list):
+        try:
+            connection = PostgresHook("data_exports").get_conn()
+            cursor = connection.cursor()
+            cursor.execute(
+                "select instance_id::text, oclc_number, holdings_set, content_hash "
+                "from data_export_oclc_holdings "
+                "where symbol = %s and instance_id = ANY(%s::uuid[])",
+                (self.symbol, instance_uuids),
+            )
+            for instance_uuid, oclc_number, holdings_set, record_hash in cursor:
+                self.entries[instance_uuid] = (oclc_number, holdings_set, record_hash)
+            connection.close()
+        except Exception as e:
+            logger.warning(f"OCLC holdings ledger unavailable for {self.symbol}: {e}")
+        logger.info(
+            f"OCLC holdings ledger has {len(self.entries):,} of {len(instance_uuids):,} instances for {self.symbol}"
+        )
+
+    def is_current(
+        self,
+        instance_uuid: str,
+        oclc_number: str,
+        holdings_set: bool,
+        record_hash: Union[str, None] = None,
+    ) -> bool:
+        """
+        Checks if OCLC already has the holdings state for the instance, the
+        MARC content hash is only compared if record_hash is passed
+        """
+        entry = self.entries.get(instance_uuid)
+        if entry is None or entry[:2] != (oclc_number, holdings_set):
+            return False
+        return record_hash is None or entry[2] == record_hash
+
+    def record(
+        self, instance_uuid: str, oclc_number: str, holdings_set: bool, record_hash: str
+    ):
+        with self.lock:
+            self.outcomes[instance_uuid] = (oclc_number, holdings_set, record_hash)
+
+    def save(self):
+        if len(self.outcomes) < 1:
+            return
+        rows = [
+            (instance_uuid, self.symbol, *outcome)
+            for instance_uuid, outcome in self.outcomes.items()
+        ]
+        try:
+            connection = PostgresHook("data_exports").get_conn()
+            cursor = connection.cursor()
+            execute_values(
+                cursor,
+                "insert into data_export_oclc_holdings "
+                "(instance_id, symbol, oclc_number, holdings_set, content_hash) "
+                "values %s on conflict (instance_id, symbol) do update "
+                "set oclc_number = excluded.oclc_number, "
+                "holdings_set = excluded.holdings_set, "
+                "content_hash = excluded.content_hash, updated_at = now()",
+                rows,
+                page_size=1000,
+            )
+            connection.commit()
+            connection.close()
+        except Exception as e:
+            logger.warning(
+                f"Failed to save OCLC holdings ledger for {self.symbol}: {e}"
+            )
+            return
+        logger.info(f"Saved {len(rows):,} OCLC holdings outcomes for {self.symbol}")
+        self.entries.update(self.outcomes)
+        self.outcomes = {}
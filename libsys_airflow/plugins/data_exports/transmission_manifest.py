@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import pathlib
+import threading
+
+import boto3
+
+from datetime import datetime, timedelta, timezone
+from s3path import S3Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(file_path: Union[pathlib.Path, S3Path]) -> tuple:
+    """
+    Returns the content digest and size of the file, S3 objects use the
+    ETag from a HEAD request instead of downloading the object to hash it
+    """
+    if isinstance(file_path, S3Path):
+        head = boto3.client("s3").head_object(
+            Bucket=file_path.bucket, Key=file_path.key
+        )
+        etag = head["ETag"].strip('"')
+        return f"etag:{etag}", head["ContentLength"]
+
+    sha256 = hashlib.sha256()
+    with file_path.open("rb") as fo:
+        for chunk in iter(lambda: fo.read(1 << 20), b""):
+            sha256.update(chunk)
+    return f"sha256:{sha256.hexdigest()}", file_path.stat().st_size
+
+
+class TransmissionManifest(object):
+    """
+    JSON lines file in data-export-files/{vendor}/transmitted with the
+    digest, size, destination, remote file name and time of each file
+    successfully transmitted, retries and reruns within max_age skip files
+    whose content was already sent to the same remote file
+    """
+
+    def __init__(
+        self,
+        manifest_file: Union[pathlib.Path, S3Path],
+        max_age: timedelta = timedelta(days=7),
+    ):
+        self.manifest_file = manifest_file
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries: dict = {}
+        self.pending: list = []
+        self.compact = False
+
+    @classmethod
+    def for_files(cls, file_list: list, path_module=pathlib.Path):
+        """
+        Manifest next to the vendor's transmitted folder of the files,
+        i.e. data-export-files/{vendor}/marc-files/{kind}/{file}
+        """
+        if len(file_list) < 1:
+            return None
+        vendor_dir = path_module(file_list[0]).parent.parent.parent
+        manifest = cls(vendor_dir / "transmitted" / "manifest.jsonl")
+        manifest.load()
+        return manifest
+
+    def load(self):
+        try:
+            if not self.manifest_file.exists():
+                return
+            contents = self.manifest_file.read_text()
+        except Exception as e:
+            logger.warning(f"Unable to read {self.manifest_file}: {e}")
+            return
+
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        for line in contents.splitlines():
+            try:
+                row = json.loads(line)
+                key = (row["destination"], row["file"], row["digest"], row["size"])
+                transmitted = datetime.fromisoformat(row["transmitted"])
+            except (json.JSONDecodeError, KeyError, ValueError):
+                logger.warning(f"Skipping incomplete line in {self.manifest_file}")
+                self.compact = True
+                continue
+            if transmitted < cutoff:
+                # Expired entries are dropped the next time the manifest is saved
+                self.compact = True
+                continue
+            self.entries[key] = row
+        logger.info(f"Loaded {len(self.entries):,} entries from {self.manifest_file}")
+
+    def is_transmitted(
+        self, destination: str, file_name: str, digest: str, size: int
+    ) -> bool:
+        return (destination, file_name, digest, size) in self.entries
+
+    def record(self, destination: str, file_name: str, digest: str, size: int):
+        """
+        Adds the file to the manifest in memory, call save once the
+        transmission task is done to write the new entries
+        """
+        row = {
+            "destination": destination,
+            "digest": digest,
+            "size": size,
+            "file": file_name,
+            "transmitted": datetime.now(timezone.utc).isoformat(),
+        }
+        with self.lock:
+            self.entries[(destination, file_name, digest, size)] = row
+            self.pending.append(row)
+
+    def save(self):
+        """
+        Appends the new entries to a local manifest. S3 objects cannot be
+        appended to, so an S3 manifest, or one with expired entries, is
+        written whole
+        """
+        with self.lock:
+            if len(self.pending) < 1 and not self.compact:
+                return
+            try:
+                if not isinstance(self.manifest_file, S3Path):
+                    self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+                if isinstance(self.manifest_file, S3Path) or self.compact:
+                    rows = list(self.entries.values())
+                    self.manifest_file.write_text(self.__lines__(rows))
+                else:
+                    with self.manifest_file.open("a") as fo:
+                        fo.write(self.__lines__(self.pending))
+            except Exception as e:
+                logger.warning(f"Unable to save {self.manifest_file}: {e}")
+                return
+            self.pending = []
+            self.compact = False
+
+    def __lines__(self, rows: list) -> str:
+        return "".join(f"{json.dumps(row)}\n" for row in rows)
@@ -1,12 +1,18 @@
 import copy
+import ftplib
 import logging
+import threading
+import time
 
+import boto3
 import httpx
 import pymarc
 
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
 from s3path import S3Path
 from datetime import datetime
+from typing import Callable, Union
 
 from airflow.decorators import task
 from airflow.models.connection import Connection
@@ -16,6 +22,10 @@ from libsys_airflow.plugins.data_exports.oclc_api import (
     oclc_records_operation,
     get_instance_uuid,
 )
+from libsys_airflow.plugins.data_exports.transmission_manifest import (
+    TransmissionManifest,
+    file_digest,
+)
 
 from libsys_airflow.plugins.shared.utils import is_production
 
@@ -37,13 +47,15 @@ def gather_files_task(**kwargs) -> dict:
     bucket = params.get("bucket", {})
     marc_filepath = Path(airflow) / f"data-export-files/{vendor}/marc-files/"
     file_glob_pattern = vendor_fileformat_spec(vendor)
+    marc_filelist = []
     if vendor == "full-dump":
         marc_filepath = S3Path(f"/{bucket}/data-export-files/{vendor}/marc-files/")
-    marc_filelist = []
-    for f in marc_filepath.glob(file_glob_pattern):
-        if f.stat().st_size in [0, 112]:
-            continue
-        marc_filelist.append(str(f))
+        marc_filelist = gather_s3_files(marc_filepath, file_glob_pattern)
+    else:
+        for f in marc_filepath.glob(file_glob_pattern):
+            if f.stat().st_size in [0, 112]:
+                continue
+            marc_filelist.append(str(f))
 
     return {
         "file_list": marc_filelist,
@@ -51,6 +63,28 @@ def gather_files_task(**kwargs) -> dict:
     }
 
 
+def gather_s3_files(s3_path: S3Path, file_glob_pattern: str) -> list:
+    """
+    Lists the files under s3_path with paginated list_objects_v2 requests
+    that include each object's size, instead of a HEAD request per file.
+    Files are returned largest first so that concurrent uploads finish
+    at about the same time
+    """
+    name_pattern = file_glob_pattern.removeprefix("**/")
+    prefix = f"{s3_path.key}/"
+    paginator = boto3.client("s3").get_paginator("list_objects_v2")
+    s3_files = []
+    for page in paginator.paginate(Bucket=s3_path.bucket, Prefix=prefix):
+        for row in page.get("Contents", []):
+            if row["Size"] in [0, 112]:
+                continue
+            if not PurePosixPath(row["Key"]).match(name_pattern):
+                continue
+            s3_files.append((row["Size"], f"/{s3_path.bucket}/{row['Key']}"))
+    logger.info(f"Listed {len(s3_files):,} files in {s3_path}")
+    return [key for _, key in sorted(s3_files, key=lambda row: -row[0])]
+
+
 @task
 def retry_failed_files_task(**kwargs) -> dict:
     """
@@ -108,12 +142,11 @@ def transmit_data_http_task(gather_files, **kwargs) -> dict:
     if not is_production():
         return return_success_test_instance(gather_files)
     """
-    Transmit the data via http
+    Transmit the data via http, uploading up to workers files at a time
     Returns lists of files successfully transmitted and failures
     """
-    success = []
-    failures = []
     files_params = kwargs.get("files_params", "upload")
+    workers = int(kwargs.get("workers", 1))
     params = kwargs.get("params", {})
     conn_id = params["vendor"]
     logger.info(f"Transmit data to {conn_id}")
@@ -122,60 +155,208 @@ def transmit_data_http_task(gather_files, **kwargs) -> dict:
         path_module = S3Path
     else:
         path_module = Path
+    url_params = vendor_url_params(conn_id, gather_files["s3"])
+    destination = str(httpx.URL(connection.host, params=url_params))
+    manifest = TransmissionManifest.for_files(gather_files["file_list"], path_module)
     with httpx.Client(
         headers=connection.extra_dejson,
-        params=vendor_url_params(conn_id, gather_files["s3"]),
+        params=url_params,
         follow_redirects=True,
+        limits=httpx.Limits(max_connections=workers),
     ) as client:
-        for f in gather_files["file_list"]:
-            files = {files_params: path_module(f).open("rb")}
-            request = client.build_request(
-                "POST", connection.host, files=files, timeout=10
-            )
+
+        def __transmit_file__(f: str) -> bool:
+            file_path = path_module(f)
             try:
-                logger.info(f"Start transmission of data from file {f}")
-                response = client.send(request)
-                response.raise_for_status()
-                success.append(f)
-                logger.info(f"End transmission of data from file {f}")
-            except httpx.HTTPError as e:
-                logger.error(f"Error for {e.request.url} - {e}")
-                failures.append(f)
+                return transmit_once(
+                    manifest,
+                    destination,
+                    file_path,
+                    lambda: transmit_file_http(
+                        client, connection.host, files_params, file_path
+                    ),
+                )
+            except Exception as e:
+                logger.error(e)
+                logger.error(f"Exception for transmission of file {f}")
+                return False
 
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(__transmit_file__, gather_files["file_list"])
+                )
+        finally:
+            if manifest is not None:
+                manifest.save()
+
+    success = [f for f, sent in zip(gather_files["file_list"], results) if sent]
+    failures = [f for f, sent in zip(gather_files["file_list"], results) if not sent]
     return {"success": success, "failures": failures}
 
 
+def transmit_once(
+    manifest: TransmissionManifest,
+    destination: str,
+    file_path: Union[Path, S3Path],
+    transmit: Callable[[], bool],
+    file_name: Union[str, None] = None,
+) -> bool:
+    """
+    Calls transmit unless the manifest has the same content already
+    transmitted to file_name at destination, skipped files count as
+    successes so that they are archived. file_name is the remote file
+    name, the local file name if None
+    """
+    file_name = file_name or file_path.name
+    digest, size = file_digest(file_path)
+    if manifest.is_transmitted(destination, file_name, digest, size):
+        logger.info(f"Skipping {file_path}, already transmitted to {destination}")
+        return True
+    sent = transmit()
+    if sent:
+        manifest.record(destination, file_name, digest, size)
+    return sent
+
+
+def transmit_file_http(
+    client: httpx.Client, url: str, files_params: str, file_path: Union[Path, S3Path]
+) -> bool:
+    """
+    Streams the file to url, the timeout waiting on the vendor allows for
+    a minimum throughput of 1 MB per second with at least 10 seconds
+    """
+    file_size = file_path.stat().st_size
+    timeout = max(10.0, file_size / 1_000_000)
+    start = time.perf_counter()
+    try:
+        logger.info(f"Start transmission of data from file {file_path}")
+        with file_path.open("rb") as fo:
+            request = client.build_request(
+                "POST", url, files={files_params: fo}, timeout=timeout
+            )
+            response = client.send(request)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.error(f"Error for {e.request.url} - {e}")
+        return False
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"End transmission of data from file {file_path} {file_size:,} bytes in {elapsed:.1f}s ({file_size / 1_000_000 / max(elapsed, 0.001):.2f} MB/s)"
+    )
+    return True
+
+
 @task
-def transmit_data_ftp_task(conn_id, gather_files) -> dict:
+def transmit_data_ftp_task(conn_id, gather_files, **kwargs) -> dict:
     if not is_production():
         return return_success_test_instance(gather_files)
     """
-    Transmit the data via ftp
+    Transmit the data via ftp, uploading up to workers files at a time with
+    one FTP session per worker
     Returns lists of files successfully transmitted and failures
     """
-    hook = FTPHook(ftp_conn_id=conn_id)
+    workers = int(kwargs.get("workers", 1))
     connection = Connection.get_connection_from_secrets(conn_id)
     remote_path = connection.extra_dejson["remote_path"]
-    success = []
-    failures = []
-    for f in gather_files["file_list"]:
+    destination = f"{connection.host}{remote_path}"
+    manifest = TransmissionManifest.for_files(gather_files["file_list"])
+
+    hooks: list = []
+    hooks_lock = threading.Lock()
+    worker_hook = threading.local()
+
+    def __hook__() -> FTPHook:
+        if not hasattr(worker_hook, "hook"):
+            worker_hook.hook = FTPHook(ftp_conn_id=conn_id)
+            with hooks_lock:
+                hooks.append(worker_hook.hook)
+        return worker_hook.hook
+
+    def __store_file__(f: str) -> bool:
         remote_file_name = vendor_filename_spec(conn_id, f)
         remote_file_path = f"{remote_path}/{remote_file_name}"
+        logger.info(f"Start transmission of file {f}")
+        store_file_resumable(__hook__(), remote_file_path, f)
+        logger.info(f"End transmission of file {f}")
+        return True
+
+    def __transmit_file__(f: str) -> bool:
         try:
-            logger.info(f"Start transmission of file {f}")
-            hook.store_file(remote_file_path, f)
-            success.append(f)
-            logger.info(f"End transmission of file {f}")
+            return transmit_once(
+                manifest,
+                destination,
+                Path(f),
+                lambda: __store_file__(f),
+                file_name=vendor_filename_spec(conn_id, f),
+            )
         except Exception as e:
             logger.error(e)
             logger.error(f"Exception for transmission of file {f}")
-            failures.append(f)
-
+            return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(__transmit_file__, gather_files["file_list"]))
+    finally:
+        for hook in hooks:
+            __close_ftp_hook__(hook)
+        if manifest is not None:
+            manifest.save()
+
+    success = [f for f, sent in zip(gather_files["file_list"], results) if sent]
+    failures = [f for f, sent in zip(gather_files["file_list"], results) if not sent]
     return {"success": success, "failures": failures}
 
 
+def store_file_resumable(hook: FTPHook, remote_file_path: str, local_file: str):
+    """
+    Stores the file with the hook's FTP session. An interrupted transfer is
+    resumed once on a new session from the size of the partial remote file
+    when the server allows REST, otherwise the whole file is sent again
+    """
+    try:
+        hook.store_file(remote_file_path, local_file)
+        return
+    except (ftplib.error_temp, ftplib.error_reply, OSError, EOFError) as e:
+        logger.warning(f"Transmission of {local_file} interrupted, resuming: {e}")
+
+    __close_ftp_hook__(hook)
+    ftp = hook.get_conn()
+    ftp.voidcmd("TYPE I")
+    try:
+        offset = ftp.size(remote_file_path) or 0
+    except ftplib.error_perm:
+        # No partial file on the server
+        offset = 0
+
+    with open(local_file, "rb") as fo:
+        if offset > 0:
+            try:
+                fo.seek(offset)
+                ftp.storbinary(f"STOR {remote_file_path}", fo, rest=offset)
+                logger.info(f"Resumed {remote_file_path} from {offset:,} bytes")
+                return
+            except ftplib.error_perm as e:
+                logger.warning(f"Unable to resume {remote_file_path}: {e}")
+                fo.seek(0)
+        ftp.storbinary(f"STOR {remote_file_path}", fo)
+
+
+def __close_ftp_hook__(hook: FTPHook):
+    if hook.conn is None:
+        return
+    try:
+        hook.close_conn()
+    except Exception:
+        # Session was already dropped by the server
+        hook.conn = None
+
+
 @task(multiple_outputs=True)
-def delete_from_oclc_task(connection_details: list, delete_records: dict) -> dict:
+def delete_from_oclc_task(
+    connection_details: list, delete_records: dict, **kwargs
+) -> dict:
 
     connection_lookup = oclc_connections(connection_details)
 
@@ -183,27 +364,35 @@ def delete_from_oclc_task(connection_details: list, delete_records: dict) -> dic
         connections=connection_lookup,
         oclc_function="delete",
         records=delete_records,
+        checkpoint_dir=oclc_checkpoint_dir(**kwargs),
     )
 
 
-def __filter_save_marc__(file_str: str, info: list):
-    new_records, instance_uuids = [], []
-    for row in info:
-        if row['reason'].startswith("Match failed"):
-            instance_uuids.append(row['uuid'])
+def __filter_save_marc__(file_str: str, failed_uuids: set):
+    """
+    Streams the MARC file into a temporary file keeping only the records
+    that failed to match in OCLC, the temporary file replaces the MARC file
+    once every record is written
+    """
     file_path = Path(file_str)
-    with file_path.open('rb') as fo:
-        marc_reader = pymarc.MARCReader(fo)
-        for record in marc_reader:
-            instance_uuid = get_instance_uuid(record)
-            if instance_uuid in instance_uuids:
-                new_records.append(record)
-    if len(new_records) > 0:
-        logger.info(f"Replacing {len(new_records)} in {file_path}")
-        with file_path.open('wb+') as fo:
-            marc_writer = pymarc.MARCWriter(fo)
-            for record in new_records:
-                marc_writer.write(record)
+    tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+    total = 0
+    try:
+        with file_path.open('rb') as fo, tmp_path.open('wb') as tmp_fo:
+            marc_reader = pymarc.MARCReader(fo)
+            marc_writer = pymarc.MARCWriter(tmp_fo)
+            for record in marc_reader:
+                if get_instance_uuid(record) in failed_uuids:
+                    marc_writer.write(record)
+                    total += 1
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if total > 0:
+        logger.info(f"Replacing {total} in {file_path}")
+        tmp_path.replace(file_path)
+    else:
+        tmp_path.unlink()
 
 
 @task(multiple_outputs=True)
@@ -212,16 +401,19 @@ def filter_new_marc_records_task(new_records: dict, failed_matches: dict) -> dic
     for library, info in failed_matches.items():
         filtered_new_records[library] = []
         if len(info) > 0:
+            failed_uuids = {
+                row['uuid'] for row in info if row['reason'].startswith("Match failed")
+            }
             new_files = new_records[library]
             for row in new_files:
-                __filter_save_marc__(row, info)
+                __filter_save_marc__(row, failed_uuids)
             filtered_new_records[library] = new_files
 
     return filtered_new_records
 
 
 @task(multiple_outputs=True)
-def match_oclc_task(connection_details: list, new_records: dict) -> dict:
+def match_oclc_task(connection_details: list, new_records: dict, **kwargs) -> dict:
 
     connection_lookup = oclc_connections(connection_details)
 
@@ -229,11 +421,12 @@ def match_oclc_task(connection_details: list, new_records: dict) -> dict:
         connections=connection_lookup,
         oclc_function="match",
         records=new_records,
+        checkpoint_dir=oclc_checkpoint_dir(**kwargs),
     )
 
 
 @task(multiple_outputs=True)
-def new_to_oclc_task(connection_details: list, new_records: dict) -> dict:
+def new_to_oclc_task(connection_details: list, new_records: dict, **kwargs) -> dict:
 
     connection_lookup = oclc_connections(connection_details)
 
@@ -241,11 +434,14 @@ def new_to_oclc_task(connection_details: list, new_records: dict) -> dict:
         connections=connection_lookup,
         oclc_function="new",
         records=new_records,
+        checkpoint_dir=oclc_checkpoint_dir(**kwargs),
     )
 
 
 @task(multiple_outputs=True)
-def set_holdings_oclc_task(connection_details: list, update_records: dict) -> dict:
+def set_holdings_oclc_task(
+    connection_details: list, update_records: dict, **kwargs
+) -> dict:
 
     connection_lookup = oclc_connections(connection_details)
 
@@ -253,6 +449,7 @@ def set_holdings_oclc_task(connection_details: list, update_records: dict) -> di
         connections=connection_lookup,
         oclc_function="update",
         records=update_records,
+        checkpoint_dir=oclc_checkpoint_dir(**kwargs),
     )
 
 
@@ -297,20 +494,21 @@ def archive_transmitted_data_task(files):
         )
         original_transmitted_file_path.replace(archive_path)
 
-        # instance_path = data-export-files/{vendor}/instanceids/new|updates|deletes/*.csv
+        # instance_path = data-export-files/{vendor}/instanceids/new|updates|deletes/*.csv|*.ids
         # with_suffix('') will remove multiple extentions, e.g. .xml.gz
-        instance_path = (
-            original_transmitted_file_path.parent.parent.parent
-            / f"instanceids/{kind}/{original_transmitted_file_path.with_suffix('').stem}.csv"
-        )
-        instance_archive_path = archive_dir / kind / instance_path.name
-
-        # move instance id files with same stem as transmitted filename
-        if instance_path.exists():
-            logger.info(
-                f"Moving related instanceid file {instance_path} to {instance_archive_path}"
+        for suffix in [".csv", ".ids"]:
+            instance_path = (
+                original_transmitted_file_path.parent.parent.parent
+                / f"instanceids/{kind}/{original_transmitted_file_path.with_suffix('').stem}{suffix}"
             )
-            instance_path.replace(instance_archive_path)
+            instance_archive_path = archive_dir / kind / instance_path.name
+
+            # move instance id files with same stem as transmitted filename
+            if instance_path.exists():
+                logger.info(
+                    f"Moving related instanceid file {instance_path} to {instance_archive_path}"
+                )
+                instance_path.replace(instance_archive_path)
 
         marc_path = (
             original_transmitted_file_path.parent
@@ -349,7 +547,7 @@ def vendor_filename_spec(conn_id, filename):
     elif conn_id == "sharevde":
         return "tbd"
     else:
-        Path(filename).name
+        return Path(filename).name
 
 
 def vendor_url_params(conn_id, is_s3_path) -> dict:
@@ -370,6 +568,18 @@ def return_success_test_instance(files) -> dict:
     return {"success": files["file_list"], "failures": []}
 
 
+def oclc_checkpoint_dir(**kwargs) -> Union[Path, None]:
+    """
+    Directory for the OCLC operation checkpoints of the DAG run, retries
+    of a task share the run_id so they resume from the same checkpoint
+    """
+    run_id = kwargs.get("run_id")
+    if run_id is None:
+        return None
+    airflow = kwargs.get("airflow", "/opt/airflow")
+    return Path(airflow) / "data-export-files/oclc/checkpoints" / run_id
+
+
 def oclc_connections(connection_details: list) -> dict:
     connection_lookup = {}
     for conn_id in connection_details:
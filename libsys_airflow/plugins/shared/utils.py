@@ -5,6 +5,7 @@ import pymarc
 import re
 import urllib
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
 from airflow.configuration import conf
@@ -76,6 +77,88 @@ class FolioAddMarcTags(object):
             )
             return False
 
+        return self.__put_srs_record__(
+            instance_id, marc_instance_tags, srs_uuid, marc_json, version, instance_hrid
+        )
+
+    def put_folio_records_batch(self, instances_marc_tags: dict, **kwargs) -> dict:
+        """
+        Adds MARC tags to many instances, SRS records and instance versions
+        are retrieved for blocks of instances and the updated records are
+        PUT on a pool of workers. Returns if each instance was updated
+        """
+        batch_size = int(kwargs.get("batch_size", 50))
+        workers = int(kwargs.get("workers", 4))
+        instance_ids = list(instances_marc_tags.keys())
+
+        srs_records: dict = {}
+        instances: dict = {}
+        for start in range(0, len(instance_ids), batch_size):
+            batch = instance_ids[start : start + batch_size]
+            try:
+                srs_result = self.folio_client.folio_post(
+                    "/source-storage/source-records",
+                    batch,
+                    query_params={"idType": "INSTANCE", "deleted": "false"},
+                )
+                instance_rows = self.folio_client.folio_get_all(
+                    "/inventory/instances",
+                    key="instances",
+                    query=f"(id==({' or '.join(batch)}))",
+                    limit=batch_size,
+                )
+                for row in instance_rows:
+                    instances[row["id"]] = (row["_version"], row["hrid"])
+            except Exception as e:
+                logger.error(
+                    f"Failed to retrieve SRS records for {len(batch)} instances error: {e}"
+                )
+                continue
+            for source_record in (srs_result or {}).get("sourceRecords", []):
+                instance_id = source_record.get("externalIdsHolder", {}).get(
+                    "instanceId"
+                )
+                srs_records.setdefault(instance_id, source_record)
+
+        def __put_instance__(instance_id: str) -> tuple:
+            if instance_id not in srs_records or instance_id not in instances:
+                logger.error(
+                    f"Failed to retrieve Active SRS uuid for Instance {instance_id}"
+                )
+                return instance_id, False
+            srs_record = srs_records[instance_id]
+            version, instance_hrid = instances[instance_id]
+            try:
+                return instance_id, self.__put_srs_record__(
+                    instance_id,
+                    instances_marc_tags[instance_id],
+                    srs_record["recordId"],
+                    srs_record["parsedRecord"]["content"],
+                    version,
+                    instance_hrid,
+                )
+            except Exception as e:
+                logger.error(f"Failed to update FOLIO for Instance {instance_id}: {e}")
+                return instance_id, False
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = dict(executor.map(__put_instance__, instance_ids))
+
+        updated = [instance_id for instance_id, result in results.items() if result]
+        logger.info(
+            f"Updated {len(updated):,} of {len(instance_ids):,} FOLIO instances with new MARC tags"
+        )
+        return results
+
+    def __put_srs_record__(
+        self,
+        instance_id: str,
+        marc_instance_tags: dict,
+        srs_uuid: str,
+        marc_json: dict,
+        version: str,
+        instance_hrid: str,
+    ) -> bool:
         put_result = self.httpx_client.put(
             f"{self.folio_client.okapi_url}/change-manager/parsedRecords/{srs_uuid}",
             headers=self.folio_client.okapi_headers,
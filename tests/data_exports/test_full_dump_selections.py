@@ -1,7 +1,7 @@
 import pydantic
 import pytest
 
-from airflow.models import Connection
+from concurrent.futures import ThreadPoolExecutor
 from libsys_airflow.plugins.data_exports import full_dump_marc
 from libsys_airflow.plugins.data_exports.marc import exporter
 
@@ -45,17 +45,6 @@ def mock_marc_records():
     return ""
 
 
-@pytest.fixture
-def mock_airflow_connection():
-    return Connection(
-        conn_id="postgres-folio",
-        conn_type="postgres",
-        host="example.com",
-        password="pass",
-        port=9999,
-    )
-
-
 def mock_result_set():
     return [
         (
@@ -158,20 +147,157 @@ def mock_get_current_context(mocker):
     return context
 
 
-def test_fetch_full_dump(tmp_path, mocker, mock_airflow_connection, caplog):
+class MockKeysetCursor(pydantic.BaseModel):
+    rows: list = []
+
+    def fetchall(self):
+        return self.rows
+
+    def execute(self, sql_stmt, params):
+        last_hrid, _, stop_hrid, _, batch_size = params
+        hrid_rows = sorted(
+            (f"a{i}", row[0], row[1]) for i, row in enumerate(mock_result_set())
+        )
+        self.rows = [
+            (row[1], row[0], row[2])
+            for row in hrid_rows
+            if (last_hrid is None or row[0] > last_hrid)
+            and (stop_hrid is None or row[0] <= stop_hrid)
+        ][:batch_size]
+
+
+class MockKeysetConnection(pydantic.BaseModel):
+    executed: int = 0
+
+    def cursor(self):
+        self.executed += 1
+        return MockKeysetCursor()
+
+
+def test_fetch_full_dump_marc_pages():
+    connection = MockKeysetConnection()
+    pages = list(
+        full_dump_marc.fetch_full_dump_marc_pages(
+            start_hrid=None, stop_hrid=None, batch_size=4, connection=connection
+        )
+    )
+
+    assert [len(page) for page in pages] == [4, 2]
+    assert [row[1] for row in pages[1]] == ["a4", "a5"]
+    assert connection.executed == 2
+
+    pages = list(
+        full_dump_marc.fetch_full_dump_marc_pages(
+            start_hrid="a1", stop_hrid="a4", batch_size=3, connection=connection
+        )
+    )
+
+    assert [[row[1] for row in page] for page in pages] == [["a2", "a3", "a4"]]
+
+
+def test_fetch_full_dump_marc_range(mocker, caplog):
     mocker.patch.object(exporter, "S3Path")
-    mocker.patch('libsys_airflow.plugins.data_exports.marc.exporter.folio_client')
-    mocker.patch(
-        'libsys_airflow.plugins.data_exports.sql_pool.Connection.get_connection_from_secrets',
-        return_value=mock_airflow_connection,
+    mock_folio_client = mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exporter.folio_client'
     )
 
-    full_dump_marc.fetch_full_dump_marc(
-        offset=0, batch_size=3, connection=MockConnection()
+    marc_files = list(
+        full_dump_marc.fetch_full_dump_marc_range(
+            start=10,
+            start_hrid="a1",
+            stop_hrid=None,
+            batch_size=2,
+            connection=MockKeysetConnection(),
+        )
     )
-    assert "Saving 3 marc records to 0_3.mrc in bucket" in caplog.text
 
-    full_dump_marc.fetch_full_dump_marc(
-        offset=3, batch_size=3, connection=MockConnection()
+    assert len(marc_files) == 2
+    assert "Saving 2 marc records to 10_12.mrc in bucket" in caplog.text
+    assert "Saving 2 marc records to 12_14.mrc in bucket" in caplog.text
+    mock_folio_client.assert_not_called()
+
+
+def test_shard_hrid_range():
+    boundaries = ["a1", "a3", "a5"]
+
+    assert full_dump_marc.shard_hrid_range(0, boundaries) == {
+        "start_hrid": None,
+        "stop_hrid": "a1",
+    }
+    assert full_dump_marc.shard_hrid_range(2, boundaries) == {
+        "start_hrid": "a3",
+        "stop_hrid": "a5",
+    }
+    # Shards past the last boundary are empty
+    assert full_dump_marc.shard_hrid_range(4, boundaries) == {
+        "start_hrid": "a5",
+        "stop_hrid": "a5",
+    }
+    assert full_dump_marc.shard_hrid_range(1, []) == {
+        "start_hrid": None,
+        "stop_hrid": None,
+    }
+
+
+def test_fetch_full_dump_marc_range_workers(mocker, caplog):
+    mocker.patch.object(exporter, "S3Path")
+    mock_folio_client = mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exporter.folio_client'
+    )
+    mocker.patch.object(full_dump_marc, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+    def mock_retrieve_marc(marc_filename, instance_ids):
+        if marc_filename == "2_4.mrc":
+            raise ValueError("bad page")
+        return marc_filename
+
+    mock_retrieve = mocker.patch.object(
+        exporter.Exporter,
+        "retrieve_marc_for_full_dump",
+        side_effect=mock_retrieve_marc,
+    )
+
+    marc_files = list(
+        full_dump_marc.fetch_full_dump_marc_range(
+            start=0,
+            start_hrid=None,
+            stop_hrid=None,
+            batch_size=2,
+            connection=MockKeysetConnection(),
+            workers=2,
+        )
     )
-    assert "Saving 3 marc records to 3_6.mrc in bucket" in caplog.text
+
+    assert mock_retrieve.call_count == 3
+    assert sorted(marc_files) == ["0_2.mrc", "4_6.mrc"]
+    assert "bad page for 2_4.mrc" in caplog.text
+    mock_folio_client.assert_not_called()
+
+
+def test_fetch_full_dump_marc_range_failed_page(mocker, caplog):
+    mocker.patch.object(exporter, "S3Path")
+    mocker.patch('libsys_airflow.plugins.data_exports.marc.exporter.folio_client')
+
+    def mock_retrieve_marc(marc_filename, instance_ids):
+        if marc_filename == "0_2.mrc":
+            raise ValueError("bad page")
+        return marc_filename
+
+    mocker.patch.object(
+        exporter.Exporter,
+        "retrieve_marc_for_full_dump",
+        side_effect=mock_retrieve_marc,
+    )
+
+    marc_files = list(
+        full_dump_marc.fetch_full_dump_marc_range(
+            start=0,
+            start_hrid=None,
+            stop_hrid=None,
+            batch_size=2,
+            connection=MockKeysetConnection(),
+        )
+    )
+
+    assert marc_files == ["2_4.mrc", "4_6.mrc"]
+    assert "bad page for 0_2.mrc" in caplog.text
@@ -1,5 +1,8 @@
 import pathlib
 import pymarc
+import pytest
+
+from unittest.mock import MagicMock
 
 from libsys_airflow.plugins.data_exports.marc import gobi as gobi_transformer
 from tests.data_exports.test_marc_transformations import mock_folio_client  # noqa
@@ -481,3 +484,172 @@ def test_with_non_sul_holding(tmp_path, mocker, mock_folio_client):  # noqa
 
     with gobi_file.open('r+') as fo:
         assert fo.readline() == ''
+
+
+batch_holdings = {
+    "5db0204e-0c10-40d7-8d11-26b94177b170": [
+        {
+            'id': '3bb4a439-842e-5c8d-b86c-eaad46b6a316',
+            'holdingsTypeId': '996f93e2-5b5e-4cf2-9168-33ced1f95eed',
+            'permanentLocationId': 'a8676073-7520-4f26-8573-55976301ab5d',
+        },
+        {
+            'id': '6f2b9d8a-01b3-4c6e-9a55-3f0e4c7d2b10',
+            'holdingsTypeId': '03c9c400-b9e3-4a07-ac0e-05ab470233ed',
+            'permanentLocationId': 'a8676073-7520-4f26-8573-55976301ab5d',
+        },
+    ],
+    "c5a7e1b0-9d2f-4f63-8e4a-7b1d0c6f5e32": [
+        {
+            'id': '9d0e8c1f-5a3b-4e27-b6d4-2c8f7a1e0b95',
+            'holdingsTypeId': '03c9c400-b9e3-4a07-ac0e-05ab470233ed',
+            'permanentLocationId': 'a8676073-7520-4f26-8573-55976301ab5d',
+        },
+        {
+            'id': 'e4b7a2c9-3f18-4d5e-a0b6-8c9d1e2f3a47',
+            'holdingsTypeId': '03c9c400-b9e3-4a07-ac0e-05ab470233ed',
+            'permanentLocationId': 'bffa197c-a6db-446c-96f7-e1fd37a8842e',
+        },
+    ],
+}
+
+batch_holdings_with_items = [
+    '3bb4a439-842e-5c8d-b86c-eaad46b6a316',
+    'e4b7a2c9-3f18-4d5e-a0b6-8c9d1e2f3a47',
+]
+
+
+class MockGobiConnection(object):
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.statements: list = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        connection = self
+        cursor = MagicMock()
+
+        def execute(sql_stmt, params):
+            connection.statements.append(sql_stmt)
+            if connection.fail:
+                raise Exception("canceling statement due to statement timeout")
+            if "holdings_record" in sql_stmt:
+                cursor.fetchall.return_value = [
+                    (instance_uuid, holding)
+                    for instance_uuid in params[0]
+                    for holding in batch_holdings.get(instance_uuid, [])
+                ]
+            else:
+                cursor.fetchall.return_value = [
+                    (holding_id,)
+                    for holding_id in params[0]
+                    if holding_id in batch_holdings_with_items
+                ]
+
+        cursor.execute = execute
+        return cursor
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def batch_marc_file(tmp_path) -> pathlib.Path:
+    marc_file = tmp_path / "20240110.mrc"
+    second_record = record(isbns=["9780316769174"], fields856=[], fields956=[])
+    second_record["999"]["i"] = "c5a7e1b0-9d2f-4f63-8e4a-7b1d0c6f5e32"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        marc_writer.write(
+            record(
+                isbns=["1234567890123", "9876543212345"],
+                fields856=["notgobi"],
+                fields956=[],
+            )
+        )
+        marc_writer.write(second_record)
+    return marc_file
+
+
+@pytest.fixture
+def mock_okapi_holdings(mocker, mock_folio_client):  # noqa
+    okapi_paths = []
+
+    def mock_folio_get(*args):
+        result = dict(folio_result)
+        if args[0].startswith("/holdings-storage/holdings"):
+            okapi_paths.append(args[0])
+            instance_uuid = args[0].split("instanceId==")[-1].strip(")")
+            result["holdingsRecords"] = batch_holdings.get(instance_uuid, [])
+        if args[0].startswith("/item-storage/items"):
+            okapi_paths.append(args[0])
+            holding_id = args[0].split("holdingsRecordId==")[-1].strip(")")
+            result["items"] = []
+            if holding_id in batch_holdings_with_items:
+                result["items"] = [{'id': '3251f045-f80c-5c0d-8774-a75af8a6f01c'}]
+        return result
+
+    mock_folio_client.folio_get = mock_folio_get
+
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+    return okapi_paths
+
+
+def test_batched_list_matches_okapi(tmp_path, mock_okapi_holdings):
+    marc_file = batch_marc_file(tmp_path)
+    gobi_file = tmp_path / "20240110.txt"
+
+    gobi_transformer.GobiTransformer().generate_list(marc_file)
+    okapi_list = gobi_file.read_text()
+
+    assert len(mock_okapi_holdings) == 5
+    mock_okapi_holdings.clear()
+
+    connection = MockGobiConnection()
+    transformer = gobi_transformer.GobiTransformer(connection=connection)
+    transformer.generate_list(marc_file, batch_size=500)
+
+    assert gobi_file.read_text() == okapi_list
+    assert okapi_list.splitlines() == [
+        "1234567890123|print|325099",
+        "9876543212345|print|325099",
+        "1234567890123|ebook|325099",
+        "9876543212345|ebook|325099",
+    ]
+    assert mock_okapi_holdings == []
+    assert len(connection.statements) == 2
+
+
+def test_batched_list_falls_back_to_okapi(tmp_path, mock_okapi_holdings, caplog):
+    marc_file = batch_marc_file(tmp_path)
+
+    connection = MockGobiConnection(fail=True)
+    transformer = gobi_transformer.GobiTransformer(connection=connection)
+    transformer.generate_list(marc_file, batch_size=1)
+
+    assert connection.rollbacks == 2
+    assert len(mock_okapi_holdings) == 5
+    assert "Error retrieving holdings for batch, using per record queries" in (
+        caplog.text
+    )
+    assert (tmp_path / "20240110.txt").read_text().splitlines()[0] == (
+        "1234567890123|print|325099"
+    )
+
+
+def test_gobi_list_from_marc_files(tmp_path, mocker, mock_okapi_holdings):
+    marc_file = batch_marc_file(tmp_path)
+    connection = MockGobiConnection()
+    mock_pool = mocker.patch.object(gobi_transformer, "SQLPool")
+    mock_pool.return_value.pool.return_value.getconn.return_value = connection
+
+    gobi_transformer.gobi_list_from_marc_files({"new": [str(marc_file)]})
+
+    assert len(connection.statements) == 2
+    assert mock_okapi_holdings == []
+    mock_pool.return_value.pool.return_value.putconn.assert_called_once_with(
+        connection, close=True
+    )
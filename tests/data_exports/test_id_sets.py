@@ -0,0 +1,82 @@
+import pathlib
+import pytest
+
+from libsys_airflow.plugins.data_exports.id_sets import (
+    InstanceIdSet,
+    read_instance_ids,
+)
+
+new_ids = [
+    'ecab8fc2-5a84-4a6e-a8a5-536fd37fd242',
+    '942b117a-9d10-48fa-bf4d-75f042e20fe5',
+    'ecab8fc2-5a84-4a6e-a8a5-536fd37fd242',
+]
+
+update_ids = [
+    '4e66ce0d-4a1d-41dc-8b35-0914df20c7fb',
+    '942b117a-9d10-48fa-bf4d-75f042e20fe5',
+    # Ends with a null byte
+    'fe2e581f-9767-442a-ae3c-a421ac655f00',
+]
+
+
+def test_instance_id_set_save_load(tmp_path):
+    id_set = InstanceIdSet.from_uuids(new_ids, vendor="pod", kind="new")
+
+    id_set_file = id_set.save(tmp_path / "instanceids/new/202406010000.ids")
+
+    loaded_id_set = InstanceIdSet.load(id_set_file)
+
+    assert loaded_id_set.vendor == "pod"
+    assert loaded_id_set.kind == "new"
+    assert len(loaded_id_set) == 2
+    assert list(loaded_id_set) == [
+        '942b117a-9d10-48fa-bf4d-75f042e20fe5',
+        'ecab8fc2-5a84-4a6e-a8a5-536fd37fd242',
+    ]
+    assert 'ecab8fc2-5a84-4a6e-a8a5-536fd37fd242' in loaded_id_set
+    assert '4e66ce0d-4a1d-41dc-8b35-0914df20c7fb' not in loaded_id_set
+
+
+def test_instance_id_set_empty(tmp_path):
+    id_set_file = InstanceIdSet.from_uuids([], vendor="gobi", kind="deletes").save(
+        tmp_path / "empty.ids"
+    )
+
+    assert list(InstanceIdSet.load(id_set_file)) == []
+
+
+def test_instance_id_set_not_id_set(tmp_path):
+    csv_file = tmp_path / "202406010000.ids"
+    csv_file.write_text("\n".join(new_ids) * 3)
+
+    with pytest.raises(ValueError, match="is not an instance id set file"):
+        InstanceIdSet.load(csv_file)
+
+
+def test_instance_id_set_union_difference():
+    new_set = InstanceIdSet.from_uuids(new_ids, vendor="pod", kind="new")
+    updates_set = InstanceIdSet.from_uuids(update_ids, vendor="pod", kind="updates")
+
+    assert list(new_set.union(updates_set)) == [
+        '4e66ce0d-4a1d-41dc-8b35-0914df20c7fb',
+        '942b117a-9d10-48fa-bf4d-75f042e20fe5',
+        'ecab8fc2-5a84-4a6e-a8a5-536fd37fd242',
+        'fe2e581f-9767-442a-ae3c-a421ac655f00',
+    ]
+    assert list(updates_set.difference(new_set)) == [
+        '4e66ce0d-4a1d-41dc-8b35-0914df20c7fb',
+        'fe2e581f-9767-442a-ae3c-a421ac655f00',
+    ]
+    assert updates_set.difference(new_set).kind == "updates"
+
+
+def test_read_instance_ids(tmp_path):
+    csv_file = tmp_path / "202406010000.csv"
+    csv_file.write_text("\n".join(update_ids) + "\n")
+    id_set_file = InstanceIdSet.from_uuids(update_ids).save(
+        tmp_path / "202406010000.ids"
+    )
+
+    assert list(read_instance_ids(csv_file)) == update_ids
+    assert list(read_instance_ids(pathlib.Path(id_set_file))) == sorted(update_ids)
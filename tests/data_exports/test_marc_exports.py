@@ -7,7 +7,7 @@ from libsys_airflow.plugins.data_exports.marc.exports import (
     marc_for_instances,
 )
 
-from libsys_airflow.plugins.data_exports.marc.exporter import Exporter
+from libsys_airflow.plugins.data_exports.marc.exporter import Exporter, MarcSink
 
 
 @pytest.fixture
@@ -184,6 +184,130 @@ def test_retrieve_marc_for_instance_404(mocker, mock_folio_404, tmp_path, caplog
     assert "response code 404" in caplog.text
 
 
+@pytest.fixture
+def mock_srs_connection():
+    def mock_execute(sql, params):
+        mock_cursor.rows = []
+        for instance_uuid in params[0]:
+            if instance_uuid == "4e66ce0d-4a1d-41dc-8b35-0914df20c7fb":
+                mock_cursor.rows.append(
+                    (
+                        instance_uuid,
+                        {
+                            "leader": "01509nam a2200361 a 4500",
+                            "fields": [
+                                {'001': 'a4293534'},
+                                {
+                                    '245': {
+                                        'ind1': '1',
+                                        'ind2': '0',
+                                        'subfields': [{'a': 'Casa grande & senzala'}],
+                                    }
+                                },
+                            ],
+                        },
+                    )
+                )
+
+    mock_cursor = MagicMock()
+    mock_cursor.execute = mock_execute
+    mock_cursor.fetchall = lambda: mock_cursor.rows
+    mock_connection = MagicMock()
+    mock_connection.cursor.return_value = mock_cursor
+    return mock_connection
+
+
+def test_retrieve_marc_for_instances_bulk(
+    mocker, mock_folio_client, mock_srs_connection, tmp_path, caplog
+):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exporter.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    instance_file = setup_test_file_updates(tmp_path)
+
+    exporter = Exporter(connection=mock_srs_connection)
+    exporter.retrieve_marc_for_instances(instance_file, kind="updates", batch_size=1)
+
+    marc_file = (
+        instance_file.parent.parent.parent / "marc-files/updates/202402271159.mrc"
+    )
+
+    with marc_file.open("rb") as fo:
+        marc_records = [r for r in pymarc.MARCReader(fo)]
+
+    assert len(marc_records) == 1
+    assert marc_records[0]['001'].value() == 'a4293534'
+    assert (
+        "No active SRS MARC record found for instance fe2e581f-9767-442a-ae3c-a421ac655fe2"
+        in caplog.text
+    )
+    assert "records/sec" in caplog.text
+
+
+def test_retrieve_marc_for_instances_bulk_failed_batch(
+    mocker, mock_folio_client, mock_srs_connection, tmp_path, caplog
+):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exporter.folio_client',
+        return_value=mock_folio_client,
+    )
+    mock_cursor = mock_srs_connection.cursor.return_value
+    srs_execute = mock_cursor.execute
+
+    def mock_execute(sql, params):
+        if "fe2e581f-9767-442a-ae3c-a421ac655fe2" in params[0]:
+            raise Exception("canceling statement due to statement timeout")
+        srs_execute(sql, params)
+
+    mock_cursor.execute = mock_execute
+
+    instance_file = setup_test_file_updates(tmp_path)
+    with instance_file.open("a") as fo:
+        fo.write("4e66ce0d-4a1d-41dc-8b35-0914df20c7fb\n")
+
+    exporter = Exporter(connection=mock_srs_connection)
+    exporter.retrieve_marc_for_instances(instance_file, kind="updates", batch_size=1)
+
+    marc_file = (
+        instance_file.parent.parent.parent / "marc-files/updates/202402271159.mrc"
+    )
+
+    with marc_file.open("rb") as fo:
+        marc_records = [r for r in pymarc.MARCReader(fo)]
+
+    # Batch after the failed batch is still retrieved
+    assert len(marc_records) == 2
+    mock_srs_connection.rollback.assert_called_once()
+    assert (
+        "Failed to retrieve SRS MARC record for instance fe2e581f-9767-442a-ae3c-a421ac655fe2"
+        in caplog.text
+    )
+
+
+def test_marc_for_instances_bulk_returns_connection(mocker, tmp_path):
+    mock_pool = MagicMock()
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exports.SQLPool'
+    ).return_value.pool.return_value = mock_pool
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exports.Exporter.retrieve_marc_for_instances',
+        side_effect=ValueError("Instance file does not exist"),
+    )
+    mocker.patch('libsys_airflow.plugins.data_exports.marc.exporter.folio_client')
+
+    with pytest.raises(ValueError):
+        marc_for_instances(
+            instance_files=[str(tmp_path / "updates/202402271159.csv")],
+            bulk_srs="True",
+        )
+
+    mock_pool.putconn.assert_called_once_with(
+        mock_pool.getconn.return_value, close=True
+    )
+
+
 def test_marc_for_instances(mocker, tmp_path, mock_folio_client):
     update_file_path = setup_test_file_updates(tmp_path)
     delete_file_path = setup_test_file_deletes(tmp_path)
@@ -203,6 +327,45 @@ def test_marc_for_instances(mocker, tmp_path, mock_folio_client):
     assert not any("updates" in s for s in files["deletes"])
 
 
+def test_marc_sink(tmp_path):
+    marc_file = tmp_path / "marc-files/updates/202402271159.mrc"
+    marc_sink = MarcSink(marc_file, mode="ab", buffer_size=10)
+
+    assert not marc_file.exists()
+
+    with marc_sink:
+        for hrid in ["a123", "a456", "a789"]:
+            record = pymarc.Record()
+            record.add_field(pymarc.Field(tag='001', data=hrid))
+            marc_sink.write(record)
+
+    assert marc_sink.count == 3
+    assert marc_sink.file_handle is None
+    assert str(marc_sink) == str(marc_file.absolute())
+
+    with marc_file.open("rb") as fo:
+        marc_records = [r for r in pymarc.MARCReader(fo)]
+
+    assert [r['001'].value() for r in marc_records] == ["a123", "a456", "a789"]
+
+
+def test_retrieve_marc_for_instances_no_records(mocker, mock_folio_404, tmp_path):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.exporter.folio_client',
+        return_value=mock_folio_404,
+    )
+
+    instance_file = setup_test_file_updates(tmp_path)
+
+    exporter = Exporter()
+    marc_file = exporter.retrieve_marc_for_instances(instance_file, kind="updates")
+
+    assert marc_file == ""
+    assert not (
+        instance_file.parent.parent.parent / "marc-files/updates/202402271159.mrc"
+    ).exists()
+
+
 field_035 = pymarc.Field(
     tag='035',
     indicators=[' ', '9'],  # type: ignore
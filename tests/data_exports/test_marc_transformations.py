@@ -1,3 +1,5 @@
+import gzip
+import io
 import pydantic
 import pymarc
 import pytest
@@ -6,9 +8,12 @@ import pathlib
 from unittest.mock import MagicMock
 
 from libsys_airflow.plugins.data_exports.marc.transforms import (
-    leader_for_deletes,
-    clean_and_serialize_marc_files,
-    marc_clean_serialize,
+    ValidatingXMLWriter,
+    marc_pipeline,
+    set_deletes_leader,
+    strip_excluded_tags,
+    transform_marc_files,
+    write_xml_record,
     zip_marc_file,
 )
 
@@ -56,6 +61,58 @@ class MockConnection(pydantic.BaseModel):
         return MockCursor()
 
 
+class MockBatchCursor(pydantic.BaseModel):
+    rows: list = []
+
+    def fetchall(self):
+        return self.rows
+
+    def execute(self, sql_stmt, param):
+        lookup = {
+            # Holdings by instance
+            '5face3a3-9804-5034-aa02-1eb5db0c191c': single_holdings,
+            'e1797b62-a8b1-5f3d-8e85-934d58bd9395': holdings_multiple_items,
+            'c77d294c-4d83-4fe0-87b1-f94a845c0d49': holdings_no_items,
+            # Items by holding
+            '10be3fec-48ea-5099-9d5f-ab4875c62481': single_item,
+            '3bb4a439-842e-5c8d-b86c-eaad46b6a316': multiple_items,
+        }
+        self.rows = []
+        for uuid in sorted(param[0]):
+            for row in lookup.get(uuid, []):
+                self.rows.append((uuid, row[0]))
+
+
+class MockBatchConnection(pydantic.BaseModel):
+    def cursor(self):
+        return MockBatchCursor()
+
+
+class MockFailedBatchConnection(pydantic.BaseModel):
+    aborted: bool = False
+    rollbacks: int = 0
+
+    def cursor(self):
+        connection = self
+        cursor = MockCursor()
+        per_record_execute = cursor.execute
+
+        def execute(sql_stmt, param):
+            if connection.aborted:
+                raise Exception("current transaction is aborted")
+            if "ANY(" in sql_stmt:
+                connection.aborted = True
+                raise Exception("canceling statement due to statement timeout")
+            per_record_execute(sql_stmt, param)
+
+        object.__setattr__(cursor, "execute", execute)
+        return cursor
+
+    def rollback(self):
+        self.aborted = False
+        self.rollbacks += 1
+
+
 class MockPool(pydantic.BaseModel):
     connection: MockConnection = MockConnection()
 
@@ -431,16 +488,100 @@ def test_add_holdings_items_no_items(mocker, mock_marc_dir, mock_folio_client):
 
 
 @pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
-def test_clean_and_serialize_marc_files(mock_marc_dir, caplog):
+def test_add_holdings_items_batches(mocker, mock_marc_dir, mock_folio_client):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    per_record_file = mock_marc_dir / "2024030101.mrc"
+    batch_file = mock_marc_dir / "2024030102.mrc"
+
+    for marc_file in [per_record_file, batch_file]:
+        with marc_file.open("wb+") as fo:
+            marc_writer = pymarc.MARCWriter(fo)
+            for uuid in [
+                '5face3a3-9804-5034-aa02-1eb5db0c191c',
+                'e1797b62-a8b1-5f3d-8e85-934d58bd9395',
+                'not a uuid!',
+                'c77d294c-4d83-4fe0-87b1-f94a845c0d49',
+            ]:
+                record = pymarc.Record()
+                record.add_field(
+                    pymarc.Field(
+                        tag='999',
+                        indicators=['f', 'f'],
+                        subfields=[pymarc.Subfield(code='i', value=uuid)],
+                    )
+                )
+                marc_writer.write(record)
+
+    transformer = marc_transformer.Transformer(connection=MockPool().getconn())
+    transformer.add_holdings_items(str(per_record_file), full_dump=False)
+
+    batch_transformer = marc_transformer.Transformer(connection=MockBatchConnection())
+    batch_transformer.add_holdings_items(str(batch_file), full_dump=False, batch_size=2)
+
+    assert per_record_file.read_bytes() == batch_file.read_bytes()
+
+    with batch_file.open('rb') as fo:
+        mod_marc_records = [r for r in pymarc.MARCReader(fo)]
+
+    assert len(mod_marc_records) == 3
+    assert len(mod_marc_records[1].get_fields('999')) == 3
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_add_holdings_items_failed_batch(mocker, mock_marc_dir, mock_folio_client):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    per_record_file = mock_marc_dir / "2024030101.mrc"
+    batch_file = mock_marc_dir / "2024030102.mrc"
+
+    for marc_file in [per_record_file, batch_file]:
+        with marc_file.open("wb+") as fo:
+            marc_writer = pymarc.MARCWriter(fo)
+            for uuid in [
+                '5face3a3-9804-5034-aa02-1eb5db0c191c',
+                'e1797b62-a8b1-5f3d-8e85-934d58bd9395',
+            ]:
+                record = pymarc.Record()
+                record.add_field(
+                    pymarc.Field(
+                        tag='999',
+                        indicators=['f', 'f'],
+                        subfields=[pymarc.Subfield(code='i', value=uuid)],
+                    )
+                )
+                marc_writer.write(record)
+
+    transformer = marc_transformer.Transformer(connection=MockPool().getconn())
+    transformer.add_holdings_items(str(per_record_file), full_dump=False)
+
+    failed_connection = MockFailedBatchConnection()
+    batch_transformer = marc_transformer.Transformer(connection=failed_connection)
+    batch_transformer.add_holdings_items(str(batch_file), full_dump=False, batch_size=2)
+
+    assert failed_connection.rollbacks == 1
+    assert per_record_file.read_bytes() == batch_file.read_bytes()
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_marc_pipeline_empty_file(mock_marc_dir):
     marc_file = mock_marc_dir / "20240228.mrc"
     marc_file.touch()
-    marc_file_list = {"updates": [str(marc_file)]}
-    clean_and_serialize_marc_files(marc_file_list)
-    assert f"Removed MARC fields and serialized records for updates files: {str(marc_file)}"
+
+    count = marc_pipeline(str(marc_file), [strip_excluded_tags], full_dump=False)
+
+    assert count == 0
+    assert (mock_marc_dir / "20240228.xml").exists()
 
 
 @pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
-def test_marc_clean_serialize(mock_marc_dir):
+def test_marc_pipeline_strip_excluded_tags(mock_marc_dir):
     record = pymarc.Record()
     record.add_field(
         pymarc.Field(
@@ -471,7 +612,7 @@ def test_marc_clean_serialize(mock_marc_dir):
         marc_writer = pymarc.MARCWriter(fo)
         marc_writer.write(record)
 
-    marc_clean_serialize(str(marc_file.absolute()), full_dump=False)
+    marc_pipeline(str(marc_file.absolute()), [strip_excluded_tags], full_dump=False)
 
     with marc_file.open('rb') as fo:
         marc_reader = pymarc.MARCReader(fo)
@@ -489,6 +630,64 @@ def test_marc_clean_serialize(mock_marc_dir):
     assert pathlib.Path(xml_file).stat().st_size > 0
 
 
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_marc_pipeline_invalid_xml(mock_marc_dir, caplog):
+    marc_file = mock_marc_dir / "20240228.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for control_number, title in [("a1", "A Short Title"), ("a2", "Bad\x0bTitle")]:
+            record = pymarc.Record()
+            record.add_field(
+                pymarc.Field(tag='001', data=control_number),
+                pymarc.Field(
+                    tag='245',
+                    indicators=[' ', ' '],
+                    subfields=[pymarc.Subfield(code='a', value=title)],
+                ),
+            )
+            marc_writer.write(record)
+
+    count = marc_pipeline(str(marc_file), [], full_dump=False)
+
+    with (mock_marc_dir / "20240228.xml").open('rb') as fo:
+        xml_records = pymarc.parse_xml_to_array(fo)
+
+    # The MARC21 file keeps both records, the MARCXML only the valid one
+    assert count == 2
+    assert [record["001"].value() for record in xml_records] == ["a1"]
+    assert "Failed to serialize MARC Record a2" in caplog.text
+
+
+def test_validating_xml_writer(caplog):
+    records = []
+    for control_number, title in [("a1", "A Short Title"), ("a2", "Bad\x0bTitle")]:
+        record = pymarc.Record()
+        record.add_field(
+            pymarc.Field(tag='001', data=control_number),
+            pymarc.Field(
+                tag='245',
+                indicators=[' ', ' '],
+                subfields=[pymarc.Subfield(code='a', value=title)],
+            ),
+        )
+        records.append(record)
+
+    xml_output = io.BytesIO()
+    xml_writer = ValidatingXMLWriter(xml_output)
+    results = [write_xml_record(xml_writer, r, "test.xml") for r in records]
+    xml_writer.close(close_fh=False)
+
+    pymarc_output = io.BytesIO()
+    pymarc_writer = pymarc.XMLWriter(pymarc_output)
+    pymarc_writer.write(records[0])
+    pymarc_writer.close(close_fh=False)
+
+    assert results == [True, False]
+    assert xml_output.getvalue() == pymarc_output.getvalue()
+    assert "Failed to serialize MARC Record a2" in caplog.text
+
+
 @pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
 def test_change_leader(mock_marc_dir):
     marc_file = mock_marc_dir / "20240509.mrc"
@@ -507,7 +706,7 @@ def test_change_leader(mock_marc_dir):
         marc_writer = pymarc.MARCWriter(fo)
         marc_writer.write(record)
 
-    leader_for_deletes(str(marc_file.absolute()), full_dump=False)
+    marc_pipeline(str(marc_file.absolute()), [set_deletes_leader], full_dump=False)
 
     with marc_file.open('rb') as fo:
         marc_reader = pymarc.MARCReader(fo)
@@ -516,6 +715,223 @@ def test_change_leader(mock_marc_dir):
     assert modified_marc_record.leader[5] == 'd'
 
 
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_marc_pipeline(mock_marc_dir):
+    marc_file = mock_marc_dir / "20240510.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for title in ["A Short Title", "Another Title"]:
+            record = pymarc.Record()
+            record.add_field(
+                pymarc.Field(
+                    tag='245',
+                    indicators=[' ', ' '],
+                    subfields=[pymarc.Subfield(code='a', value=title)],
+                ),
+                pymarc.Field(
+                    tag="598",
+                    indicators=[' ', '1'],
+                    subfields=[pymarc.Subfield(code='a', value='a30')],
+                ),
+            )
+            marc_writer.write(record)
+
+    count = marc_pipeline(
+        str(marc_file), [strip_excluded_tags, set_deletes_leader], full_dump=False
+    )
+
+    assert count == 2
+    assert not (mock_marc_dir / "20240510.mrc.tmp").exists()
+
+    with marc_file.open('rb') as fo:
+        modified_marc_records = [r for r in pymarc.MARCReader(fo)]
+
+    with (mock_marc_dir / "20240510.xml").open('rb') as fo:
+        xml_records = pymarc.parse_xml_to_array(fo)
+
+    assert len(modified_marc_records) == 2
+    assert len(xml_records) == 2
+    for record in modified_marc_records + xml_records:
+        assert record.leader[5] == 'd'
+        assert record.get_fields("598") == []
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["updates"], indirect=True)
+def test_marc_pipeline_compress_xml(mock_marc_dir):
+    marc_file = mock_marc_dir / "20240510.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        record = pymarc.Record()
+        record.add_field(
+            pymarc.Field(
+                tag='245',
+                indicators=[' ', ' '],
+                subfields=[pymarc.Subfield(code='a', value='A Short Title')],
+            )
+        )
+        marc_writer.write(record)
+
+    count = marc_pipeline(str(marc_file), [], full_dump=False, compress_xml=True)
+
+    assert count == 1
+    assert not (mock_marc_dir / "20240510.xml").exists()
+
+    with gzip.open(mock_marc_dir / "20240510.xml.gz", "rb") as fo:
+        xml_records = pymarc.parse_xml_to_array(fo)
+
+    assert len(xml_records) == 1
+    assert xml_records[0]["245"]["a"] == "A Short Title"
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["updates"], indirect=True)
+def test_marc_pipeline_failure_cleanup(mock_marc_dir):
+    marc_file = mock_marc_dir / "20240510.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        record = pymarc.Record()
+        record.add_field(
+            pymarc.Field(
+                tag='245',
+                indicators=[' ', ' '],
+                subfields=[pymarc.Subfield(code='a', value='A Short Title')],
+            )
+        )
+        marc_writer.write(record)
+
+    original = marc_file.read_bytes()
+
+    def failing_stage(records):
+        for record in records:
+            yield record
+            raise ValueError("Failed stage")
+
+    with pytest.raises(ValueError, match="Failed stage"):
+        marc_pipeline(str(marc_file), [failing_stage], full_dump=False)
+
+    assert not (mock_marc_dir / "20240510.mrc.tmp").exists()
+    assert not (mock_marc_dir / "20240510.xml").exists()
+    assert marc_file.read_bytes() == original
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_transform_marc_files(mocker, mock_marc_dir, mock_folio_client):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    updates_file = mock_marc_dir / "2024051001.mrc"
+    deletes_dir = mock_marc_dir.parent / "deletes"
+    deletes_dir.mkdir()
+    deletes_file = deletes_dir / "2024051001.mrc"
+
+    for marc_file in [updates_file, deletes_file]:
+        with marc_file.open("wb+") as fo:
+            marc_writer = pymarc.MARCWriter(fo)
+            record = pymarc.Record()
+            record.add_field(
+                pymarc.Field(
+                    tag='999',
+                    indicators=['f', 'f'],
+                    subfields=[
+                        pymarc.Subfield(
+                            code='i', value='e1797b62-a8b1-5f3d-8e85-934d58bd9395'
+                        )
+                    ],
+                ),
+                pymarc.Field(
+                    tag="699",
+                    indicators=['0', '4'],
+                    subfields=[pymarc.Subfield(code='a', value='see90 8')],
+                ),
+            )
+            marc_writer.write(record)
+
+    transform_marc_files(
+        {"updates": [str(updates_file)], "deletes": [str(deletes_file)]},
+        connection=MockBatchConnection(),
+    )
+
+    with updates_file.open('rb') as fo:
+        updated_record = next(pymarc.MARCReader(fo))
+
+    with deletes_file.open('rb') as fo:
+        deleted_record = next(pymarc.MARCReader(fo))
+
+    assert len(updated_record.get_fields("999")) == 3
+    assert updated_record.get_fields("699") == []
+    assert updated_record.leader[5] != 'd'
+
+    assert len(deleted_record.get_fields("999")) == 1
+    assert deleted_record.get_fields("699") == []
+    assert deleted_record.leader[5] == 'd'
+
+    assert (mock_marc_dir / "2024051001.xml").exists()
+    assert (deletes_dir / "2024051001.xml").exists()
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_transform_marc_files_keep_deletes_leader(
+    mocker, mock_marc_dir, mock_folio_client
+):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    deletes_dir = mock_marc_dir.parent / "deletes"
+    deletes_dir.mkdir()
+    deletes_file = deletes_dir / "2024051001.mrc"
+
+    with deletes_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        record = pymarc.Record()
+        record.add_field(
+            pymarc.Field(
+                tag='245',
+                indicators=[' ', ' '],
+                subfields=[pymarc.Subfield(code='a', value='A Short Title')],
+            )
+        )
+        marc_writer.write(record)
+
+    transform_marc_files(
+        {"deletes": [str(deletes_file)]},
+        connection=MockBatchConnection(),
+        deletes_leader=False,
+    )
+
+    with deletes_file.open('rb') as fo:
+        deleted_record = next(pymarc.MARCReader(fo))
+
+    assert deleted_record.leader[5] != 'd'
+
+
+@pytest.mark.parametrize("mock_marc_dir", ["vendor"], indirect=True)
+def test_transform_marc_files_returns_connection(
+    mocker, mock_marc_dir, mock_folio_client
+):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+    mock_sql_pool = mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transforms.SQLPool'
+    )
+    mock_pool = mock_sql_pool.return_value.pool.return_value
+    mock_pool.getconn.return_value = MockBatchConnection()
+
+    with pytest.raises(FileNotFoundError):
+        transform_marc_files({"updates": [str(mock_marc_dir / "missing.mrc")]})
+
+    mock_pool.putconn.assert_called_once_with(
+        mock_pool.getconn.return_value, close=True
+    )
+
+
 @pytest.mark.parametrize("mock_marc_dir", ["pod"], indirect=True)
 def test_zip_marc_file(mock_marc_dir):
     marc_file = mock_marc_dir / "20240509.xml"
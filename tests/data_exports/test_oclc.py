@@ -1,6 +1,7 @@
 import httpx
 import pymarc
 import pytest
+import re
 
 from unittest.mock import MagicMock
 
@@ -194,8 +195,20 @@ def mock_folio_client():
             'libraryId': 'c1a86906-ced0-46cb-8f5b-8cef542bdd00',
         },
     ]
+
+    def mock_folio_get_all(*args, **kwargs):
+        mock_client.holdings_queries.append(kwargs["query"])
+        for instance_uuid in re.findall(r"[0-9a-f-]{36}", kwargs["query"]):
+            result = mock_folio_get(
+                f"/holdings-storage/holdings?query=(instanceId=={instance_uuid})"
+            )
+            for holding in (result or {}).get("holdingsRecords", []):
+                yield {"instanceId": instance_uuid, **holding}
+
     mock_client = MagicMock()
     mock_client.folio_get = mock_folio_get
+    mock_client.folio_get_all = mock_folio_get_all
+    mock_client.holdings_queries = []
     mock_client.locations = mock_locations
     return mock_client
 
@@ -396,6 +409,112 @@ def test_oclc_division(
 
     assert len(oclc_transformer.libraries["STF"]["holdings"]) == 1
     assert len(oclc_transformer.libraries["STF"]["marc"]) == 1
+    # Holdings for the records are retrieved in a single request
+    assert mock_folio_client.holdings_queries == [
+        "(instanceId==(c5289a13-9e89-4f82-9a86-2e892d6deb9d or e1797b62-a8b1-5f3d-8e85-934d58bd9395))"
+    ]
+
+
+def test_oclc_division_batch_size(mocker, tmp_path, mock_folio_client):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    marc_file = tmp_path / "2024030510.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for instance_uuid in [
+            "faac8aec-5b66-4908-bd56-b0ae9194a546",
+            "769c09a4-f66f-416d-9326-36f9f368f2e4",
+            "9f16e1b3-64e7-4578-9106-c01c2b52c8fe",
+        ]:
+            record = pymarc.Record()
+            record.add_field(
+                pymarc.Field(
+                    tag='999',
+                    indicators=['f', 'f'],
+                    subfields=[pymarc.Subfield(code='i', value=instance_uuid)],
+                )
+            )
+            marc_writer.write(record)
+
+    oclc_transformer = OCLCTransformer()
+    oclc_transformer.divide(marc_file=str(marc_file), batch_size=2)
+
+    assert len(mock_folio_client.holdings_queries) == 2
+    assert len(oclc_transformer.libraries["HIN"]["marc"][str(marc_file)]) == 1
+    assert len(oclc_transformer.libraries["S7Z"]["marc"][str(marc_file)]) == 1
+    assert len(oclc_transformer.libraries["CASUM"]["marc"][str(marc_file)]) == 1
+
+
+def test_oclc_division_duplicate_records(mocker, tmp_path, mock_folio_client):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    marc_file = tmp_path / "2024030510.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for instance_uuid in [
+            "faac8aec-5b66-4908-bd56-b0ae9194a546",
+            "769c09a4-f66f-416d-9326-36f9f368f2e4",
+            "faac8aec-5b66-4908-bd56-b0ae9194a546",
+            "c5289a13-9e89-4f82-9a86-2e892d6deb9d",
+        ]:
+            record = pymarc.Record()
+            record.add_field(
+                pymarc.Field(
+                    tag='999',
+                    indicators=['f', 'f'],
+                    subfields=[pymarc.Subfield(code='i', value=instance_uuid)],
+                )
+            )
+            marc_writer.write(record)
+
+    oclc_transformer = OCLCTransformer()
+    oclc_transformer.divide(marc_file=str(marc_file))
+
+    hoover_records = oclc_transformer.libraries["HIN"]["marc"][str(marc_file)]
+    assert list(hoover_records) == ["faac8aec-5b66-4908-bd56-b0ae9194a546"]
+
+    business_records = oclc_transformer.libraries["S7Z"]["marc"][str(marc_file)]
+    assert list(business_records) == ["769c09a4-f66f-416d-9326-36f9f368f2e4"]
+
+
+def test_oclc_division_batch_error(
+    mocker, tmp_path, mock_folio_client, sample_marc_records, caplog
+):
+    def mock_folio_get_all(*args, **kwargs):
+        raise httpx.HTTPStatusError(
+            "414 Request-URI Too Long",
+            request=httpx.Request('GET', args[0]),
+            response=httpx.Response(414),
+        )
+
+    mock_folio_client.folio_get_all = mock_folio_get_all
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.marc.transformer.folio_client',
+        return_value=mock_folio_client,
+    )
+
+    marc_file = tmp_path / "2024030510.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for record in sample_marc_records:
+            marc_writer.write(record)
+
+    oclc_transformer = OCLCTransformer()
+    oclc_transformer.divide(marc_file=str(marc_file))
+
+    assert "Failed to retrieve holdings for batch" in caplog.text
+    # Falls back to retrieving holdings for each record
+    assert len(oclc_transformer.libraries["STF"]["holdings"]) == 1
+    assert len(oclc_transformer.libraries["STF"]["marc"]) == 1
 
 
 def test_save(mocker, mock_folio_client, sample_marc_records, tmp_path):
@@ -539,3 +658,24 @@ def test_filter_updates():
     assert new_record_ids['updates'] == []
     assert len(new_record_ids['deletes']) == 2
     assert len(new_record_ids['new']) == 2
+
+
+def test_filter_updates_id_set_files(tmp_path):
+    new_ids = tmp_path / "new.ids"
+    new_ids.touch()
+
+    new_record_ids = filter_updates(
+        all_records_ids={"new": str(new_ids), "updates": None, "deletes": None}
+    )
+
+    assert new_record_ids == {"new": str(new_ids), "updates": [], "deletes": None}
+
+    update_ids = tmp_path / "updates.ids"
+    update_ids.touch()
+
+    new_record_ids = filter_updates(
+        all_records_ids={"new": None, "updates": str(update_ids), "deletes": None}
+    )
+
+    assert new_record_ids["updates"] == []
+    assert not update_ids.exists()
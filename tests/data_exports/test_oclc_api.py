@@ -2,6 +2,7 @@ import json
 import httpx
 import pymarc
 import pytest
+import re
 
 from unittest.mock import MagicMock
 
@@ -238,7 +239,7 @@ def missing_or_multiple_oclc_records():
     return sample
 
 
-def mock_metadata_session(authorization=None, timeout=None):
+def mock_metadata_session(authorization=None, timeout=None, **kwargs):
     mock_response = MagicMock()
 
     def mock__enter__(*args):
@@ -354,12 +355,19 @@ def mock_metadata_session(authorization=None, timeout=None):
     return mock_session
 
 
+class MockAccessToken(str):
+    expired = False
+
+    def is_expired(self):
+        return self.expired
+
+
 def mock_worldcat_access_token(**kwargs):
     if kwargs.get('key', '').startswith('n0taVal1dC1i3nt'):
         raise WorldcatAuthorizationError(
             b'{"code":401,"message":"No valid authentication credentials found in request"}'
         )
-    return "tk_6e302a204c2bfa4d266813cO647d62a77b10"
+    return MockAccessToken("tk_6e302a204c2bfa4d266813cO647d62a77b10")
 
 
 def mock_httpx_client():
@@ -464,32 +472,60 @@ def mock_folio_client(mocker):
                 output = {"sourceRecords": []}
         return output
 
+    def __instance_response__(path: str):
+        output = {}
+        for instance_uuid in [
+            "f19fd2fc-586c-45df-9b0c-127af97aef34",
+            "958835d2-39cc-4ab3-9c56-53bf7940421b",
+            "00b492cb-704d-41f4-bd12-74cfe643aea9",
+            "38a7bb66-cd11-4af6-a339-c13f5855b36f",
+            "a3a6f1c4-152c-4f8f-9763-07a49cd6fa5a",
+            "2023473e-802a-4bd2-9ca1-5d2e360a0fbd",
+            "ce4b5983-ff44-4b27-ab3c-d63a38095e30",
+            "7063655a-6196-416f-94e7-8d540e014805",
+            "f8fa3682-fef8-4810-b8da-8f51b73785ac",
+            "8c9447fa-0556-47cc-98af-c8d5e0d763fb",
+        ]:
+            if path.endswith(instance_uuid):
+                output = {"_version": "2", "hrid": "a345691"}
+        return output
+
     def mock_folio_get(*args, **kwargs):
         output = {}
+        mock.folio_get_paths.append(args[0])
         if args[0].startswith("/source-storage/source-records"):
             output = __srs_response__(args[0])
         if args[0].startswith("/inventory/instances/"):
-            for instance_uuid in [
-                "f19fd2fc-586c-45df-9b0c-127af97aef34",
-                "958835d2-39cc-4ab3-9c56-53bf7940421b",
-                "00b492cb-704d-41f4-bd12-74cfe643aea9",
-                "38a7bb66-cd11-4af6-a339-c13f5855b36f",
-                "a3a6f1c4-152c-4f8f-9763-07a49cd6fa5a",
-                "2023473e-802a-4bd2-9ca1-5d2e360a0fbd",
-                "ce4b5983-ff44-4b27-ab3c-d63a38095e30",
-                "7063655a-6196-416f-94e7-8d540e014805",
-                "f8fa3682-fef8-4810-b8da-8f51b73785ac",
-                "8c9447fa-0556-47cc-98af-c8d5e0d763fb",
-            ]:
-                if args[0].endswith(instance_uuid):
-                    output = {"_version": "2", "hrid": "a345691"}
+            output = __instance_response__(args[0])
 
         return output
 
+    def mock_folio_get_all(*args, **kwargs):
+        for instance_uuid in re.findall(r"[0-9a-f-]{36}", kwargs["query"]):
+            instance = __instance_response__(instance_uuid)
+            if instance:
+                yield {"id": instance_uuid, **instance}
+
+    def mock_folio_post(*args, **kwargs):
+        source_records = []
+        for instance_uuid in args[1]:
+            srs_result = __srs_response__(f"instanceId={instance_uuid}")
+            for source_record in srs_result.get("sourceRecords", []):
+                source_records.append(
+                    {
+                        "externalIdsHolder": {"instanceId": instance_uuid},
+                        **source_record,
+                    }
+                )
+        return {"sourceRecords": source_records}
+
     mock = mocker
     mock.okapi_headers = {}
     mock.okapi_url = "https://okapi.stanford.edu"
     mock.folio_get = mock_folio_get
+    mock.folio_get_all = mock_folio_get_all
+    mock.folio_post = mock_folio_post
+    mock.folio_get_paths = []
     return mock
 
 
@@ -500,6 +536,9 @@ def mock_oclc_api(mocker):
 
     mocker.patch.object(oclc_api, "httpx", mock_httpx)
 
+    mocker.patch.dict(oclc_api._access_tokens, clear=True)
+    mocker.patch.dict(oclc_api._shared_clients, clear=True)
+
     mocker.patch.object(oclc_api, "WorldcatAccessToken", mock_worldcat_access_token)
 
     mocker.patch.object(oclc_api, "MetadataSession", mock_metadata_session)
@@ -1117,3 +1156,481 @@ def test_worldcat_error(mocker, mock_oclc_api, tmp_path):
     result = oclc_api_instance.update([str(marc_file.absolute())])
 
     assert result["failures"][0]["reason"] == "WorldcatRequest Error"
+
+
+def test_token_bucket(mocker):
+    clock = {"now": 100.0}
+    sleeps = []
+
+    def mock_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    mocker.patch.object(oclc_api.time, "monotonic", lambda: clock["now"])
+    mocker.patch.object(oclc_api.time, "sleep", mock_sleep)
+
+    bucket = oclc_api.TokenBucket(2)
+
+    # Full bucket allows a burst of capacity tokens without waiting
+    bucket.acquire()
+    bucket.acquire()
+    assert sleeps == []
+
+    bucket.acquire()
+    assert sleeps == [0.5]
+
+
+def test_create_bib_retries(mocker, mock_oclc_api, tmp_path):
+    status_codes = [429, 503, 200]
+    requests = []
+
+    def mock_response(request):
+        requests.append(request)
+        return httpx.Response(status_code=status_codes.pop(0), content=b"")
+
+    sleeps = []
+    mocker.patch.object(oclc_api.time, "sleep", lambda seconds: sleeps.append(seconds))
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        backoff_factor=0.5,
+    )
+    oclc_api_instance.httpx_client = httpx.Client(
+        transport=httpx.MockTransport(mock_response)
+    )
+    acquire = mocker.spy(oclc_api_instance.rate_limiter, "acquire")
+
+    result = oclc_api_instance.__create_bib__(mock_metadata_session(), b"marc21")
+
+    assert result.status_code == 200
+    assert len(requests) == 3
+    assert requests[0].headers["content-type"] == "application/marc"
+    assert requests[0].headers["Authorization"] == "Bearer ab3565ackelas"
+    assert acquire.call_count == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_create_bib_retries_exhausted(mocker, mock_oclc_api):
+    mocker.patch.object(oclc_api.time, "sleep", lambda seconds: None)
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        retries=2,
+    )
+    requests = []
+
+    def mock_response(request):
+        requests.append(request)
+        return httpx.Response(status_code=500, content=b"")
+
+    oclc_api_instance.httpx_client = httpx.Client(
+        transport=httpx.MockTransport(mock_response)
+    )
+
+    result = oclc_api_instance.__create_bib__(mock_metadata_session(), b"marc21")
+
+    assert result.status_code == 500
+    assert len(requests) == 3
+
+
+def test_oclc_operations_concurrent_output(mock_oclc_api, tmp_path):
+    error_records = bad_records()
+    good_record = sample_marc_records()[2]
+
+    marc_file = tmp_path / "2024070114-STF.mrc"
+
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for _ in range(10):
+            for record in [error_records[0], error_records[2], good_record]:
+                marc_writer.write(record)
+
+    results = []
+    for workers in [1, 8]:
+        oclc_api_instance = oclc_api.OCLCAPIWrapper(
+            client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+            secret="c867b1dd75e6490f99d1cd1c9252ef22",
+            workers=workers,
+            requests_per_second=1_000,
+        )
+        results.append(oclc_api_instance.delete([str(marc_file.absolute())]))
+
+    serial, concurrent = results
+    assert concurrent == serial
+    assert len(concurrent['success']) == 10
+    assert len(concurrent['failures']) == 20
+
+
+def test_prefetch_folio_metadata(tmp_path, mock_oclc_api, caplog):
+    marc_record, no_srs_record, _ = sample_marc_records()
+    marc_file = tmp_path / "202403273-STF-new.mrc"
+
+    with marc_file.open('wb') as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for record in [marc_record, no_srs_record]:
+            marc_writer.write(record)
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+    )
+
+    new_result = oclc_api_instance.new([str(marc_file.absolute())])
+
+    assert new_result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+    assert "Prefetched FOLIO metadata for 1 of 1 instances" in caplog.text
+    # Prefetched metadata is released once the record is updated in FOLIO
+    assert oclc_api_instance.folio_metadata == {}
+    # The version, hrid, and SRS record id were not requested per record
+    assert oclc_api_instance.folio_client.folio_get_paths == []
+
+
+def test_prefetch_folio_metadata_failure(tmp_path, mock_oclc_api, caplog):
+    marc_record, _, _ = sample_marc_records()
+    marc_file = tmp_path / "202403273-STF-new.mrc"
+
+    with marc_file.open('wb') as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        marc_writer.write(marc_record)
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+    )
+
+    def mock_folio_post(*args, **kwargs):
+        raise httpx.HTTPStatusError(
+            "500 Internal Server Error",
+            request=httpx.Request('POST', args[0]),
+            response=httpx.Response(500),
+        )
+
+    oclc_api_instance.folio_client.folio_post = mock_folio_post
+
+    new_result = oclc_api_instance.new([str(marc_file.absolute())])
+
+    assert "Failed to prefetch FOLIO metadata for 1 instances" in caplog.text
+    assert oclc_api_instance.folio_metadata == {}
+    # Falls back to retrieving the SRS record id for the instance
+    assert new_result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+
+
+def ledger_record(oclc_number: str) -> pymarc.Record:
+    record = pymarc.Record()
+    record.add_field(
+        pymarc.Field(
+            tag='035',
+            indicators=[' ', ' '],  # type: ignore
+            subfields=[pymarc.Subfield(code='a', value=f'(OCoLC){oclc_number}')],
+        ),
+        pymarc.Field(
+            tag='999',
+            indicators=['f', 'f'],  # type: ignore
+            subfields=[
+                pymarc.Subfield(code='i', value='958835d2-39cc-4ab3-9c56-53bf7940421b')
+            ],
+        ),
+    )
+    return record
+
+
+def ledger_marc_file(tmp_path, record: pymarc.Record) -> tuple:
+    marc_file = tmp_path / "2024070114-STF.mrc"
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        marc_writer.write(record)
+
+    with marc_file.open("rb") as fo:
+        saved_record = next(pymarc.MARCReader(fo))
+
+    return str(marc_file), oclc_api.content_hash(saved_record)
+
+
+@pytest.fixture
+def mock_ledger(mocker):
+    ledger = oclc_api.HoldingsLedger("STF")
+    mocker.patch.object(ledger, "load")
+    mocker.patch.object(ledger, "save")
+    return ledger
+
+
+def test_update_skips_current_holdings(mock_oclc_api, mock_ledger, tmp_path):
+    # OCLC fails holdings_set for 39301853, so a success means it wasn't called
+    marc_file, record_hash = ledger_marc_file(tmp_path, ledger_record("39301853"))
+    mock_ledger.entries['958835d2-39cc-4ab3-9c56-53bf7940421b'] = (
+        "39301853",
+        True,
+        record_hash,
+    )
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        ledger=mock_ledger,
+    )
+
+    result = oclc_api_instance.update([marc_file])
+
+    assert result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+    assert mock_ledger.load.called
+    assert mock_ledger.save.called
+
+    # Changed MARC content is sent to OCLC
+    mock_ledger.entries['958835d2-39cc-4ab3-9c56-53bf7940421b'] = (
+        "39301853",
+        True,
+        "0" * 64,
+    )
+
+    result = oclc_api_instance.update([marc_file])
+
+    assert result['success'] == []
+    assert result['failures'][0]['reason'] == "Failed to update holdings"
+
+
+def test_update_records_ledger_outcome(mock_oclc_api, mock_ledger, tmp_path):
+    marc_file, record_hash = ledger_marc_file(tmp_path, ledger_record("455677"))
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        ledger=mock_ledger,
+    )
+
+    result = oclc_api_instance.update([marc_file])
+
+    assert result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+    assert mock_ledger.outcomes == {
+        '958835d2-39cc-4ab3-9c56-53bf7940421b': ("455677", True, record_hash)
+    }
+
+
+def test_delete_skips_unset_holdings(mock_oclc_api, mock_ledger, tmp_path):
+    # OCLC returns no response to holdings_unset for 2369001
+    marc_file, _ = ledger_marc_file(tmp_path, ledger_record("2369001"))
+    mock_ledger.entries['958835d2-39cc-4ab3-9c56-53bf7940421b'] = (
+        "2369001",
+        False,
+        "0" * 64,
+    )
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        ledger=mock_ledger,
+    )
+
+    result = oclc_api_instance.delete([marc_file])
+
+    assert result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+    assert result['failures'] == []
+
+
+def test_match_records_ledger_outcome(mock_oclc_api, mock_ledger, tmp_path):
+    record = pymarc.Record()
+    record.add_field(
+        pymarc.Field(tag='008', data="a4589"),
+        pymarc.Field(
+            tag='999',
+            indicators=['f', 'f'],  # type: ignore
+            subfields=[
+                pymarc.Subfield(code='i', value='958835d2-39cc-4ab3-9c56-53bf7940421b')
+            ],
+        ),
+    )
+    marc_file, record_hash = ledger_marc_file(tmp_path, record)
+    # An earlier delete unset holdings, match sets them again
+    mock_ledger.entries['958835d2-39cc-4ab3-9c56-53bf7940421b'] = (
+        "8891340",
+        False,
+        record_hash,
+    )
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        ledger=mock_ledger,
+    )
+
+    result = oclc_api_instance.match([marc_file])
+
+    assert result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+    assert mock_ledger.load.called
+    assert mock_ledger.save.called
+    assert mock_ledger.outcomes == {
+        '958835d2-39cc-4ab3-9c56-53bf7940421b': ("8891340", True, record_hash)
+    }
+
+
+def test_update_resumes_from_checkpoint(mock_oclc_api, tmp_path):
+    marc_file, _ = ledger_marc_file(tmp_path, ledger_record("39301853"))
+    checkpoint = oclc_api.OperationCheckpoint(tmp_path / "STF-update.jsonl")
+    # Processed by an earlier try of the task, OCLC fails 39301853 if sent again
+    checkpoint.record(
+        '958835d2-39cc-4ab3-9c56-53bf7940421b',
+        {"success": ['958835d2-39cc-4ab3-9c56-53bf7940421b'], "failures": []},
+    )
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        checkpoint=checkpoint,
+    )
+
+    result = oclc_api_instance.update([marc_file])
+
+    assert result['success'] == ['958835d2-39cc-4ab3-9c56-53bf7940421b']
+    assert result['failures'] == []
+
+
+def test_update_records_checkpoint(mock_oclc_api, tmp_path):
+    marc_file, _ = ledger_marc_file(tmp_path, ledger_record("39301853"))
+    checkpoint = oclc_api.OperationCheckpoint(tmp_path / "STF-update.jsonl")
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        checkpoint=checkpoint,
+    )
+
+    result = oclc_api_instance.update([marc_file])
+
+    completed = checkpoint.load()
+    assert completed['958835d2-39cc-4ab3-9c56-53bf7940421b'] == {
+        "success": [],
+        "failures": result['failures'],
+    }
+
+
+def test_oclc_records_operation_clears_checkpoints(mocker, mock_oclc_api, tmp_path):
+    mocker.patch(
+        'libsys_airflow.plugins.data_exports.oclc_api.is_production',
+        return_value=True,
+    )
+
+    connections = {"STF": {"username": "sul-admin", "password": "123245"}}
+    marc_file, _ = ledger_marc_file(tmp_path, ledger_record("455677"))
+    checkpoint_dir = tmp_path / "checkpoints/manual__2024-07-01T14:00:00+00:00"
+
+    result = oclc_api.oclc_records_operation(
+        oclc_function="update",
+        connections=connections,
+        records={"STF": [marc_file]},
+        use_ledger=False,
+        checkpoint_dir=checkpoint_dir,
+    )
+
+    assert result['success'] == {'STF': ['958835d2-39cc-4ab3-9c56-53bf7940421b']}
+    assert not (checkpoint_dir / "STF-update.jsonl").exists()
+
+
+def test_shared_token_and_clients(mocker, mock_oclc_api):
+    access_token = mocker.spy(oclc_api, "WorldcatAccessToken")
+
+    first_library = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+    )
+    first_library_retry = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+    )
+    second_library = oclc_api.OCLCAPIWrapper(
+        client_id="S7ZoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="9a1f3c0d2b4e4f6a8c7d5e3b1a0f2d4c",
+    )
+
+    assert access_token.call_count == 2
+    assert first_library.oclc_token is first_library_retry.oclc_token
+    assert second_library.httpx_client is first_library.httpx_client
+    assert second_library.folio_client is first_library.folio_client
+
+    # Expired tokens are replaced
+    first_library.oclc_token.expired = True
+
+    refreshed_library = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+    )
+
+    assert access_token.call_count == 3
+    assert refreshed_library.oclc_token is not first_library.oclc_token
+
+
+def test_oclc_operations_batches(mocker, mock_oclc_api, tmp_path):
+    marc_file = tmp_path / "2024070114-STF.mrc"
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for record in sample_marc_records():
+            marc_writer.write(record)
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+        batch_size=2,
+        workers=1,
+    )
+
+    prefetch = mocker.spy(oclc_api_instance, "__prefetch_folio_metadata__")
+
+    update_result = oclc_api_instance.update([str(marc_file)])
+
+    # Second sample record doesn't have an instance UUID
+    assert [len(call.args[0]) for call in prefetch.call_args_list] == [1, 1]
+    assert len(update_result['success']) + len(update_result['failures']) == 2
+
+
+def test_read_marc_files_lazily(mock_oclc_api, tmp_path):
+    marc_file = tmp_path / "2024070114-STF.mrc"
+    with marc_file.open("wb+") as fo:
+        marc_writer = pymarc.MARCWriter(fo)
+        for record in sample_marc_records():
+            marc_writer.write(record)
+
+    oclc_api_instance = oclc_api.OCLCAPIWrapper(
+        client_id="EDIoHuhLbdRvOHDjpEBtcEnBHneNtLUDiPRYtAqfTlpOThrxzUwHDUjMGEakoIJSObKpICwsmYZlmpYK",
+        secret="c867b1dd75e6490f99d1cd1c9252ef22",
+    )
+
+    marc_records = oclc_api_instance.__read_marc_files__(
+        [str(tmp_path / "missing.mrc"), str(marc_file)]
+    )
+
+    record, file_name = next(marc_records)
+    assert file_name == str(marc_file)
+    assert oclc_api.get_instance_uuid(record) == oclc_api.get_instance_uuid(
+        sample_marc_records()[0]
+    )
+    assert len(list(marc_records)) == 2
+
+
+def test_export_record():
+    record = pymarc.Record()
+    record.add_field(
+        pymarc.Field(tag='001', data='a123456'),
+        pymarc.Field(tag='007', data='cr un a'),
+        pymarc.Field(
+            tag='040',
+            indicators=[' ', ' '],  # type: ignore
+            subfields=[pymarc.Subfield(code='a', value='CSt')],
+        ),
+        pymarc.Field(
+            tag='245',
+            indicators=['0', '0'],  # type: ignore
+            subfields=[pymarc.Subfield(code='a', value='A title')],
+        ),
+    )
+
+    export_record = oclc_api.__oclc_marc_modifications__(
+        oclc_api.__export_record__(record)
+    )
+
+    assert [field.tag for field in export_record.fields] == ['007', '040', '245']
+    assert export_record['040']['a'] == 'STF'
+    assert export_record['007'].data == 'cr un|a'
+    # Source record is unchanged
+    assert record['040']['a'] == 'CSt'
+    assert record['007'].data == 'cr un a'
+    assert record['001'].data == 'a123456'
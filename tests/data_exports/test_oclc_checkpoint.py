@@ -0,0 +1,64 @@
+import json
+
+from libsys_airflow.plugins.data_exports.oclc_checkpoint import OperationCheckpoint
+
+
+def test_checkpoint_record_and_load(tmp_path):
+    checkpoint_file = tmp_path / "checkpoints/run-1/STF-update.jsonl"
+    checkpoint = OperationCheckpoint(checkpoint_file)
+
+    assert checkpoint.load() == {}
+
+    checkpoint.record(
+        "958835d2-39cc-4ab3-9c56-53bf7940421b",
+        {"success": ["958835d2-39cc-4ab3-9c56-53bf7940421b"], "failures": []},
+    )
+    checkpoint.record(
+        "38a7bb66-cd11-4af6-a339-c13f5855b36f",
+        {
+            "success": [],
+            "failures": [
+                {
+                    "uuid": "38a7bb66-cd11-4af6-a339-c13f5855b36f",
+                    "reason": "Failed to update holdings",
+                    "context": {"controlNumber": "39301853"},
+                }
+            ],
+        },
+    )
+
+    completed = OperationCheckpoint(checkpoint_file).load()
+
+    assert completed["958835d2-39cc-4ab3-9c56-53bf7940421b"]["success"] == [
+        "958835d2-39cc-4ab3-9c56-53bf7940421b"
+    ]
+    assert (
+        completed["38a7bb66-cd11-4af6-a339-c13f5855b36f"]["failures"][0]["reason"]
+        == "Failed to update holdings"
+    )
+
+    checkpoint.clear()
+    assert not checkpoint_file.exists()
+
+
+def test_checkpoint_incomplete_line(tmp_path, caplog):
+    checkpoint_file = tmp_path / "STF-new.jsonl"
+    complete = json.dumps(
+        {
+            "uuid": "958835d2-39cc-4ab3-9c56-53bf7940421b",
+            "output": {"success": [], "failures": []},
+        }
+    )
+    checkpoint_file.write_text(f'{complete}\n{{"uuid": "38a7bb66-cd11')
+
+    checkpoint = OperationCheckpoint(checkpoint_file)
+    completed = checkpoint.load()
+
+    assert list(completed) == ["958835d2-39cc-4ab3-9c56-53bf7940421b"]
+    assert f"Skipping incomplete line in {checkpoint_file}" in caplog.text
+
+    checkpoint.record(
+        "38a7bb66-cd11-4af6-a339-c13f5855b36f", {"success": [], "failures": []}
+    )
+
+    assert len(checkpoint.load()) == 2
@@ -0,0 +1,115 @@
+import pymarc
+import pytest
+
+from unittest.mock import MagicMock
+
+from libsys_airflow.plugins.data_exports import oclc_ledger
+from libsys_airflow.plugins.data_exports.oclc_ledger import (
+    HoldingsLedger,
+    content_hash,
+)
+
+
+@pytest.fixture
+def mock_ledger_table(mocker):
+    table: dict = {
+        (
+            "958835d2-39cc-4ab3-9c56-53bf7940421b",
+            "STF",
+        ): ("455677", True, "a" * 64),
+        (
+            "958835d2-39cc-4ab3-9c56-53bf7940421b",
+            "HIN",
+        ): ("455677", False, "a" * 64),
+    }
+
+    def mock_execute(sql, params):
+        symbol, instance_uuids = params
+        mock_cursor.rows = [
+            (instance_uuid, *state)
+            for (instance_uuid, row_symbol), state in table.items()
+            if row_symbol == symbol and instance_uuid in instance_uuids
+        ]
+
+    def mock_execute_values(cursor, sql, rows, page_size=100):
+        for instance_uuid, symbol, *state in rows:
+            table[(instance_uuid, symbol)] = tuple(state)
+
+    mock_cursor = MagicMock()
+    mock_cursor.execute = mock_execute
+    mock_cursor.__iter__ = lambda self: iter(self.rows)
+
+    mock_hook = mocker.patch.object(oclc_ledger, "PostgresHook")
+    mock_hook.return_value.get_conn.return_value.cursor.return_value = mock_cursor
+    mocker.patch.object(oclc_ledger, "execute_values", side_effect=mock_execute_values)
+    return table
+
+
+def test_content_hash():
+    record = pymarc.Record()
+    record.add_field(pymarc.Field(tag='001', data='a123456'))
+
+    assert content_hash(record) == content_hash(record)
+    assert len(content_hash(record)) == 64
+
+    record.add_field(pymarc.Field(tag='003', data='CSt'))
+    assert content_hash(record) != content_hash(pymarc.Record())
+
+
+def test_ledger_load(mock_ledger_table):
+    ledger = HoldingsLedger("STF")
+    ledger.load(
+        [
+            "958835d2-39cc-4ab3-9c56-53bf7940421b",
+            "38a7bb66-cd11-4af6-a339-c13f5855b36f",
+        ]
+    )
+
+    assert ledger.entries == {
+        "958835d2-39cc-4ab3-9c56-53bf7940421b": ("455677", True, "a" * 64)
+    }
+    assert ledger.is_current(
+        "958835d2-39cc-4ab3-9c56-53bf7940421b", "455677", True, "a" * 64
+    )
+    assert ledger.is_current("958835d2-39cc-4ab3-9c56-53bf7940421b", "455677", True)
+    assert not ledger.is_current(
+        "958835d2-39cc-4ab3-9c56-53bf7940421b", "455677", True, "b" * 64
+    )
+    assert not ledger.is_current(
+        "958835d2-39cc-4ab3-9c56-53bf7940421b", "455677", False
+    )
+    assert not ledger.is_current("38a7bb66-cd11-4af6-a339-c13f5855b36f", "1", True)
+
+
+def test_ledger_save(mock_ledger_table):
+    ledger = HoldingsLedger("STF")
+    ledger.record("958835d2-39cc-4ab3-9c56-53bf7940421b", "455677", False, "b" * 64)
+    ledger.record("38a7bb66-cd11-4af6-a339-c13f5855b36f", "2369001", True, "c" * 64)
+    ledger.save()
+
+    assert mock_ledger_table[("958835d2-39cc-4ab3-9c56-53bf7940421b", "STF")] == (
+        "455677",
+        False,
+        "b" * 64,
+    )
+    assert mock_ledger_table[("38a7bb66-cd11-4af6-a339-c13f5855b36f", "STF")] == (
+        "2369001",
+        True,
+        "c" * 64,
+    )
+    assert ledger.outcomes == {}
+    assert ledger.is_current("38a7bb66-cd11-4af6-a339-c13f5855b36f", "2369001", True)
+
+
+def test_ledger_unavailable(mocker, caplog):
+    mock_hook = mocker.patch.object(oclc_ledger, "PostgresHook")
+    mock_hook.return_value.get_conn.side_effect = Exception("Connection refused")
+
+    ledger = HoldingsLedger("STF")
+    ledger.load(["958835d2-39cc-4ab3-9c56-53bf7940421b"])
+    ledger.record("958835d2-39cc-4ab3-9c56-53bf7940421b", "455677", True, "a" * 64)
+    ledger.save()
+
+    assert ledger.entries == {}
+    assert "OCLC holdings ledger unavailable for STF" in caplog.text
+    assert "Failed to save OCLC holdings ledger for STF" in caplog.text
@@ -2,7 +2,13 @@ import pandas as pd
 import pathlib
 import pytest
 
-from libsys_airflow.plugins.data_exports.instance_ids import save_ids_to_fs, save_ids
+from libsys_airflow.plugins.data_exports import instance_ids
+from libsys_airflow.plugins.data_exports.instance_ids import (
+    capture_instance_changes,
+    fetch_changed_record_ids,
+    save_ids_to_fs,
+    save_ids,
+)
 from libsys_airflow.plugins.data_exports.apps.data_export_upload_view import (
     upload_data_export_ids,
 )
@@ -28,6 +34,108 @@ def mock_ti_param_only():
     return mock_ti_param
 
 
+class MockChangeLogCursor:
+    def __init__(self, change_log):
+        self.change_log = change_log
+        self.result = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        self.result = []
+        watermarks = self.change_log["watermarks"]
+        changes = self.change_log["changes"]
+        if sql.startswith("select high_water_mark"):
+            if params[0] in watermarks:
+                self.result = [(watermarks[params[0]],)]
+        elif sql.startswith("insert into data_export_watermarks"):
+            watermarks[params[0]] = params[1]
+        elif sql.startswith("select min(high_water_mark::bigint)"):
+            vendor_marks = [
+                int(mark) for name, mark in watermarks.items() if name != "capture"
+            ]
+            self.result = [(min(vendor_marks, default=None),)]
+        elif sql.startswith("select name from data_export_watermarks"):
+            # Captured dates aren't kept by the mock, nothing is past retention
+            self.result = []
+        elif sql.startswith("delete from data_export_instance_changes"):
+            lowest_mark, _ = params
+            self.rowcount = min(lowest_mark, len(changes))
+            self.change_log["pruned"] = self.rowcount
+        elif sql.startswith("select coalesce(max(id), 0)"):
+            self.result = [(len(changes),)]
+        elif sql.startswith("select distinct instance_id"):
+            kind, last_id, latest_id = params
+            self.result = list(
+                {
+                    (instance_id,)
+                    for i, (instance_id, change_kind) in enumerate(changes, start=1)
+                    if change_kind == kind and last_id < i <= latest_id
+                }
+            )
+        elif sql in self.change_log["kinds"]:
+            # FOLIO queries selecting the changed instances for one kind
+            kind = self.change_log["kinds"][sql]
+            self.change_log["queries"].append(params)
+            self.result = [
+                (instance_id,)
+                for instance_id in self.change_log["captures"].get(kind, [])
+            ]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+@pytest.fixture
+def mock_change_log(mocker, airflow_dir):
+    change_log = {
+        "watermarks": {},
+        "changes": [],
+        "captures": {},
+        "queries": [],
+        "pruned": 0,
+        "kinds": {
+            sqlfile.read_text(): kind
+            for kind in ["new", "updates", "deletes"]
+            for sqlfile in instance_ids.sql_files(airflow=airflow_dir, kind=kind)
+        },
+    }
+
+    def mock_execute_values(cursor, sql, rows, page_size=100):
+        change_log["changes"].extend(rows)
+
+    mock_connection = MagicMock()
+    mock_connection.cursor = lambda: MockChangeLogCursor(change_log)
+    mock_pool = MagicMock()
+    mock_pool.getconn.return_value = mock_connection
+    mock_sql_pool = mocker.patch(
+        "libsys_airflow.plugins.data_exports.instance_ids.SQLPool"
+    )
+    mock_sql_pool.return_value.pool.return_value = mock_pool
+    mock_hook = mocker.patch(
+        "libsys_airflow.plugins.data_exports.instance_ids.PostgresHook"
+    )
+    mock_hook.return_value.get_conn.return_value = mock_connection
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.instance_ids.execute_values",
+        side_effect=mock_execute_values,
+    )
+    return change_log
+
+
+@pytest.fixture
+def airflow_dir():
+    return pathlib.Path(instance_ids.__file__).parents[2]
+
+
 def mock_xcom_pull(**kwargs):
     return {
         "new": [
@@ -82,6 +190,19 @@ def test_save_ids_to_fs(tmp_path, mock_task_instance):
     ]
 
 
+def test_save_ids_to_fs_id_set_paths(tmp_path):
+    mock_ti = MagicMock()
+    mock_ti.xcom_pull.return_value = {
+        "new": str(tmp_path / "data-export-files/pod/instanceids/new/1.ids"),
+        "updates": None,
+        "deletes": [],
+    }
+
+    save_path = save_ids_to_fs(airflow=tmp_path, task_instance=mock_ti, vendor="pod")
+
+    assert save_path == [str(tmp_path / "data-export-files/pod/instanceids/new/1.ids")]
+
+
 def test_save_ids_to_fs_given_kind(tmp_path, mock_ti_param_only):
     mock_uploaded_data = [
         'ecab8fc2-5a84-4a6e-a8a5-536fd37fd242\n',
@@ -122,3 +243,116 @@ def test_upload_data_export_file_not_uuid():
 
     with pytest.raises(ValueError, match="Joe is not a UUID."):
         upload_data_export_ids(df, 'gobi', 'deletes')
+
+
+def test_capture_instance_changes(mock_change_log, airflow_dir):
+    mock_change_log["watermarks"]["capture"] = "2024-06-01"
+    mock_change_log["captures"] = {
+        "new": ["ecab8fc2-5a84-4a6e-a8a5-536fd37fd242"],
+        "updates": ["4e66ce0d-4a1d-41dc-8b35-0914df20c7fb"],
+    }
+
+    total = capture_instance_changes(airflow=airflow_dir, to_date="2024-06-02")
+
+    # Three update queries return the same instance and are all logged
+    assert total == 4
+    assert ("ecab8fc2-5a84-4a6e-a8a5-536fd37fd242", "new") in mock_change_log["changes"]
+    assert mock_change_log["watermarks"]["capture"] == "2024-06-02"
+    assert mock_change_log["queries"][0]["from_date"] == "2024-06-01"
+    assert mock_change_log["queries"][0]["to_date"] == "2024-06-02"
+
+
+def test_capture_instance_changes_prunes_read_changes(mock_change_log, airflow_dir):
+    mock_change_log["watermarks"] = {"capture": "2024-06-01", "pod": "3", "gobi": "2"}
+    mock_change_log["changes"] = [
+        ("942b117a-9d10-48fa-bf4d-75f042e20fe5", "new"),
+        ("ecab8fc2-5a84-4a6e-a8a5-536fd37fd242", "new"),
+        ("4e66ce0d-4a1d-41dc-8b35-0914df20c7fb", "updates"),
+    ]
+
+    capture_instance_changes(airflow=airflow_dir, to_date="2024-06-02")
+
+    # Both vendors have selected the first two changes
+    assert mock_change_log["pruned"] == 2
+
+
+def test_capture_instance_changes_no_vendor_watermarks(mock_change_log, airflow_dir):
+    mock_change_log["watermarks"] = {"capture": "2024-06-01"}
+    mock_change_log["changes"] = [
+        ("942b117a-9d10-48fa-bf4d-75f042e20fe5", "new"),
+    ]
+
+    capture_instance_changes(airflow=airflow_dir, to_date="2024-06-02")
+
+    assert mock_change_log["pruned"] == 0
+
+
+def test_fetch_changed_record_ids(mock_change_log, airflow_dir):
+    mock_change_log["watermarks"] = {"capture": "2024-06-02", "pod": "1"}
+    mock_change_log["changes"] = [
+        ("942b117a-9d10-48fa-bf4d-75f042e20fe5", "new"),
+        ("ecab8fc2-5a84-4a6e-a8a5-536fd37fd242", "new"),
+        ("4e66ce0d-4a1d-41dc-8b35-0914df20c7fb", "updates"),
+        ("4e66ce0d-4a1d-41dc-8b35-0914df20c7fb", "updates"),
+    ]
+
+    results, latest_change = fetch_changed_record_ids(airflow=airflow_dir, vendor="pod")
+
+    assert results == {
+        "new": ["ecab8fc2-5a84-4a6e-a8a5-536fd37fd242"],
+        "updates": ["4e66ce0d-4a1d-41dc-8b35-0914df20c7fb"],
+        "deletes": [],
+    }
+    assert latest_change == 4
+    # The vendor's mark only moves once the selected IDs are saved
+    assert mock_change_log["watermarks"]["pod"] == "1"
+
+
+def test_fetch_changed_record_ids_no_watermark(mock_change_log, airflow_dir):
+    mock_change_log["watermarks"] = {"capture": "2024-06-02"}
+
+    results, _ = fetch_changed_record_ids(airflow=airflow_dir, vendor="gobi")
+
+    assert results is None
+
+
+def test_fetch_record_ids_change_log(mocker, mock_change_log, airflow_dir, tmp_path):
+    mocker.patch.object(instance_ids, "get_current_context", return_value={})
+    mock_change_log["watermarks"] = {"capture": "2024-06-02", "pod": "0"}
+    mock_change_log["changes"] = [
+        ("942b117a-9d10-48fa-bf4d-75f042e20fe5", "new"),
+    ]
+
+    results = instance_ids.fetch_record_ids(
+        airflow=airflow_dir,
+        data_airflow=tmp_path,
+        vendor="pod",
+        use_change_log="True",
+    )
+
+    assert results["new"].endswith(".ids")
+    assert results["updates"] is None
+    assert mock_change_log["watermarks"]["pod"] == "1"
+
+
+def test_fetch_record_ids_change_log_save_fails(
+    mocker, mock_change_log, airflow_dir, tmp_path
+):
+    mocker.patch.object(instance_ids, "get_current_context", return_value={})
+    mocker.patch.object(
+        instance_ids, "save_id_sets", side_effect=OSError("No space left")
+    )
+    mock_change_log["watermarks"] = {"capture": "2024-06-02", "pod": "0"}
+    mock_change_log["changes"] = [
+        ("942b117a-9d10-48fa-bf4d-75f042e20fe5", "new"),
+    ]
+
+    with pytest.raises(OSError, match="No space left"):
+        instance_ids.fetch_record_ids(
+            airflow=airflow_dir,
+            data_airflow=tmp_path,
+            vendor="pod",
+            use_change_log=True,
+        )
+
+    assert mock_change_log["watermarks"]["pod"] == "0"
@@ -0,0 +1,141 @@
+import hashlib
+import json
+
+from datetime import datetime, timedelta, timezone
+from s3path import S3Path
+
+import libsys_airflow.plugins.data_exports.transmission_manifest as transmission_manifest
+
+from libsys_airflow.plugins.data_exports.transmission_manifest import (
+    TransmissionManifest,
+    file_digest,
+)
+
+
+def test_file_digest(tmp_path):
+    marc_file = tmp_path / "2024030214.xml"
+    marc_file.write_text("hello world")
+
+    digest, size = file_digest(marc_file)
+
+    assert digest == f"sha256:{hashlib.sha256(b'hello world').hexdigest()}"
+    assert size == 11
+
+
+def test_file_digest_s3(mocker):
+    mock_boto3 = mocker.patch.object(transmission_manifest, "boto3")
+    mock_client = mock_boto3.client.return_value
+    mock_client.head_object.return_value = {
+        "ETag": '"5eb63bbbe01eeed093cb22bb8f5acdc3"',
+        "ContentLength": 11,
+    }
+
+    digest, size = file_digest(
+        S3Path("/data-export-test/data-export-files/full-dump/marc-files/1.xml.gz")
+    )
+
+    assert digest == "etag:5eb63bbbe01eeed093cb22bb8f5acdc3"
+    assert size == 11
+    mock_client.head_object.assert_called_once_with(
+        Bucket="data-export-test",
+        Key="data-export-files/full-dump/marc-files/1.xml.gz",
+    )
+
+
+def test_manifest_record_and_load(tmp_path):
+    marc_file = tmp_path / "data-export-files/pod/marc-files/updates/2024030214.xml"
+    marc_file.parent.mkdir(parents=True)
+    marc_file.write_text("hello world")
+
+    assert TransmissionManifest.for_files([]) is None
+
+    manifest = TransmissionManifest.for_files([str(marc_file)])
+    assert manifest.manifest_file == (
+        tmp_path / "data-export-files/pod/transmitted/manifest.jsonl"
+    )
+    assert not manifest.is_transmitted(
+        "https://example.com", marc_file.name, "sha256:abc", 11
+    )
+
+    manifest.record("https://example.com", marc_file.name, "sha256:abc", 11)
+    assert not manifest.manifest_file.exists()
+    manifest.save()
+
+    reloaded = TransmissionManifest.for_files([str(marc_file)])
+    assert reloaded.is_transmitted(
+        "https://example.com", marc_file.name, "sha256:abc", 11
+    )
+    assert not reloaded.is_transmitted(
+        "ftp://example.com/dir", marc_file.name, "sha256:abc", 11
+    )
+    assert not reloaded.is_transmitted(
+        "https://example.com", marc_file.name, "sha256:abc", 12
+    )
+    assert not reloaded.is_transmitted(
+        "https://example.com", "2024030314.xml", "sha256:abc", 11
+    )
+
+
+def test_manifest_incomplete_line(tmp_path, caplog):
+    manifest_file = tmp_path / "manifest.jsonl"
+    row = {
+        "destination": "https://example.com",
+        "digest": "sha256:abc",
+        "size": 11,
+        "file": "1.xml",
+        "transmitted": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest_file.write_text(f'{json.dumps(row)}\n{{"destination": "https')
+
+    manifest = TransmissionManifest(manifest_file)
+    manifest.load()
+
+    assert manifest.is_transmitted(
+        "https://example.com", "1.xml", "sha256:abc", 11
+    )
+    assert f"Skipping incomplete line in {manifest_file}" in caplog.text
+
+
+def test_manifest_save_appends(tmp_path):
+    manifest_file = tmp_path / "transmitted/manifest.jsonl"
+    manifest = TransmissionManifest(manifest_file)
+    manifest.record("https://example.com", "1.xml", "sha256:abc", 11)
+    manifest.save()
+    manifest.save()
+
+    manifest = TransmissionManifest(manifest_file)
+    manifest.load()
+    manifest.record("https://example.com", "2.xml", "sha256:def", 12)
+    manifest.save()
+
+    rows = [json.loads(line) for line in manifest_file.read_text().splitlines()]
+    assert [row["file"] for row in rows] == ["1.xml", "2.xml"]
+
+
+def test_manifest_expired_entries(tmp_path):
+    manifest_file = tmp_path / "manifest.jsonl"
+    transmitted = datetime.now(timezone.utc) - timedelta(days=8)
+    manifest_file.write_text(
+        json.dumps(
+            {
+                "destination": "https://example.com",
+                "digest": "sha256:abc",
+                "size": 11,
+                "file": "1.xml",
+                "transmitted": transmitted.isoformat(),
+            }
+        )
+        + "\n"
+    )
+
+    manifest = TransmissionManifest(manifest_file)
+    manifest.load()
+    assert not manifest.is_transmitted(
+        "https://example.com", "1.xml", "sha256:abc", 11
+    )
+
+    manifest.record("https://example.com", "2.xml", "sha256:def", 12)
+    manifest.save()
+
+    rows = [json.loads(line) for line in manifest_file.read_text().splitlines()]
+    assert [row["file"] for row in rows] == ["2.xml"]
@@ -1,4 +1,5 @@
 import pytest  # noqa
+import ftplib
 import pathlib
 
 import httpx
@@ -16,6 +17,7 @@ from libsys_airflow.plugins.data_exports.transmission_tasks import (
     retry_failed_files_task,
     transmit_data_http_task,
     transmit_data_ftp_task,
+    oclc_checkpoint_dir,
     oclc_connections,
     archive_transmitted_data_task,
     consolidate_oclc_archive_files,
@@ -151,11 +153,40 @@ def test_gather_files_task(tmp_path, mock_vendor_marc_files):
 
 
 def test_gather_full_dump_files(mocker):
-    mocker.patch.object(transmission_tasks, "S3Path", pathlib.Path)
+    prefix = "data-export-files/full-dump/marc-files/"
+    pages = [
+        {
+            "Contents": [
+                {"Key": f"{prefix}new/0_50000.xml.gz", "Size": 1_024},
+                {"Key": f"{prefix}new/50000_100000.xml.gz", "Size": 112},
+                {"Key": f"{prefix}new/50000_100000.mrc", "Size": 4_096},
+            ]
+        },
+        {
+            "Contents": [
+                {"Key": f"{prefix}updates/100000_150000.xml.gz", "Size": 2_048},
+                {"Key": f"{prefix}updates/150000_200000.xml.gz", "Size": 0},
+            ]
+        },
+        {},
+    ]
+    mock_boto3 = mocker.patch.object(transmission_tasks, "boto3")
+    paginator = mock_boto3.client.return_value.get_paginator.return_value
+    paginator.paginate.return_value = pages
+
     marc_files = gather_files_task.function(
         vendor="full-dump", params={"bucket": "data-export-test"}
     )
+
     assert marc_files["s3"]
+    assert marc_files["file_list"] == [
+        f"/data-export-test/{prefix}updates/100000_150000.xml.gz",
+        f"/data-export-test/{prefix}new/0_50000.xml.gz",
+    ]
+    mock_boto3.client.return_value.get_paginator.assert_called_once_with(
+        "list_objects_v2"
+    )
+    paginator.paginate.assert_called_once_with(Bucket="data-export-test", Prefix=prefix)
 
 
 @pytest.mark.parametrize("mock_vendor_marc_files", ["gobi"], indirect=True)
@@ -298,6 +329,34 @@ def test_transmit_data_failed(
     assert "Transmit data to pod" in caplog.text
 
 
+def test_transmit_data_missing_file(
+    mocker, mock_httpx_connection, mock_httpx_success, mock_marc_files, caplog
+):
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.httpx.Client",
+        return_value=mock_httpx_success,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
+        return_value=mock_httpx_connection,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.is_production",
+        return_value=True,
+    )
+    missing_file = mock_marc_files["file_list"][1]
+    pathlib.Path(missing_file).unlink()
+
+    transmit_data = transmit_data_http_task.function(
+        mock_marc_files,
+        params={"vendor": "pod"},
+    )
+
+    assert transmit_data["failures"] == [missing_file]
+    assert len(transmit_data["success"]) == 2
+    assert f"Exception for transmission of file {missing_file}" in caplog.text
+
+
 def test_oclc_connections(mocker, mock_oclc_connection):
     mocker.patch(
         "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
@@ -735,3 +794,268 @@ def test_set_holdings_oclc_task(mocker, mock_oclc_connection):
 
     assert result['success']["RCJ"] == ["160ef499-18a2-47a4-bdab-a31522b10508"]
     assert result["failures"]["STF"] == ["d0725143-3ab5-472a-bc1e-b11321d72a13"]
+
+
+def test_oclc_checkpoint_dir(tmp_path):
+    assert oclc_checkpoint_dir() is None
+
+    checkpoint_dir = oclc_checkpoint_dir(
+        airflow=tmp_path, run_id="scheduled__2024-07-01T14:00:00+00:00"
+    )
+
+    assert checkpoint_dir == (
+        tmp_path
+        / "data-export-files/oclc/checkpoints/scheduled__2024-07-01T14:00:00+00:00"
+    )
+
+
+def test_filter_new_marc_records_task_failed_read(mocker, tmp_path):
+    marc_file = tmp_path / "2024072516.mrc"
+    marc_file.write_bytes(b"original")
+
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.pymarc.MARCReader",
+        side_effect=ValueError("Corrupt MARC file"),
+    )
+
+    with pytest.raises(ValueError, match="Corrupt MARC file"):
+        filter_new_marc_records_task.function(
+            new_records={'STF': [str(marc_file)]},
+            failed_matches={
+                'STF': [
+                    {
+                        "uuid": '4fb17691-4984-4407-81de-c30894c1226e',
+                        "reason": "Match failed",
+                        "context": {'numberOfRecords': 0, 'briefRecords': []},
+                    }
+                ]
+            },
+        )
+
+    assert marc_file.read_bytes() == b"original"
+    assert list(tmp_path.iterdir()) == [marc_file]
+
+
+def test_transmit_data_concurrent(
+    mocker, mock_httpx_connection, mock_marc_files, caplog
+):
+    uploads = []
+
+    def mock_response(request):
+        body = request.read()
+        uploads.append(request.extensions["timeout"]["read"])
+        if b'filename="2024030114.xml"' in body:
+            return httpx.Response(500)
+        return httpx.Response(200)
+
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.httpx.Client",
+        return_value=httpx.Client(transport=httpx.MockTransport(mock_response)),
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
+        return_value=mock_httpx_connection,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.is_production",
+        return_value=True,
+    )
+    large_file = pathlib.Path(mock_marc_files["file_list"][2])
+    large_file.write_bytes(b"0" * 25_000_000)
+
+    transmit_data = transmit_data_http_task.function(
+        mock_marc_files,
+        files_params="upload[files][]",
+        params={"vendor": "pod"},
+        workers=3,
+    )
+
+    assert transmit_data["success"] == [
+        mock_marc_files["file_list"][0],
+        mock_marc_files["file_list"][2],
+    ]
+    assert transmit_data["failures"] == [mock_marc_files["file_list"][1]]
+    assert sorted(uploads) == [10.0, 10.0, 25.0]
+    assert f"End transmission of data from file {large_file} 25,000,000 bytes" in (
+        caplog.text
+    )
+
+
+def test_transmit_data_ftp_task_workers(
+    mocker, mock_ftphook_connection, mock_marc_files
+):
+    stored = []
+
+    def mock_store_file(self, remote_file_path, local_file):
+        if local_file.endswith("2024030114.xml"):
+            raise ftplib.error_perm("553 Could not create file")
+        stored.append((id(self), remote_file_path))
+
+    mocker.patch("airflow.providers.ftp.hooks.ftp.FTPHook.store_file", mock_store_file)
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
+        return_value=mock_ftphook_connection,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.is_production",
+        return_value=True,
+    )
+
+    transmit_data = transmit_data_ftp_task.function(
+        "ftp-example.com", mock_marc_files, workers=2
+    )
+
+    assert transmit_data["success"] == [
+        mock_marc_files["file_list"][0],
+        mock_marc_files["file_list"][2],
+    ]
+    assert transmit_data["failures"] == [mock_marc_files["file_list"][1]]
+    assert len(stored) == 2
+
+
+class MockFTP(object):
+    def __init__(self, partial_size, rest_allowed=True):
+        self.partial_size = partial_size
+        self.rest_allowed = rest_allowed
+        self.stored: list = []
+
+    def voidcmd(self, cmd):
+        return "200 Type set to I"
+
+    def size(self, remote_file_path):
+        if self.partial_size is None:
+            raise ftplib.error_perm("550 No such file")
+        return self.partial_size
+
+    def storbinary(self, cmd, fo, rest=None):
+        if rest is not None and not self.rest_allowed:
+            raise ftplib.error_perm("502 REST not implemented")
+        self.stored.append((cmd, rest, fo.read()))
+
+    def quit(self):
+        return "221 Goodbye"
+
+
+@pytest.mark.parametrize(
+    "partial_size,rest_allowed,expected",
+    [
+        (6, True, ("STOR /remote/2024.xml", 6, b"world")),
+        (6, False, ("STOR /remote/2024.xml", None, b"hello world")),
+        (None, True, ("STOR /remote/2024.xml", None, b"hello world")),
+    ],
+)
+def test_store_file_resumable(mocker, tmp_path, partial_size, rest_allowed, expected):
+    local_file = tmp_path / "2024.xml"
+    local_file.write_text("hello world")
+
+    mock_ftp = MockFTP(partial_size, rest_allowed)
+    hook = mocker.MagicMock()
+    hook.conn = None
+    hook.store_file.side_effect = EOFError()
+    hook.get_conn.return_value = mock_ftp
+
+    transmission_tasks.store_file_resumable(hook, "/remote/2024.xml", str(local_file))
+
+    assert mock_ftp.stored[-1] == expected
+
+
+def test_transmit_data_skips_transmitted_files(
+    mocker, mock_httpx_connection, mock_marc_files, caplog
+):
+    uploads = []
+
+    def mock_response(request):
+        uploads.append(request.url)
+        return httpx.Response(200)
+
+    client_class = httpx.Client
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.httpx.Client",
+        side_effect=lambda **kwargs: client_class(
+            transport=httpx.MockTransport(mock_response)
+        ),
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
+        return_value=mock_httpx_connection,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.is_production",
+        return_value=True,
+    )
+    for i, marc_file in enumerate(mock_marc_files["file_list"]):
+        pathlib.Path(marc_file).write_text(f"record {i}")
+
+    first = transmit_data_http_task.function(mock_marc_files, params={"vendor": "pod"})
+    assert len(uploads) == 3
+
+    # Rerun after one file was regenerated with new content
+    pathlib.Path(mock_marc_files["file_list"][1]).write_text("record 1 changed")
+    second = transmit_data_http_task.function(mock_marc_files, params={"vendor": "pod"})
+
+    assert first["success"] == second["success"] == mock_marc_files["file_list"]
+    assert len(uploads) == 4
+    assert (
+        f"Skipping {mock_marc_files['file_list'][0]}, already transmitted to https://www.example.com"
+        in caplog.text
+    )
+
+
+def test_transmit_data_ftp_task_skips_transmitted_files(
+    mocker, mock_ftphook_connection, mock_marc_files, mock_file_system
+):
+    stored = []
+
+    def mock_store_file(self, remote_file_path, local_file):
+        stored.append(local_file)
+
+    mocker.patch("airflow.providers.ftp.hooks.ftp.FTPHook.store_file", mock_store_file)
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
+        return_value=mock_ftphook_connection,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.is_production",
+        return_value=True,
+    )
+    for i, marc_file in enumerate(mock_marc_files["file_list"]):
+        pathlib.Path(marc_file).write_text(f"record {i}")
+
+    transmit_data_ftp_task.function("ftp-example.com", mock_marc_files)
+    transmit_data = transmit_data_ftp_task.function("ftp-example.com", mock_marc_files)
+
+    assert transmit_data["success"] == mock_marc_files["file_list"]
+    assert stored == mock_marc_files["file_list"]
+    manifest_file = mock_file_system[3].parent / "manifest.jsonl"
+    assert len(manifest_file.read_text().splitlines()) == 3
+
+
+def test_transmit_data_ftp_task_same_content_different_files(
+    mocker, mock_ftphook_connection, mock_marc_files
+):
+    stored = []
+
+    def mock_store_file(self, remote_file_path, local_file):
+        stored.append(remote_file_path)
+
+    mocker.patch("airflow.providers.ftp.hooks.ftp.FTPHook.store_file", mock_store_file)
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.Connection.get_connection_from_secrets",
+        return_value=mock_ftphook_connection,
+    )
+    mocker.patch(
+        "libsys_airflow.plugins.data_exports.transmission_tasks.is_production",
+        return_value=True,
+    )
+    # Each day's deletes file can have the same bytes as an earlier one
+    for marc_file in mock_marc_files["file_list"]:
+        pathlib.Path(marc_file).write_text("same records")
+
+    transmit_data = transmit_data_ftp_task.function("ftp-example.com", mock_marc_files)
+
+    assert transmit_data["success"] == mock_marc_files["file_list"]
+    assert sorted(stored) == [
+        "/remote/path/dir/2024022914.xml",
+        "/remote/path/dir/2024030114.xml",
+        "/remote/path/dir/2024030214.xml",
+    ]
@@ -2,6 +2,7 @@ import json
 import httpx
 import pymarc
 import pytest
+import re
 
 from libsys_airflow.plugins.shared import utils
 
@@ -92,10 +93,32 @@ def mock_folio_client(mocker):
 
         return output
 
+    def mock_folio_get_all(*args, **kwargs):
+        instance_uuids = re.findall(r"[0-9a-f]{8}-[0-9a-f-]{27}", kwargs["query"])
+        for instance_uuid in instance_uuids:
+            instance = mock_folio_get(f"/inventory/instances/{instance_uuid}")
+            if instance:
+                yield {"id": instance_uuid, **instance}
+
+    def mock_folio_post(*args, **kwargs):
+        source_records = []
+        for instance_uuid in args[1]:
+            srs_result = __srs_response__(f"instanceId={instance_uuid}")
+            for source_record in srs_result.get("sourceRecords", []):
+                source_records.append(
+                    {
+                        "externalIdsHolder": {"instanceId": instance_uuid},
+                        **source_record,
+                    }
+                )
+        return {"sourceRecords": source_records}
+
     mock = mocker
     mock.okapi_headers = {}
     mock.okapi_url = "http://okapi:9130"
     mock.folio_get = mock_folio_get
+    mock.folio_get_all = mock_folio_get_all
+    mock.folio_post = mock_folio_post
     return mock
 
 
@@ -194,3 +217,63 @@ def test_put_folio_records_failed(mock_folio_add_marc_tags_failed, caplog):
         "Failed to update FOLIO for Instance 242c6000-8485-5fcd-9b5e-adb60788ca59 with SRS e5c1d877-5707-4bd7-8576-1e2e69d83e70"
         in caplog.text
     )
+
+
+def test_put_folio_records_batch(mock_folio_add_marc_tags, caplog):
+    add_marc_tag = utils.FolioAddMarcTags()
+    put_records_result = add_marc_tag.put_folio_records_batch(
+        {
+            "64a5a15b-d89e-4bdd-bbd6-fcd215b367e4": marc_instance_tags,
+            "242c6000-8485-5fcd-9b5e-adb60788ca59": marc_instance_tags,
+            "f19fd2fc-586c-45df-9b0c-127af97aef34": marc_instance_tags,
+        },
+        batch_size=2,
+    )
+
+    assert put_records_result == {
+        "64a5a15b-d89e-4bdd-bbd6-fcd215b367e4": True,
+        "242c6000-8485-5fcd-9b5e-adb60788ca59": True,
+        "f19fd2fc-586c-45df-9b0c-127af97aef34": False,
+    }
+    assert (
+        "Failed to retrieve Active SRS uuid for Instance f19fd2fc-586c-45df-9b0c-127af97aef34"
+        in caplog.text
+    )
+    assert "Updated 2 of 3 FOLIO instances with new MARC tags" in caplog.text
+
+
+def test_put_folio_records_batch_failed(mock_folio_add_marc_tags_failed, caplog):
+    add_marc_tag = utils.FolioAddMarcTags()
+
+    def mock_folio_post(*args, **kwargs):
+        raise httpx.HTTPStatusError(
+            "500 Internal Server Error",
+            request=httpx.Request('POST', args[0]),
+            response=httpx.Response(500),
+        )
+
+    put_records_result = add_marc_tag.put_folio_records_batch(
+        {
+            "64a5a15b-d89e-4bdd-bbd6-fcd215b367e4": marc_instance_tags,
+            "242c6000-8485-5fcd-9b5e-adb60788ca59": marc_instance_tags,
+        },
+        batch_size=1,
+    )
+
+    assert put_records_result == {
+        "64a5a15b-d89e-4bdd-bbd6-fcd215b367e4": False,
+        "242c6000-8485-5fcd-9b5e-adb60788ca59": False,
+    }
+    assert (
+        "Failed to update FOLIO for Instance 242c6000-8485-5fcd-9b5e-adb60788ca59 with SRS e5c1d877-5707-4bd7-8576-1e2e69d83e70"
+        in caplog.text
+    )
+
+    add_marc_tag.folio_client.folio_post = mock_folio_post
+
+    put_records_result = add_marc_tag.put_folio_records_batch(
+        {"64a5a15b-d89e-4bdd-bbd6-fcd215b367e4": marc_instance_tags}
+    )
+
+    assert put_records_result == {"64a5a15b-d89e-4bdd-bbd6-fcd215b367e4": False}
+    assert "Failed to retrieve SRS records for 1 instances" in caplog.text